@@ -0,0 +1 @@
+# Benchmarks de desempenho do projeto (executar com: python -m benchmarks.<nome>)
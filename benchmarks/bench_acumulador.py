@@ -0,0 +1,95 @@
+"""
+bench_acumulador.py
+Compara a montagem do DataFrame da coleta por dicionários (um dict e um
+pd.to_datetime por post) com o acumulador colunar de coleta_instagram.
+
+Uso:
+    python -m benchmarks.bench_acumulador --posts 100000
+"""
+
+import argparse
+import datetime
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import pandas as pd
+
+from modules.coleta_instagram import _AcumuladorColunar
+
+
+def gerar_posts(n: int):
+    inicio = datetime.datetime(2025, 1, 1)
+    return [
+        SimpleNamespace(
+            mediaid=3_000_000_000_000_000_000 + i,
+            shortcode=f"C{i:010d}",
+            caption=f"Legenda do post {i} #tag{i % 50}",
+            date_utc=inicio + datetime.timedelta(minutes=i),
+            likes=i % 5000,
+            comments=i % 300,
+            is_video=i % 7 == 0,
+        )
+        for i in range(n)
+    ]
+
+
+def por_dicionarios(posts, username: str) -> pd.DataFrame:
+    """Caminho anterior: um dict e um pd.to_datetime por post."""
+    rows = []
+    for post in posts:
+        shortcode = post.shortcode
+        rows.append(
+            {
+                "post_id": int(post.mediaid),
+                "shortcode": shortcode,
+                "url": f"https://www.instagram.com/p/{shortcode}/",
+                "caption": post.caption or "",
+                "datetime": pd.to_datetime(post.date_utc),
+                "likes": int(post.likes),
+                "comments": int(post.comments),
+                "is_video": bool(post.is_video),
+            }
+        )
+    df = pd.DataFrame(rows)
+    df["date"] = df["datetime"].dt.date
+    df["hour"] = df["datetime"].dt.hour
+    df.insert(0, "profile", username)
+    return df
+
+
+def colunar(posts, username: str) -> pd.DataFrame:
+    acumulador = _AcumuladorColunar()
+    for post in posts:
+        acumulador.adicionar(post)
+    return acumulador.para_dataframe(username)
+
+
+def medir(func, posts):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    df = func(posts, "perfil")
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "metodo": func.__name__,
+        "segundos": round(segundos, 3),
+        "us_por_post": round(segundos / len(posts) * 1e6, 2),
+        "pico_mb": round(pico / 1024**2, 1),
+        "df_mb": round(df.memory_usage(deep=True).sum() / 1024**2, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    posts = gerar_posts(args.posts)
+    resultados = [medir(por_dicionarios, posts), medir(colunar, posts)]
+    print(pd.DataFrame(resultados).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
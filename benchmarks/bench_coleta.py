@@ -0,0 +1,121 @@
+"""
+bench_coleta.py
+Benchmark de carga do coletor contra o backend local (modules/instagram_fake.py).
+
+Mede, para 100, 10k e 100k posts, a coleta serial (coletar_posts_publicos
+perfil a perfil) e a concorrente (coletar_varios_perfis):
+- vazão (posts/s)
+- latência das requisições simuladas (p50, p95, p99)
+- pico de memória (tracemalloc)
+
+Uso:
+    python -m benchmarks.bench_coleta
+    python -m benchmarks.bench_coleta --posts 100 10000 --latencia 0.005 --saida out.json
+"""
+
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from modules.coleta_instagram import (
+    LimitadorTaxa,
+    coletar_posts_publicos,
+    coletar_varios_perfis,
+)
+from modules.instagram_fake import BackendFake
+
+
+def _perfis(total: int, n_perfis: int):
+    base, resto = divmod(total, n_perfis)
+    return {f"perfil_{i:03d}": base + (i < resto) for i in range(n_perfis)}
+
+
+def coleta_serial(backend: BackendFake) -> int:
+    total = 0
+    for username in backend.perfis:
+        df = coletar_posts_publicos(
+            username, max_posts=None, save_csv=False, loader=backend.loader()
+        )
+        total += len(df)
+    return total
+
+
+def coleta_concorrente(backend: BackendFake, workers: int, taxa: float) -> int:
+    limitador = LimitadorTaxa(taxa, rajada=workers)
+    df, _ = coletar_varios_perfis(
+        list(backend.perfis),
+        max_posts=None,
+        max_workers=workers,
+        save_csv=False,
+        limitador=limitador,
+        loader_factory=lambda: backend.loader(limitador),
+    )
+    return len(df)
+
+
+def executar(modo: str, total: int, args) -> dict:
+    backend = BackendFake(
+        _perfis(total, args.perfis),
+        latencia=args.latencia,
+        jitter=args.latencia / 2,
+        tamanho_pagina=args.pagina,
+    )
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    with backend.ativar():
+        if modo == "serial":
+            coletados = coleta_serial(backend)
+        else:
+            coletados = coleta_concorrente(backend, args.workers, args.taxa)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lat = np.array(backend.latencias) * 1000
+    return {
+        "modo": modo,
+        "posts": total,
+        "coletados": coletados,
+        "segundos": round(segundos, 3),
+        "posts_por_s": round(coletados / segundos, 1),
+        "requisicoes": backend.requisicoes,
+        "lat_p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "lat_p95_ms": round(float(np.percentile(lat, 95)), 2),
+        "lat_p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "pico_mb": round(pico / 1024**2, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--perfis", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latencia", type=float, default=0.002)
+    parser.add_argument("--pagina", type=int, default=12)
+    parser.add_argument("--taxa", type=float, default=1e6, help="requisições/s")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("modules").setLevel(logging.WARNING)
+
+    resultados = [
+        executar(modo, total, args)
+        for total in args.posts
+        for modo in ("serial", "concorrente")
+    ]
+    print(pd.DataFrame(resultados).to_string(index=False))
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+bench_escalabilidade.py
+Escalabilidade do treino e da inferência do modelo de engajamento, de 1 mil
+a 10 milhões de linhas sintéticas (dados_sinteticos.gerar_dados_engajamento).
+
+Para cada combinação (configuração do estimador, n_jobs, linhas) mede:
+tempo de treino, vazão de previsão (linhas/s), pico de memória (RSS), tamanho
+do modelo gravado com joblib e R² nos 20% de teste. Cada medição roda em um
+processo novo, para que o pico de memória seja só dela (com n_jobs != 1, os
+workers do joblib são processos à parte e o pico é o do maior deles).
+
+Quando o treino de uma combinação passa de --limite-treino-s, os tamanhos
+maiores dela são pulados (status "limite"): é o ponto em que aquela
+configuração deixa de ser viável. O resumo final mostra o maior tamanho
+viável de cada uma.
+
+Os resultados são acrescentados, uma linha JSON por medição (com data, commit
+e máquina), em --saida, para comparar execuções ao longo do tempo.
+
+Uso:
+    python -m benchmarks.bench_escalabilidade
+    python -m benchmarks.bench_escalabilidade --linhas 1000 100000 10000000 \\
+        --configs rf_atual hgb --n-jobs 1 -1 --features completo
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from typing import Dict, List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAIDA_PADRAO = os.path.join(RAIZ, "benchmarks", "resultados", "escalabilidade.jsonl")
+
+# nome: (classe, parâmetros). "rf_atual" é o estimador de prever_engajamento.
+CONFIGS: Dict[str, tuple] = {
+    "rf_atual": ("sklearn.ensemble.RandomForestRegressor", {}),
+    "rf_50_prof12": (
+        "sklearn.ensemble.RandomForestRegressor",
+        {"n_estimators": 50, "max_depth": 12, "min_samples_leaf": 5},
+    ),
+    "rf_amostra_10pct": (
+        "sklearn.ensemble.RandomForestRegressor",
+        {"n_estimators": 100, "max_samples": 0.1, "min_samples_leaf": 5},
+    ),
+    "hgb": ("sklearn.ensemble.HistGradientBoostingRegressor", {"max_iter": 200}),
+}
+
+FEATURES = {
+    "modelo": ["hora_postagem", "dia_semana", "hashtag_tendencia"],
+    "completo": [
+        "hora_postagem",
+        "dia_semana",
+        "hashtag_tendencia",
+        "tamanho_legenda",
+        "n_hashtags",
+        "tipo_midia",
+        "media_curtidas_perfil",
+    ],
+}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+# -----------------------------------------------------------------------------
+# Uma medição (processo filho)
+# -----------------------------------------------------------------------------
+def medir(config: str, n_jobs: int, linhas: int, features: str) -> Dict:
+    import resource
+    import importlib
+
+    import joblib
+    from sklearn.metrics import r2_score
+
+    from modules.dados_sinteticos import gerar_dados_engajamento
+
+    classe, params = CONFIGS[config]
+    modulo, nome = classe.rsplit(".", 1)
+    estimador = getattr(importlib.import_module(modulo), nome)(
+        random_state=42, **params
+    )
+    if "n_jobs" in estimador.get_params():
+        estimador.set_params(n_jobs=n_jobs)
+
+    df = gerar_dados_engajamento(linhas, semente=0)
+    corte = int(linhas * 0.8)
+    X, y = df[FEATURES[features]], df["curtidas"]
+    X_train, X_test, y_train, y_test = X[:corte], X[corte:], y[:corte], y[corte:]
+
+    inicio = time.perf_counter()
+    estimador.fit(X_train, y_train)
+    treino_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    previstas = estimador.predict(X_test)
+    previsao_s = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "modelo.joblib")
+        joblib.dump(estimador, caminho)
+        tamanho = os.path.getsize(caminho)
+
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    escala = 1 if sys.platform == "darwin" else 1024
+    pico = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return {
+        "treino_s": round(treino_s, 3),
+        "previsao_linhas_s": round(len(X_test) / max(previsao_s, 1e-9)),
+        "pico_memoria_mb": round(pico * escala / 2**20, 1),
+        "tamanho_modelo_mb": round(tamanho / 2**20, 2),
+        "r2": round(float(r2_score(y_test, previstas)), 4),
+    }
+
+
+def _rodar_isolado(config, n_jobs, linhas, features, timeout) -> Dict:
+    comando = [
+        sys.executable,
+        "-m",
+        "benchmarks.bench_escalabilidade",
+        "--medir",
+        json.dumps([config, n_jobs, linhas, features]),
+    ]
+    try:
+        processo = subprocess.run(
+            comando, cwd=RAIZ, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {"status": "timeout"}
+    if processo.returncode != 0:
+        # Ex.: morto por falta de memória (returncode negativo)
+        erro = processo.stderr.strip().splitlines()[-1:] or [str(processo.returncode)]
+        return {"status": "erro", "erro": erro[0]}
+    return {"status": "ok", **json.loads(processo.stdout.strip().splitlines()[-1])}
+
+
+# -----------------------------------------------------------------------------
+# Varredura
+# -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--linhas",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 1_000_000, 10_000_000],
+    )
+    parser.add_argument(
+        "--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS)
+    )
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1, -1])
+    parser.add_argument("--features", choices=list(FEATURES), default="modelo")
+    parser.add_argument("--limite-treino-s", type=float, default=300.0)
+    parser.add_argument("--saida", default=SAIDA_PADRAO)
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.medir:
+        print(json.dumps(medir(*json.loads(args.medir))))
+        return
+
+    import pandas as pd
+    import sklearn
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+    contexto = {
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "maquina": platform.node(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "sklearn": sklearn.__version__,
+        "features": args.features,
+    }
+
+    resultados: List[Dict] = []
+    for config in args.configs:
+        for n_jobs in args.n_jobs:
+            inviavel = False
+            for linhas in sorted(args.linhas):
+                linha = {
+                    "config": config,
+                    "params": CONFIGS[config][1],
+                    "n_jobs": n_jobs,
+                    "linhas": linhas,
+                }
+                if inviavel:
+                    linha["status"] = "limite"
+                else:
+                    # Folga para gerar os dados, prever e gravar o modelo
+                    timeout = 3 * args.limite_treino_s + 60
+                    linha.update(
+                        _rodar_isolado(config, n_jobs, linhas, args.features, timeout)
+                    )
+                    inviavel = linha["status"] != "ok" or (
+                        linha["treino_s"] > args.limite_treino_s
+                    )
+
+                resultados.append(linha)
+                with open(args.saida, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({**contexto, **linha}) + "\n")
+                print(
+                    f"{config:<18} n_jobs={n_jobs:<3} {linhas:>10,} linhas: "
+                    + (
+                        f"treino {linha['treino_s']:.2f}s | "
+                        f"{linha['previsao_linhas_s']:,} linhas/s | "
+                        f"{linha['pico_memoria_mb']:.0f} MB | "
+                        f"modelo {linha['tamanho_modelo_mb']:.1f} MB | "
+                        f"R² {linha['r2']:.3f}"
+                        if linha["status"] == "ok"
+                        else linha["status"]
+                    ),
+                    flush=True,
+                )
+
+    tabela = pd.DataFrame(resultados)
+    viaveis = tabela[tabela["status"] == "ok"]
+    if not viaveis.empty:
+        limite = args.limite_treino_s
+        viaveis = viaveis[viaveis["treino_s"] <= limite]
+        resumo = viaveis.groupby(["config", "n_jobs"])["linhas"].max()
+        print(f"\nMaior tamanho com treino <= {limite:.0f}s:")
+        print(resumo.to_string())
+    print(f"\nResultados acrescentados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
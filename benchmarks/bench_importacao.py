@@ -0,0 +1,140 @@
+"""
+bench_importacao.py
+Mede o tempo de importação dos pontos de entrada com `python -X importtime`
+e confere o orçamento de cada um.
+
+Para cada módulo, roda um interpretador novo (sem cache de módulos em
+memória) algumas vezes e fica com a menor medição. Também verifica que as
+dependências pesadas não são carregadas só por importar o módulo: elas
+devem ser importadas dentro do estágio que as usa.
+
+Uso:
+    python -m benchmarks.bench_importacao
+    python -m benchmarks.bench_importacao --modulos main modules.modelo --repeticoes 5
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tempo acumulado máximo de importação (ms), medido pelo -X importtime
+ORCAMENTOS_MS: Dict[str, float] = {
+    "main": 150.0,
+    "modules.pipeline": 100.0,
+    "modules.visualizacao": 50.0,
+    "modules.otimizacao_engajamento": 50.0,
+    "modules.geracao_conteudo": 50.0,
+    "modules.analise_tendencias": 50.0,
+}
+
+# Pacotes que não podem ser carregados apenas pela importação dos módulos acima
+PESADOS = [
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "instaloader",
+    "sqlalchemy",
+    "sklearn",
+    "matplotlib",
+    "seaborn",
+    "transformers",
+    "tweepy",
+    "textblob",
+    "dotenv",
+    "loguru",
+]
+
+_LINHA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _executar(modulo: str) -> str:
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return resultado.stderr
+
+
+def analisar_importtime(saida: str, modulo: str) -> Dict:
+    """
+    Extrai do relatório do -X importtime o tempo acumulado de `modulo` (ms),
+    os pacotes de topo carregados por ele e os maiores contribuintes.
+    """
+    linhas = []
+    for linha in saida.splitlines():
+        m = _LINHA.match(linha)
+        if m:
+            proprio, acumulado, recuo, nome = m.groups()
+            linhas.append((nome, int(proprio), int(acumulado), len(recuo)))
+
+    # O relatório lista os filhos antes do pai, com recuo maior: a árvore do
+    # módulo pedido são as linhas logo acima dele com recuo maior que o seu
+    fim = max(i for i, (nome, *_) in enumerate(linhas) if nome == modulo)
+    inicio = fim
+    while inicio > 0 and linhas[inicio - 1][3] > linhas[fim][3]:
+        inicio -= 1
+    arvore = linhas[inicio : fim + 1]
+
+    maiores = sorted(arvore, key=lambda l: l[1], reverse=True)[:5]
+    return {
+        "modulo": modulo,
+        "ms": round(linhas[fim][2] / 1000, 1),
+        "pacotes": sorted({nome.split(".")[0] for nome, *_ in arvore}),
+        "maiores": [(nome, round(proprio / 1000, 1)) for nome, proprio, *_ in maiores],
+    }
+
+
+def medir_importacao(modulo: str, repeticoes: int = 3) -> Dict:
+    """Menor das `repeticoes` medições, cada uma em um processo novo."""
+    medicoes = [
+        analisar_importtime(_executar(modulo), modulo) for _ in range(repeticoes)
+    ]
+    return min(medicoes, key=lambda m: m["ms"])
+
+
+def verificar_orcamento(medicao: Dict) -> List[str]:
+    """Lista de violações (vazia se o módulo está dentro do orçamento)."""
+    violacoes = []
+    orcamento = ORCAMENTOS_MS.get(medicao["modulo"])
+    if orcamento is not None and medicao["ms"] > orcamento:
+        violacoes.append(
+            f"{medicao['modulo']}: {medicao['ms']} ms > orçamento de {orcamento} ms"
+        )
+
+    pesados = sorted(set(medicao["pacotes"]) & set(PESADOS))
+    if pesados:
+        violacoes.append(f"{medicao['modulo']}: importa {', '.join(pesados)}")
+    return violacoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modulos", nargs="+", default=list(ORCAMENTOS_MS))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    violacoes = []
+    for modulo in args.modulos:
+        medicao = medir_importacao(modulo, args.repeticoes)
+        orcamento = ORCAMENTOS_MS.get(modulo, "-")
+        maiores = ", ".join(f"{n} {ms}ms" for n, ms in medicao["maiores"][:3])
+        print(
+            f"{modulo:35s} {medicao['ms']:8.1f} ms  (orçamento {orcamento})  {maiores}"
+        )
+        violacoes += verificar_orcamento(medicao)
+
+    for v in violacoes:
+        print(f"[ACIMA DO ORÇAMENTO] {v}")
+    sys.exit(1 if violacoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_indice_vistos.py
+Mede o IndiceVistos com dezenas de milhões de posts conhecidos: carga,
+gravação, reabertura e consultas (em lote e uma a uma, como na coleta).
+
+Uso:
+    python -m benchmarks.bench_indice_vistos --posts 20000000
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.indice_vistos import IndiceVistos
+
+
+def cronometrar(resultados, etapa, func, n):
+    inicio = time.perf_counter()
+    retorno = func()
+    segundos = time.perf_counter() - inicio
+    resultados.append(
+        {
+            "etapa": etapa,
+            "segundos": round(segundos, 3),
+            "us_por_post": round(segundos / n * 1e6, 2),
+        }
+    )
+    return retorno
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=20_000_000)
+    parser.add_argument("--consultas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    conhecidos = rng.integers(1, 2**62, args.posts, dtype=np.int64).astype(np.uint64)
+    desconhecidos = rng.integers(1, 2**62, args.consultas, dtype=np.int64)
+    consultas = np.concatenate(
+        [
+            conhecidos[: args.consultas // 2],
+            desconhecidos[: args.consultas // 2].astype(np.uint64),
+        ]
+    )
+    resultados = []
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        indice = IndiceVistos(diretorio, capacidade=args.posts)
+
+        def carregar():
+            for i in range(0, args.posts, 1_000_000):
+                indice.adicionar_muitos(conhecidos[i : i + 1_000_000])
+
+        cronometrar(resultados, "adicionar", carregar, args.posts)
+        cronometrar(resultados, "salvar", indice.salvar, args.posts)
+
+        indice = cronometrar(
+            resultados, "reabrir", lambda: IndiceVistos(diretorio), args.posts
+        )
+        vistos = cronometrar(
+            resultados,
+            "contem_muitos",
+            lambda: indice.contem_muitos(consultas),
+            len(consultas),
+        )
+        amostra = consultas[:: max(1, len(consultas) // 20_000)]
+        cronometrar(
+            resultados,
+            "contem (1 a 1)",
+            lambda: [indice.contem(int(c)) for c in amostra],
+            len(amostra),
+        )
+
+        stats = indice.estatisticas()
+
+    print(pd.DataFrame(resultados).to_string(index=False))
+    print(
+        f"\nAcertos: {int(vistos.sum())}/{len(consultas)} | "
+        f"filtro {stats['filtro_mb']} MB, ids {stats['ids_mb']} MB | "
+        f"descartados pelo filtro: {stats['descartados_bloom']}, "
+        f"fallback exato: {stats['fallbacks']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+bench_servico_previsao.py
+Vazão e latência do serviço de previsão com clientes simultâneos (conexões
+keep-alive, uma linha por requisição), com e sem micro-lotes.
+
+Uso:
+    python -m benchmarks.bench_servico_previsao --clientes 32 --requisicoes 50
+"""
+
+import argparse
+import http.client
+import json
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.otimizacao_engajamento import prever_engajamento
+from modules.registro_modelos import RegistroModelos
+from modules.servico_previsao import ServicoPrevisao
+
+
+def treinar(registro, n=5_000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "hora_postagem": rng.integers(0, 24, n),
+            "dia_semana": rng.integers(0, 7, n),
+            "hashtag_tendencia": rng.integers(0, 2, n),
+        }
+    )
+    df["curtidas"] = 1000 - (df["hora_postagem"] - 19) ** 2 + rng.normal(0, 20, n)
+    prever_engajamento(df, registro=registro)
+
+
+def cliente(host, porta, n, latencias):
+    conexao = http.client.HTTPConnection(host, porta, timeout=60)
+    for i in range(n):
+        corpo = json.dumps(
+            {"hora_postagem": i % 24, "dia_semana": i % 7, "hashtag_tendencia": i % 2}
+        )
+        inicio = time.perf_counter()
+        conexao.request(
+            "POST", "/prever", body=corpo, headers={"Content-Type": "application/json"}
+        )
+        resposta = conexao.getresponse()
+        resposta.read()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        assert resposta.status == 200
+    conexao.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--requisicoes", type=int, default=50)
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        registro = RegistroModelos(diretorio)
+        treinar(registro)
+
+        for nome, lote_max in (("sem micro-lotes", 1), ("micro-lotes", 512)):
+            servico = ServicoPrevisao(porta=0, registro=registro, lote_max=lote_max)
+            servico.iniciar_em_thread()
+
+            latencias = []
+            threads = [
+                threading.Thread(
+                    target=cliente,
+                    args=(servico.host, servico.porta, args.requisicoes, latencias),
+                )
+                for _ in range(args.clientes)
+            ]
+            inicio = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            segundos = time.perf_counter() - inicio
+
+            stats = servico.estatisticas()
+            servico.parar()
+            resultados.append(
+                {
+                    "modo": nome,
+                    "req_s": round(len(latencias) / segundos),
+                    "cliente_p50_ms": round(float(np.percentile(latencias, 50)), 1),
+                    "cliente_p99_ms": round(float(np.percentile(latencias, 99)), 1),
+                    "servidor_p50_ms": stats["latencia_p50_ms"],
+                    "servidor_p99_ms": stats["latencia_p99_ms"],
+                    "lotes": stats["lotes"],
+                    "lote_medio": stats["lote_medio"],
+                }
+            )
+
+    print(pd.DataFrame(resultados).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
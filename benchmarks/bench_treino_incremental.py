@@ -0,0 +1,104 @@
+"""
+bench_treino_incremental.py
+Compara, lote a lote, o retreino completo do modelo de engajamento sobre
+todo o histórico com a atualização incremental (atualizar_engajamento),
+em tempo e em R² sobre um conjunto fixo de teste.
+
+Uso:
+    python -m benchmarks.bench_treino_incremental --inicial 20000 --lote 2000 --lotes 10
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.otimizacao_engajamento import (
+    FEATURES,
+    ALVO,
+    atualizar_engajamento,
+    prever_engajamento,
+)
+from modules.registro_modelos import RegistroModelos
+
+
+def gerar_posts(n, rng):
+    df = pd.DataFrame(
+        {
+            "hora_postagem": rng.integers(0, 24, n),
+            "dia_semana": rng.integers(0, 7, n),
+            "hashtag_tendencia": rng.integers(0, 2, n),
+        }
+    )
+    df[ALVO] = (
+        1000
+        - 2 * (df["hora_postagem"] - 19) ** 2
+        + 30 * (df["dia_semana"] >= 5)
+        + 80 * df["hashtag_tendencia"]
+        + rng.normal(0, 40, n)
+    )
+    return df
+
+
+def cronometrar(func):
+    inicio = time.perf_counter()
+    retorno = func()
+    return retorno, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--inicial", type=int, default=20_000)
+    parser.add_argument("--lote", type=int, default=2_000)
+    parser.add_argument("--lotes", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    teste = gerar_posts(20_000, rng)
+    historico = gerar_posts(args.inicial, rng)
+    resultados = []
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        completo = RegistroModelos(f"{diretorio}/completo")
+        incremental = RegistroModelos(f"{diretorio}/incremental")
+        prever_engajamento(historico, registro=incremental)
+
+        for i in range(args.lotes):
+            lote = gerar_posts(args.lote, rng)
+            historico = pd.concat([historico, lote], ignore_index=True)
+
+            (modelo_c, _), s_c = cronometrar(
+                lambda: prever_engajamento(historico, registro=completo)
+            )
+            (modelo_i, _), s_i = cronometrar(
+                lambda: atualizar_engajamento(lote, registro=incremental)
+            )
+            resultados.append(
+                {
+                    "lote": i + 1,
+                    "historico": len(historico),
+                    "completo_s": round(s_c, 3),
+                    "incremental_s": round(s_i, 3),
+                    "r2_completo": round(
+                        modelo_c.score(teste[FEATURES], teste[ALVO]), 4
+                    ),
+                    "r2_incremental": round(
+                        modelo_i.score(teste[FEATURES], teste[ALVO]), 4
+                    ),
+                    "arvores": len(modelo_i.estimators_),
+                }
+            )
+
+    tabela = pd.DataFrame(resultados)
+    print(tabela.to_string(index=False))
+    print(
+        f"\nTotal: completo {tabela['completo_s'].sum():.2f}s | "
+        f"incremental {tabela['incremental_s'].sum():.2f}s "
+        f"({tabela['completo_s'].sum() / tabela['incremental_s'].sum():.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,37 +5,44 @@
 # e executa previsão de engajamento.
 
 import os
-import pandas as pd
-from dotenv import load_dotenv
+import argparse
 
 # --- Módulos Internos ---
-from utils.logger import configurar_logger
-from modules.coleta_instagram import coletar_posts_publicos
-from modules.dados_sinteticos import gerar_dados_sinteticos
-from modules.modelo import criar_dataframe_posts
-from modules.graficos import grafico_pizza, grafico_barras, grafico_piramide
-
-load_dotenv()
+# Dependências pesadas (pandas, instaloader, pyarrow, matplotlib...) são
+# importadas dentro de cada estágio, para que `python main.py --help` ou a
+# execução de um único estágio não pague pelas demais.
+from modules.pipeline import CacheEstagios, Estagio, Pipeline
 
 # Caminho do CSV
 CAMINHO_CSV = os.path.join("data", "posts_exemplo.csv")
 
-# Cria pasta de saída para gráficos:
+# Pasta de saída para gráficos:
 OUTPUT_DIR = "output"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Logger Central:
-logger = configurar_logger("execucao.log", nivel="INFO")
+_logger = None
+
+
+def obter_logger():
+    """Logger central, configurado na primeira utilização."""
+    global _logger
+    if _logger is None:
+        from utils.logger import configurar_logger
+
+        _logger = configurar_logger("execucao.log", nivel="INFO")
+    return _logger
+
 
+def coletar_dados_instagram(perfil=None, max_posts=20):
+    from modules.coleta_instagram import coletar_posts_publicos
 
-def coletar_dados_instagram():
-    perfil = os.getenv("PERFIL_EXEMPLO")
+    logger = obter_logger()
+    perfil = perfil or os.getenv("PERFIL_EXEMPLO")
     print(f"📸 Coletando posts do perfil: {perfil}")
 
     try:
         df_instagram = coletar_posts_publicos(
             username=perfil,
-            max_posts=20,
+            max_posts=max_posts,
             save_csv=True,
             csv_path=CAMINHO_CSV,
             download_media=False,
@@ -48,24 +55,44 @@ def coletar_dados_instagram():
         return None
 
 
-def carregar_dados(caminho: str) -> pd.DataFrame:
-    if not os.path.exists(caminho):
-        raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+def carregar_dados(caminho: str, profile=None, inicio=None, fim=None, colunas=None):
+    """
+    Carrega os posts pela camada Parquet: o CSV é migrado uma única vez e as
+    leituras seguintes usam apenas as partições e colunas pedidas.
+    """
+    from modules.armazenamento_parquet import carregar_posts
 
-    try:
-        df = pd.read_csv(caminho, encoding="utf-8")
+    df = carregar_posts(
+        caminho, profile=profile, inicio=inicio, fim=fim, colunas=colunas
+    )
 
-    except UnicodeDecodeError:
-        df = pd.read_csv(caminho, encoding="latin-1")
+    obter_logger().info(f"📊 Dados carregados: {len(df)} registros")
+    return df
 
-    logger.info(f"📊 Dados carregados: {len(df)} registros")
+
+def normalizar_dados(df_raw):
+    """Normalização de dados pelo modelo.py."""
+    from modules.modelo import criar_dataframe_posts
+
+    df = criar_dataframe_posts(df_raw)
+    obter_logger().info("🔧 DataFrame tratado e pronto para visualização.")
     return df
 
 
-def gerar_graficos(df: pd.DataFrame):
+GRAFICOS = [
+    os.path.join(OUTPUT_DIR, nome)
+    for nome in ("pizza_likes.png", "barras_likes.png", "piramide_engajamento.png")
+]
+
+
+def gerar_graficos(df):
     """
     Gera gráficos tecnológicos a partir dos dados.
     """
+    from modules.graficos import grafico_pizza, grafico_barras, grafico_piramide
+
+    logger = obter_logger()
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     logger.info("⚡Gerando gráficos tecnológicos...")
 
@@ -91,22 +118,115 @@ def gerar_graficos(df: pd.DataFrame):
     )
 
     logger.info("📁 Gráficos salvos na pasta / output")
+    return GRAFICOS
 
 
-def main():
-    try:
-        coletar_dados_instagram()
+def construir_pipeline(cache=None) -> Pipeline:
+    """
+    Pipeline coleta -> carregar -> normalizar -> graficos.
+
+    A coleta é reaproveitada por PIPELINE_VALIDADE_COLETA segundos (padrão:
+    6 horas); a carga é refeita só quando o conteúdo do CSV muda, e os demais
+    estágios quando o estágio anterior muda.
+    """
+    return Pipeline(
+        [
+            Estagio(
+                "coleta",
+                coletar_dados_instagram,
+                params={"perfil": os.getenv("PERFIL_EXEMPLO"), "max_posts": 20},
+                saidas=[CAMINHO_CSV],
+                validade=float(os.getenv("PIPELINE_VALIDADE_COLETA", str(6 * 3600))),
+            ),
+            Estagio(
+                "carregar",
+                carregar_dados,
+                params={"caminho": CAMINHO_CSV},
+                arquivos=[CAMINHO_CSV],
+            ),
+            Estagio("normalizar", normalizar_dados, entradas=["carregar"]),
+            Estagio(
+                "graficos", gerar_graficos, entradas=["normalizar"], saidas=GRAFICOS
+            ),
+        ],
+        cache=cache,
+    )
+
+
+def executar_daemon(perfis=None):
+    """
+    Modo daemon: coleta periódica dos perfis (DAEMON_PERFIS ou `perfis`) em um
+    único processo, reaproveitando sessões e conexões entre as execuções.
+    """
+    from modules.agendador import Agendador, tarefas_configuradas
 
-        df_raw = carregar_dados(CAMINHO_CSV)
+    logger = obter_logger()
+    tarefas = tarefas_configuradas(perfis) if perfis else tarefas_configuradas()
+    if not tarefas:
+        logger.warning("Nenhum perfil configurado para o daemon (DAEMON_PERFIS).")
+        return
 
-        # ---  🔵 NOVO: normalização de dados pelo modelo.py ---
-        df = criar_dataframe_posts(df_raw)
+    agendador = Agendador()
+    for perfil, intervalo in tarefas.items():
+        agendador.adicionar(perfil, intervalo)
 
-        logger.info("🔧 DataFrame tratado e pronto para visualização.")
+    logger.info(f"🕒 Daemon iniciado para {len(tarefas)} perfis.")
+    agendador.executar_para_sempre()
 
-        # ---  🔵 NOVO: gerar dashboards tecnológicos ---
-        gerar_graficos(df)
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline do ia_midia_project")
+    parser.add_argument(
+        "--from",
+        dest="a_partir_de",
+        choices=["coleta", "carregar", "normalizar", "graficos"],
+        help="Refaz este estágio e os seguintes, reaproveitando os anteriores",
+    )
+    parser.add_argument(
+        "--sem-cache",
+        action="store_true",
+        help="Executa todos os estágios sem ler nem gravar o cache",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Coleta os perfis periodicamente até ser interrompido",
+    )
+    parser.add_argument(
+        "--servir",
+        action="store_true",
+        help="Sobe o serviço local de previsão de engajamento (SERVICO_PORTA)",
+    )
+    parser.add_argument(
+        "--perfis",
+        help="Perfis do daemon, ex.: perfil_a:900,perfil_b (padrão: DAEMON_PERFIS)",
+    )
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logger = obter_logger()
+
+    if args.daemon:
+        executar_daemon(args.perfis)
+        return
+
+    if args.servir:
+        from modules.servico_previsao import ServicoPrevisao
+
+        ServicoPrevisao().servir()
+        return
+
+    try:
+        cache = None if args.sem_cache else CacheEstagios()
+        pipeline = construir_pipeline(cache)
+        pipeline.executar(a_partir_de=args.a_partir_de)
+
+        logger.info(
+            f"🔧 Estágios executados: {pipeline.executados or '-'} | "
+            f"em cache: {pipeline.pulados or '-'}"
+        )
         logger.info("🚀 Pipeline concluído com sucesso!")
     except Exception as e:
         logger.exception(f"Erro inesperado: {e}")
@@ -0,0 +1,370 @@
+"""
+agendador.py
+Modo daemon: coleta periódica de vários perfis em um único processo.
+
+Substitui o cron de `python main.py` por perfil. Como o processo continua
+vivo entre as execuções, reaproveita:
+
+- as sessões aquecidas do Instaloader (sessoes_instagram.pool_padrao)
+- as engines SQLite (armazenamento_posts.obter_engine)
+- qualquer estado carregado pelo callback `ao_concluir` (ex.: modelos)
+
+Funcionamento:
+- Tabela de tarefas (perfil -> intervalo de atualização em segundos)
+- Fila de prioridade pelo horário da próxima execução
+- Limite global de coletas simultâneas
+- Backoff exponencial com jitter após falhas
+- Estatísticas de fila e latência das tarefas
+
+Configuração via .env:
+    DAEMON_PERFIS=perfil_a:900,perfil_b        (intervalo opcional por perfil)
+    DAEMON_INTERVALO=3600                      (intervalo padrão, segundos)
+    DAEMON_MAX_CONCORRENCIA=2
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import heapq
+import random
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from modules.estatisticas import percentil
+
+logger = logging.getLogger(__name__)
+
+DAEMON_PERFIS = os.getenv("DAEMON_PERFIS", "")
+DAEMON_INTERVALO = float(os.getenv("DAEMON_INTERVALO", "3600"))
+DAEMON_MAX_CONCORRENCIA = int(os.getenv("DAEMON_MAX_CONCORRENCIA", "2"))
+
+
+def tarefas_configuradas(
+    perfis: str = DAEMON_PERFIS, intervalo_padrao: float = DAEMON_INTERVALO
+) -> Dict[str, float]:
+    """{perfil: intervalo} a partir de 'perfil_a:900,perfil_b'."""
+    tarefas = {}
+    for item in perfis.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        perfil, sep, intervalo = item.partition(":")
+        tarefas[perfil.strip()] = float(intervalo) if sep else intervalo_padrao
+    return tarefas
+
+
+def coletar_e_armazenar(
+    perfil: str, db_path: Optional[str] = None, chunk_size: int = 500
+) -> int:
+    """
+    Tarefa padrão: coleta incremental do perfil, gravada no SQLite em lotes
+    de `chunk_size` posts (memória constante, mesmo na primeira coleta de um
+    perfil grande). Retorna o número de posts gravados.
+
+    A marca d'água fica no banco (armazenamento_posts.marca_coleta) e só
+    avança depois que todos os lotes foram gravados: se a coleta ou um
+    upsert falhar, a próxima execução recomeça da marca anterior.
+
+    Usa o pool de sessões (com o limitador de taxa do processo) e a engine
+    SQLite, que continuam abertos entre uma execução e outra.
+    """
+    from modules.coleta_instagram import coletar_posts_em_chunks
+    from modules.sink_posts import SinkPosts
+    from modules.armazenamento_posts import (
+        SQLITE_DB,
+        gravar_marca_coleta,
+        marca_coleta,
+    )
+
+    db_path = db_path or SQLITE_DB
+    mais_recente = None
+    # Sem marca (primeira coleta), coleta o perfil inteiro
+    with SinkPosts(db_path) as sink:
+        for chunk in coletar_posts_em_chunks(
+            perfil,
+            chunk_size=chunk_size,
+            sink=sink,
+            marca=marca_coleta(perfil, db_path),
+        ):
+            datas = chunk["datetime"] if not chunk.empty else None
+            if datas is not None and datas.notna().any():
+                linha = chunk.loc[datas.idxmax()]
+                if mais_recente is None or linha["datetime"] > mais_recente["datetime"]:
+                    mais_recente = linha
+        total = sink.total
+
+    if mais_recente is not None:
+        gravar_marca_coleta(
+            perfil,
+            {"post_id": mais_recente["post_id"], "datetime": mais_recente["datetime"]},
+            db_path,
+        )
+    return total
+
+
+@dataclass
+class Tarefa:
+    perfil: str
+    intervalo: float
+    proxima: float = 0.0
+    execucoes: int = 0
+    falhas_seguidas: int = 0
+    em_execucao: bool = False
+    ultima_duracao: Optional[float] = None
+    ultimo_erro: Optional[str] = None
+    ativa: bool = True
+
+
+class Agendador:
+    """
+    Executa `funcao(perfil)` para cada tarefa no seu intervalo.
+
+    Argumentos:
+        funcao: coleta de um perfil (padrão: coletar_e_armazenar)
+        max_concorrencia: número máximo de tarefas rodando ao mesmo tempo
+        backoff_base / backoff_max: espera após falhas seguidas
+            (base * 2^(falhas-1), limitada a backoff_max, com jitter de ±50%)
+        ao_concluir: callback(perfil, resultado) chamado após cada sucesso
+    """
+
+    def __init__(
+        self,
+        funcao: Callable[[str], object] = coletar_e_armazenar,
+        max_concorrencia: int = DAEMON_MAX_CONCORRENCIA,
+        backoff_base: float = 30.0,
+        backoff_max: float = 3600.0,
+        ao_concluir: Optional[Callable[[str, object], None]] = None,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.funcao = funcao
+        self.max_concorrencia = max(1, max_concorrencia)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.ao_concluir = ao_concluir
+        self.relogio = relogio
+
+        self._tarefas: Dict[str, Tarefa] = {}
+        # Tarefas rodando agora, mesmo se removidas da tabela no meio
+        self._em_voo: Dict[str, Tarefa] = {}
+        self._fila: List = []  # heap (proxima, seq, perfil)
+        self._seq = 0
+        self._rodando = 0
+        self._cond = threading.Condition()
+        self._parar = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._latencias: List[float] = []
+        self._atrasos: List[float] = []
+        self.stats = {"execucoes": 0, "sucessos": 0, "falhas": 0}
+
+    # -------------------------------------------------------------------------
+    # Tabela de tarefas
+    # -------------------------------------------------------------------------
+    def _agendar(self, tarefa: Tarefa, quando: float) -> None:
+        tarefa.proxima = quando
+        self._seq += 1
+        heapq.heappush(self._fila, (quando, self._seq, tarefa.perfil))
+        self._cond.notify_all()
+
+    def adicionar(self, perfil: str, intervalo: float = DAEMON_INTERVALO) -> None:
+        """
+        Adiciona (ou reprograma) um perfil; a primeira coleta é imediata. Um
+        perfil removido e readicionado enquanto a coleta roda retoma a mesma
+        tarefa, que só é reagendada quando essa coleta termina.
+        """
+        with self._cond:
+            tarefa = self._tarefas.get(perfil) or self._em_voo.get(perfil)
+            if tarefa is None:
+                tarefa = Tarefa(perfil, intervalo)
+            self._tarefas[perfil] = tarefa
+            tarefa.intervalo = intervalo
+            tarefa.ativa = True
+            if not tarefa.em_execucao:
+                self._agendar(tarefa, self.relogio())
+
+    def remover(self, perfil: str) -> None:
+        with self._cond:
+            tarefa = self._tarefas.pop(perfil, None)
+            if tarefa is not None:
+                tarefa.ativa = False
+
+    def tarefas(self) -> List[Dict]:
+        with self._cond:
+            agora = self.relogio()
+            return [
+                {
+                    "perfil": t.perfil,
+                    "intervalo": t.intervalo,
+                    "em_segundos": max(0.0, t.proxima - agora),
+                    "execucoes": t.execucoes,
+                    "falhas_seguidas": t.falhas_seguidas,
+                    "em_execucao": t.em_execucao,
+                    "ultima_duracao": t.ultima_duracao,
+                    "ultimo_erro": t.ultimo_erro,
+                }
+                for t in self._tarefas.values()
+            ]
+
+    # -------------------------------------------------------------------------
+    # Execução
+    # -------------------------------------------------------------------------
+    def _espera_backoff(self, falhas: int) -> float:
+        espera = min(self.backoff_max, self.backoff_base * 2 ** (falhas - 1))
+        return espera * random.uniform(0.5, 1.5)
+
+    def _executar(self, tarefa: Tarefa, agendada_para: float) -> None:
+        inicio = self.relogio()
+        erro = None
+        resultado = None
+        try:
+            resultado = self.funcao(tarefa.perfil)
+            if self.ao_concluir is not None:
+                self.ao_concluir(tarefa.perfil, resultado)
+        except Exception as e:
+            erro = e
+            logger.warning(f"Coleta de {tarefa.perfil} falhou: {e}")
+
+        fim = self.relogio()
+        with self._cond:
+            self.stats["execucoes"] += 1
+            self._latencias.append(fim - inicio)
+            self._atrasos.append(max(0.0, inicio - agendada_para))
+            del self._latencias[:-1000], self._atrasos[:-1000]
+
+            self._rodando -= 1
+            self._em_voo.pop(tarefa.perfil, None)
+            tarefa.em_execucao = False
+            tarefa.execucoes += 1
+            tarefa.ultima_duracao = fim - inicio
+
+            if erro is None:
+                self.stats["sucessos"] += 1
+                tarefa.falhas_seguidas = 0
+                tarefa.ultimo_erro = None
+                proxima = fim + tarefa.intervalo
+            else:
+                self.stats["falhas"] += 1
+                tarefa.falhas_seguidas += 1
+                tarefa.ultimo_erro = str(erro)
+                proxima = fim + self._espera_backoff(tarefa.falhas_seguidas)
+
+            if tarefa.ativa:
+                self._agendar(tarefa, proxima)
+            self._cond.notify_all()
+
+    def _em_execucao(self) -> int:
+        return self._rodando
+
+    def _proxima_pronta(self) -> Optional[tuple]:
+        """Retira da fila a próxima tarefa vencida, se houver vaga."""
+        while self._fila:
+            quando, _, perfil = self._fila[0]
+            tarefa = self._tarefas.get(perfil)
+            # Entradas antigas (tarefa removida ou reprogramada) são descartadas
+            if (
+                tarefa is None
+                or tarefa.em_execucao
+                or perfil in self._em_voo
+                or tarefa.proxima != quando
+            ):
+                heapq.heappop(self._fila)
+                continue
+            if quando > self.relogio() or self._em_execucao() >= self.max_concorrencia:
+                return None
+            heapq.heappop(self._fila)
+            tarefa.em_execucao = True
+            self._em_voo[perfil] = tarefa
+            self._rodando += 1
+            return tarefa, quando
+        return None
+
+    def executar_pendentes(self) -> int:
+        """Dispara as tarefas vencidas que cabem no limite; retorna quantas."""
+        disparadas = 0
+        with self._cond:
+            while True:
+                pronta = self._proxima_pronta()
+                if pronta is None:
+                    return disparadas
+                self._executor.submit(self._executar, *pronta)
+                disparadas += 1
+
+    def _laco(self) -> None:
+        while not self._parar.is_set():
+            self.executar_pendentes()
+            with self._cond:
+                espera = 1.0
+                if self._fila and self._em_execucao() < self.max_concorrencia:
+                    espera = min(espera, max(0.0, self._fila[0][0] - self.relogio()))
+                self._cond.wait(timeout=espera)
+
+    def iniciar(self) -> "Agendador":
+        if self._thread is None:
+            self._parar.clear()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concorrencia, thread_name_prefix="agendador"
+            )
+            self._thread = threading.Thread(
+                target=self._laco, name="agendador", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def parar(self, esperar: bool = True) -> None:
+        self._parar.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=esperar)
+            self._executor = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+    def executar_para_sempre(self, intervalo_log: float = 300.0) -> None:
+        """Roda até Ctrl+C, registrando as estatísticas periodicamente."""
+        self.iniciar()
+        try:
+            while True:
+                time.sleep(intervalo_log)
+                logger.info(f"Agendador: {self.estatisticas()}")
+        except KeyboardInterrupt:
+            logger.info("Encerrando o agendador...")
+        finally:
+            self.parar()
+
+    # -------------------------------------------------------------------------
+    # Estatísticas
+    # -------------------------------------------------------------------------
+    def estatisticas(self) -> Dict:
+        """Profundidade da fila, tarefas rodando e latências (segundos)."""
+        with self._cond:
+            agora = self.relogio()
+            vencidas = sum(
+                1
+                for t in self._tarefas.values()
+                if not t.em_execucao and t.proxima <= agora
+            )
+            return {
+                **self.stats,
+                "tarefas": len(self._tarefas),
+                "fila": vencidas,
+                "em_execucao": self._em_execucao(),
+                "latencia_p50": percentil(self._latencias, 0.50),
+                "latencia_p95": percentil(self._latencias, 0.95),
+                "latencia_max": max(self._latencias, default=None),
+                "atraso_p95": percentil(self._atrasos, 0.95),
+            }
@@ -0,0 +1,365 @@
+"""
+armazenamento_parquet.py
+Camada de dados colunar (Parquet/Arrow) para os posts.
+
+- Dataset Parquet particionado por perfil e mês (hive: profile=x/mes=2025-11)
+- Schema explícito para os posts coletados
+- Leitura com projeção de colunas, filtros empurrados para o Arrow
+  (partições e row groups fora do filtro não são lidos) e arquivos
+  mapeados em memória
+- Migração única CSV -> Parquet: o CSV é lido uma só vez (encoding
+  detectado antes, sem releitura). Linhas anexadas depois ao CSV são
+  migradas sozinhas, a partir do byte onde a migração anterior parou; só um
+  CSV reescrito (ou truncado) é migrado de novo por inteiro
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import json
+import time
+import codecs
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Optional, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+logger = logging.getLogger(__name__)
+
+PARQUET_DIR = os.getenv("PARQUET_DIR", "data/parquet")
+MARCADOR_MIGRACAO = "_origem.json"
+
+SCHEMA_POSTS = pa.schema(
+    [
+        ("profile", pa.string()),
+        ("post_id", pa.int64()),
+        ("shortcode", pa.string()),
+        ("url", pa.string()),
+        ("caption", pa.string()),
+        ("datetime", pa.timestamp("us")),
+        ("likes", pa.int64()),
+        ("comments", pa.int64()),
+        ("is_video", pa.bool_()),
+        ("date", pa.date32()),
+        ("hour", pa.int8()),
+        ("mes", pa.string()),
+    ]
+)
+
+PARTICOES = ds.partitioning(
+    pa.schema([("profile", pa.string()), ("mes", pa.string())]), flavor="hive"
+)
+
+_FS = fs.LocalFileSystem(use_mmap=True)
+
+_ultimo_ns = 0
+_lock_nomes = threading.Lock()
+
+
+def _eh_dataset_de_posts(df: pd.DataFrame) -> bool:
+    return {"profile", "post_id", "datetime"} <= set(df.columns)
+
+
+# -----------------------------------------------------------------------------
+# Escrita
+# -----------------------------------------------------------------------------
+def _preparar_posts(df: pd.DataFrame) -> pa.Table:
+    df = df.copy()
+    df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
+    df["mes"] = df["datetime"].dt.strftime("%Y-%m").fillna("sem-data")
+    df["date"] = df["datetime"].dt.date
+    df["hour"] = df["datetime"].dt.hour.astype("Int8")
+    for col in SCHEMA_POSTS.names:
+        if col not in df.columns:
+            df[col] = None
+    return pa.Table.from_pandas(
+        df[SCHEMA_POSTS.names], schema=SCHEMA_POSTS, preserve_index=False
+    )
+
+
+def _nome_base() -> str:
+    """
+    Nome dos arquivos de uma gravação, crescente na ordem das gravações: a
+    leitura (em ordem de nome) devolve as linhas na ordem em que entraram.
+    """
+    global _ultimo_ns
+    with _lock_nomes:
+        _ultimo_ns = max(time.time_ns(), _ultimo_ns + 1)
+        return f"parte-{_ultimo_ns:020d}-{{i}}.parquet"
+
+
+def inferir_schema(df: pd.DataFrame) -> pa.Schema:
+    """Schema Arrow de `df`; colunas só com nulos viram texto."""
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    return pa.schema(
+        [f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in schema]
+    )
+
+
+def _schema_gravado(diretorio: str) -> Optional[pa.Schema]:
+    if not any(nome.endswith(".parquet") for nome in os.listdir(diretorio)):
+        return None
+    return ds.dataset(diretorio, format="parquet", exclude_invalid_files=True).schema
+
+
+def gravar_parquet(
+    df: pd.DataFrame, diretorio: str, schema: Optional[pa.Schema] = None
+) -> int:
+    """
+    Anexa posts ao dataset. DataFrames de posts (com profile, post_id e
+    datetime) são particionados por perfil/mês com o schema explícito;
+    outros formatos são gravados sem partição com `schema` (padrão: o das
+    partes já gravadas no diretório ou, na primeira, o inferido), para que
+    todas as partes tenham os mesmos tipos.
+    """
+    if df is None or df.empty:
+        return 0
+
+    os.makedirs(diretorio, exist_ok=True)
+    base = _nome_base()
+
+    if _eh_dataset_de_posts(df):
+        tabela = _preparar_posts(df)
+        ds.write_dataset(
+            tabela,
+            diretorio,
+            format="parquet",
+            partitioning=PARTICOES,
+            basename_template=base,
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=64 * 1024,
+        )
+    else:
+        schema = schema or _schema_gravado(diretorio) or inferir_schema(df)
+        tabela = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+        ds.write_dataset(
+            tabela,
+            diretorio,
+            format="parquet",
+            basename_template=base,
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    return tabela.num_rows
+
+
+# -----------------------------------------------------------------------------
+# Leitura
+# -----------------------------------------------------------------------------
+def _abrir_dataset(diretorio: str) -> ds.Dataset:
+    particionado = any(nome.startswith("profile=") for nome in os.listdir(diretorio))
+    if particionado:
+        return ds.dataset(
+            diretorio,
+            schema=SCHEMA_POSTS,
+            format="parquet",
+            partitioning=PARTICOES,
+            filesystem=_FS,
+            exclude_invalid_files=True,
+        )
+    return ds.dataset(
+        diretorio, format="parquet", filesystem=_FS, exclude_invalid_files=True
+    )
+
+
+def carregar_parquet(
+    diretorio: str,
+    profile: Optional[str] = None,
+    inicio=None,
+    fim=None,
+    colunas: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Lê o dataset lendo apenas as partições, row groups e colunas necessárias.
+
+    Argumentos:
+        profile: perfil (poda as partições dos demais perfis)
+        inicio, fim: intervalo de `datetime` (inclusivo / exclusivo); também
+            poda as partições mensais fora do intervalo
+        colunas: projeção
+    """
+    dataset = _abrir_dataset(diretorio)
+    nomes = dataset.schema.names
+    filtro = None
+
+    def _e(expr):
+        return expr if filtro is None else filtro & expr
+
+    if profile is not None and "profile" in nomes:
+        filtro = _e(ds.field("profile") == profile)
+    if inicio is not None and "datetime" in nomes:
+        inicio = pd.Timestamp(inicio)
+        filtro = _e(ds.field("datetime") >= pa.scalar(inicio, pa.timestamp("us")))
+        if "mes" in nomes:
+            filtro = filtro & (ds.field("mes") >= inicio.strftime("%Y-%m"))
+    if fim is not None and "datetime" in nomes:
+        fim = pd.Timestamp(fim)
+        filtro = _e(ds.field("datetime") < pa.scalar(fim, pa.timestamp("us")))
+        if "mes" in nomes:
+            filtro = filtro & (ds.field("mes") <= fim.strftime("%Y-%m"))
+
+    tabela = dataset.to_table(columns=colunas, filter=filtro)
+    df = tabela.to_pandas()
+
+    if "mes" in df.columns and not (colunas and "mes" in colunas):
+        df = df.drop(columns="mes")
+    if "datetime" in df.columns:
+        df = df.sort_values("datetime", ascending=False, kind="stable")
+    return df.reset_index(drop=True)
+
+
+# -----------------------------------------------------------------------------
+# Migração CSV -> Parquet
+# -----------------------------------------------------------------------------
+def detectar_encoding(caminho: str) -> str:
+    """UTF-8 se o arquivo inteiro for UTF-8 válido; senão latin-1."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                decoder.decode(bloco)
+            decoder.decode(b"", final=True)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _trecho_hash(f, inicio: int, tamanho: int) -> str:
+    f.seek(max(0, inicio))
+    return hashlib.sha256(f.read(tamanho)).hexdigest()
+
+
+def _assinatura(caminho: str, migrados: int) -> dict:
+    """
+    Identifica o CSV e os `migrados` bytes já convertidos: o começo do
+    arquivo e o trecho final da parte migrada. Se um dos dois mudar, o CSV
+    foi reescrito e não apenas anexado.
+    """
+    with open(caminho, "rb") as f:
+        return {
+            "csv": os.path.abspath(caminho),
+            "bytes": migrados,
+            "inicio": _trecho_hash(f, 0, min(migrados, 1 << 16)),
+            "fim": _trecho_hash(f, migrados - 4096, min(migrados, 4096)),
+        }
+
+
+def diretorio_parquet_para(csv_path: str) -> str:
+    """Diretório do dataset Parquet correspondente a um CSV."""
+    nome = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(PARQUET_DIR, nome)
+
+
+def _migrar_anexadas(csv_path: str, diretorio: str, marcador: dict) -> Optional[int]:
+    """
+    Migra apenas as linhas anexadas depois de `marcador["bytes"]`. Retorna
+    o novo total de bytes migrados ou None se o CSV precisa ser migrado de
+    novo por inteiro.
+    """
+    migrados = marcador.get("bytes")
+    tamanho = os.path.getsize(csv_path)
+    if not migrados or tamanho < migrados or not marcador.get("colunas"):
+        return None
+    if _assinatura(csv_path, migrados) != {
+        k: marcador.get(k) for k in ("csv", "bytes", "inicio", "fim")
+    }:
+        return None
+    if tamanho == migrados:
+        return migrados
+
+    with open(csv_path, "rb") as f:
+        f.seek(migrados)
+        novos = f.read()
+    # Uma linha sendo escrita agora fica para a próxima migração
+    novos = novos[: novos.rfind(b"\n") + 1]
+    if not novos:
+        return migrados
+
+    try:
+        texto = novos.decode(marcador["encoding"])
+    except UnicodeDecodeError:
+        return None
+
+    df = pd.read_csv(io.StringIO(texto), header=None, names=marcador["colunas"])
+    n = gravar_parquet(df, diretorio)
+    logger.info(f"{n} linhas novas do CSV migradas para {diretorio}")
+    return migrados + len(novos)
+
+
+def migrar_csv_para_parquet(
+    csv_path: str,
+    diretorio: Optional[str] = None,
+    tamanho_chunk: int = 200_000,
+) -> str:
+    """
+    Converte o CSV para Parquet uma única vez.
+
+    Um marcador no diretório guarda até que byte o CSV já foi convertido.
+    Linhas anexadas depois são acrescentadas ao dataset sem reler o resto;
+    só um CSV reescrito ou truncado é convertido de novo. Retorna o
+    diretório do dataset.
+    """
+    diretorio = diretorio or diretorio_parquet_para(csv_path)
+    caminho_marcador = os.path.join(diretorio, MARCADOR_MIGRACAO)
+
+    marcador = None
+    if os.path.exists(caminho_marcador):
+        with open(caminho_marcador, encoding="utf-8") as f:
+            marcador = json.load(f)
+
+    migrados = _migrar_anexadas(csv_path, diretorio, marcador) if marcador else None
+    if migrados is None:
+        if os.path.exists(diretorio):
+            shutil.rmtree(diretorio)
+
+        migrados = os.path.getsize(csv_path)
+        encoding = detectar_encoding(csv_path)
+        colunas = None
+        schema = None
+        total = 0
+        for chunk in pd.read_csv(csv_path, encoding=encoding, chunksize=tamanho_chunk):
+            colunas = list(chunk.columns)
+            if schema is None and not _eh_dataset_de_posts(chunk):
+                # Um schema só para todos os chunks (e as linhas anexadas depois)
+                schema = inferir_schema(chunk)
+            total += gravar_parquet(chunk, diretorio, schema)
+
+        marcador = {"encoding": encoding, "colunas": colunas}
+        logger.info(f"CSV migrado para Parquet: {total} linhas em {diretorio}")
+    elif migrados == marcador["bytes"]:
+        return diretorio
+
+    os.makedirs(diretorio, exist_ok=True)
+    marcador.update(_assinatura(csv_path, migrados))
+    tmp = f"{caminho_marcador}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(marcador, f)
+    os.replace(tmp, caminho_marcador)
+    return diretorio
+
+
+def carregar_posts(
+    caminho: str,
+    profile: Optional[str] = None,
+    inicio=None,
+    fim=None,
+    colunas: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Carrega posts de um CSV (migrado para Parquet na primeira vez) ou de um
+    diretório de dataset Parquet, aplicando filtros e projeção.
+    """
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+
+    diretorio = caminho if os.path.isdir(caminho) else migrar_csv_para_parquet(caminho)
+    return carregar_parquet(diretorio, profile, inicio, fim, colunas)
@@ -0,0 +1,374 @@
+"""
+armazenamento_posts.py
+Armazenamento de posts em SQLite com alto volume de escrita.
+
+- Engine SQLAlchemy reutilizada por banco (pool de conexões)
+- Modo WAL: leituras não bloqueiam a escrita da coleta
+- Schema explícito com chave primária em `post_id`
+- Upsert em lotes (INSERT ... ON CONFLICT DO UPDATE): re-coletas não duplicam posts
+- Índices em (profile, datetime) e shortcode
+- Consultas com filtros executados no SQL, sem carregar a tabela inteira
+- Índice invertido de hashtags e menções atualizado a cada upsert (hashtags.py)
+- Agregados de engajamento por dia/hora atualizados a cada upsert (rollups.py)
+- Features do modelo de engajamento por post atualizadas a cada upsert (features.py)
+- Marca d'água da coleta por perfil (`<tabela>_marcas`), gravada só depois
+  que todos os posts de uma coleta completa foram gravados
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import logging
+import threading
+from typing import Optional, List, Dict
+
+import pandas as pd
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from modules.posts import como_dataframe
+
+logger = logging.getLogger(__name__)
+
+SQLITE_DB = os.getenv("SQLITE_DB", "data/instagram_posts.db")
+TAMANHO_LOTE = 1000
+
+COLUNAS_POSTS = [
+    "post_id",
+    "profile",
+    "shortcode",
+    "url",
+    "caption",
+    "datetime",
+    "likes",
+    "comments",
+    "is_video",
+    "date",
+    "hour",
+]
+
+_engines: Dict[str, sa.engine.Engine] = {}
+_tabelas: Dict[str, sa.Table] = {}
+_metadata = sa.MetaData()
+_lock = threading.Lock()
+
+
+# -----------------------------------------------------------------------------
+# Engine e schema
+# -----------------------------------------------------------------------------
+def _configurar_conexao(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.close()
+
+
+def obter_engine(db_path: str = SQLITE_DB) -> sa.engine.Engine:
+    """Retorna a engine do banco, criando-a (uma única vez) se necessário."""
+    chave = os.path.abspath(db_path)
+    with _lock:
+        engine = _engines.get(chave)
+        if engine is None:
+            os.makedirs(os.path.dirname(chave) or ".", exist_ok=True)
+            engine = sa.create_engine(f"sqlite:///{chave}")
+            sa.event.listen(engine, "connect", _configurar_conexao)
+            _engines[chave] = engine
+        return engine
+
+
+def fechar_engines() -> None:
+    """Libera todas as engines abertas (ex.: ao fim dos testes)."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _schemas_prontos.clear()
+
+
+def tabela_posts(nome: str = "posts") -> sa.Table:
+    """Definição da tabela de posts."""
+    with _lock:
+        tabela = _tabelas.get(nome)
+        if tabela is None:
+            tabela = sa.Table(
+                nome,
+                _metadata,
+                sa.Column("post_id", sa.BigInteger, primary_key=True),
+                sa.Column("profile", sa.String),
+                sa.Column("shortcode", sa.String),
+                sa.Column("url", sa.String),
+                sa.Column("caption", sa.Text),
+                sa.Column("datetime", sa.DateTime),
+                sa.Column("likes", sa.Integer),
+                sa.Column("comments", sa.Integer),
+                sa.Column("is_video", sa.Boolean),
+                sa.Column("date", sa.Date),
+                sa.Column("hour", sa.Integer),
+                sa.Index(f"ix_{nome}_profile_datetime", "profile", "datetime"),
+                sa.Index(f"ix_{nome}_shortcode", "shortcode"),
+            )
+            _tabelas[nome] = tabela
+        return tabela
+
+
+def tabela_marcas(tabela: str = "posts") -> sa.Table:
+    """Último post de cada perfil coletado por uma coleta completa."""
+    nome = f"{tabela}_marcas"
+    with _lock:
+        t = _tabelas.get(nome)
+        if t is None:
+            t = sa.Table(
+                nome,
+                _metadata,
+                sa.Column("profile", sa.String, primary_key=True),
+                sa.Column("post_id", sa.BigInteger),
+                sa.Column("datetime", sa.DateTime),
+            )
+            _tabelas[nome] = t
+        return t
+
+
+def _migrar_tabela_legada(engine: sa.engine.Engine, t: sa.Table) -> None:
+    """
+    Converte tabelas criadas pelo antigo `to_sql(if_exists="append")`, sem
+    chave primária, para o schema atual, removendo posts duplicados.
+    """
+    inspetor = sa.inspect(engine)
+    if not inspetor.has_table(t.name):
+        return
+
+    pk = inspetor.get_pk_constraint(t.name).get("constrained_columns") or []
+    if pk == ["post_id"]:
+        return
+
+    existentes = {c["name"] for c in inspetor.get_columns(t.name)}
+    colunas = ", ".join(f'"{c}"' for c in COLUNAS_POSTS if c in existentes)
+    indices = [i["name"] for i in inspetor.get_indexes(t.name)]
+    legado = f"{t.name}_legado"
+
+    logger.info(f"Migrando tabela '{t.name}' para o schema com chave primária.")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'ALTER TABLE "{t.name}" RENAME TO "{legado}"')
+        # Índices antigos acompanham a tabela renomeada
+        for indice in indices:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{indice}"')
+        t.create(conn)
+        conn.exec_driver_sql(
+            f'INSERT OR REPLACE INTO "{t.name}" ({colunas}) '
+            f'SELECT {colunas} FROM "{legado}" WHERE post_id IS NOT NULL'
+        )
+        conn.exec_driver_sql(f'DROP TABLE "{legado}"')
+
+
+_schemas_prontos = set()
+
+
+def criar_schema(db_path: str = SQLITE_DB, tabela: str = "posts") -> sa.Table:
+    """Cria a tabela e os índices, se ainda não existirem."""
+    t = tabela_posts(tabela)
+    chave = (os.path.abspath(db_path), tabela)
+    if chave not in _schemas_prontos:
+        engine = obter_engine(db_path)
+        _migrar_tabela_legada(engine, t)
+        t.create(engine, checkfirst=True)
+        _schemas_prontos.add(chave)
+    return t
+
+
+# -----------------------------------------------------------------------------
+# Escrita
+# -----------------------------------------------------------------------------
+def _para_registros(df: pd.DataFrame) -> List[Dict]:
+    """Converte o DataFrame em dicionários com tipos nativos do Python."""
+    colunas = [c for c in COLUNAS_POSTS if c in df.columns]
+    df = df[colunas].copy()
+
+    # CSVs trazem datas como texto
+    if "datetime" in df and not pd.api.types.is_datetime64_any_dtype(df["datetime"]):
+        df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
+    if "date" in df:
+        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
+
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict("records")
+
+
+def upsert_posts(
+    df: pd.DataFrame,
+    db_path: str = SQLITE_DB,
+    tabela: str = "posts",
+    tamanho_lote: int = TAMANHO_LOTE,
+) -> int:
+    """
+    Insere ou atualiza posts pela chave `post_id`, em lotes.
+
+    Métricas (likes, comentários, legenda) de posts já existentes são
+    atualizadas com os valores mais recentes. Retorna o número de linhas
+    gravadas. Aceita também um PostBatch ou uma lista de Post.
+    """
+    df = como_dataframe(df)
+    if df is None or df.empty:
+        return 0
+
+    if "post_id" not in df.columns:
+        raise ValueError("DataFrame sem coluna 'post_id'.")
+
+    sem_id = df["post_id"].isna()
+    if sem_id.any():
+        logger.warning(f"{int(sem_id.sum())} posts sem post_id ignorados.")
+        df = df[~sem_id]
+
+    t = criar_schema(db_path, tabela)
+    registros = _para_registros(df)
+    if not registros:
+        return 0
+
+    colunas = [c for c in COLUNAS_POSTS if c in df.columns]
+    stmt = sqlite_insert(t)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["post_id"],
+        set_={c: stmt.excluded[c] for c in colunas if c != "post_id"},
+    )
+
+    with obter_engine(db_path).begin() as conn:
+        rollups = bool({"datetime", "likes", "comments", "profile"} & set(df.columns))
+        if rollups:
+            from modules.rollups import atualizar_rollups, chaves_gravadas
+
+            # Grupos atuais dos posts: se a data/perfil mudar, o antigo é refeito
+            anteriores = chaves_gravadas(conn, df["post_id"], tabela)
+
+        for i in range(0, len(registros), tamanho_lote):
+            conn.execute(stmt, registros[i : i + tamanho_lote])
+
+        # Índice invertido de hashtags/menções, na mesma transação
+        if "caption" in df.columns:
+            from modules.hashtags import indexar_termos
+
+            indexar_termos(conn, df, tabela)
+
+        # Agregados por dia/hora dos grupos tocados, na mesma transação
+        if rollups:
+            atualizar_rollups(conn, df["post_id"], tabela, anteriores)
+
+        # Features por post, só dos posts cujas entradas mudaram
+        if {"datetime", "likes", "comments", "caption", "is_video"} & set(df.columns):
+            from modules.features import atualizar_features
+
+            atualizar_features(conn, df["post_id"], tabela)
+
+    return len(registros)
+
+
+# -----------------------------------------------------------------------------
+# Consultas
+# -----------------------------------------------------------------------------
+def consultar_posts(
+    db_path: str = SQLITE_DB,
+    profile: Optional[str] = None,
+    inicio=None,
+    fim=None,
+    colunas: Optional[List[str]] = None,
+    limite: Optional[int] = None,
+    tabela: str = "posts",
+) -> pd.DataFrame:
+    """
+    Consulta posts com filtros aplicados no SQL.
+
+    Argumentos:
+        profile: filtra por perfil (usa o índice profile, datetime)
+        inicio, fim: intervalo de `datetime` (inclusivo / exclusivo)
+        colunas: projeção das colunas retornadas
+        limite: número máximo de posts, do mais recente ao mais antigo
+    """
+    t = criar_schema(db_path, tabela)
+    cols = [t.c[c] for c in colunas] if colunas else [t]
+    query = sa.select(*cols)
+
+    if profile is not None:
+        query = query.where(t.c.profile == profile)
+    if inicio is not None:
+        query = query.where(t.c.datetime >= pd.Timestamp(inicio).to_pydatetime())
+    if fim is not None:
+        query = query.where(t.c.datetime < pd.Timestamp(fim).to_pydatetime())
+
+    query = query.order_by(t.c.datetime.desc())
+    if limite:
+        query = query.limit(limite)
+
+    datas = ["datetime"] if not colunas or "datetime" in colunas else None
+    with obter_engine(db_path).connect() as conn:
+        return pd.read_sql(query, conn, parse_dates=datas)
+
+
+def contar_posts(
+    db_path: str = SQLITE_DB, profile: Optional[str] = None, tabela: str = "posts"
+) -> int:
+    """Número de posts armazenados (opcionalmente de um perfil)."""
+    t = criar_schema(db_path, tabela)
+    query = sa.select(sa.func.count()).select_from(t)
+    if profile is not None:
+        query = query.where(t.c.profile == profile)
+
+    with obter_engine(db_path).connect() as conn:
+        return int(conn.execute(query).scalar_one())
+
+
+def ultimo_post(
+    profile: str, db_path: str = SQLITE_DB, tabela: str = "posts"
+) -> Optional[Dict]:
+    """Post mais recente armazenado do perfil ({"post_id", "datetime"}) ou None."""
+    t = criar_schema(db_path, tabela)
+    query = (
+        sa.select(t.c.post_id, t.c.datetime)
+        .where(t.c.profile == profile, t.c.datetime.isnot(None))
+        .order_by(t.c.datetime.desc())
+        .limit(1)
+    )
+
+    with obter_engine(db_path).connect() as conn:
+        linha = conn.execute(query).first()
+
+    if linha is None:
+        return None
+    return {"post_id": int(linha.post_id), "datetime": linha.datetime.isoformat()}
+
+
+def marca_coleta(
+    profile: str, db_path: str = SQLITE_DB, tabela: str = "posts"
+) -> Optional[Dict]:
+    """
+    Marca d'água da última coleta completa do perfil ({"post_id",
+    "datetime"}) ou None. Diferente de ultimo_post, não avança com os lotes
+    de uma coleta interrompida no meio (os posts mais novos vêm primeiro).
+    """
+    t = tabela_marcas(tabela)
+    engine = obter_engine(db_path)
+    t.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        linha = conn.execute(sa.select(t).where(t.c.profile == profile)).first()
+
+    if linha is None or linha.datetime is None:
+        return None
+    return {"post_id": int(linha.post_id), "datetime": linha.datetime.isoformat()}
+
+
+def gravar_marca_coleta(
+    profile: str, marca: Dict, db_path: str = SQLITE_DB, tabela: str = "posts"
+) -> None:
+    """Grava a marca d'água do perfil depois de uma coleta completa."""
+    t = tabela_marcas(tabela)
+    engine = obter_engine(db_path)
+    t.create(engine, checkfirst=True)
+    valores = {
+        "post_id": int(marca["post_id"]),
+        "datetime": pd.Timestamp(marca["datetime"]).to_pydatetime(),
+    }
+    stmt = sqlite_insert(t).values(profile=profile, **valores)
+    with engine.begin() as conn:
+        conn.execute(
+            stmt.on_conflict_do_update(index_elements=["profile"], set_=valores)
+        )
@@ -0,0 +1,454 @@
+"""
+busca_hiperparametros.py
+Busca de hiperparâmetros com validação cruzada, paralela e com orçamento de tempo.
+
+- Modos: busca aleatória ou successive halving (muitos candidatos com poucas
+  árvores/iterações, só os melhores seguem com mais recurso)
+- Modelos: RandomForest e HistGradientBoosting (espaços em ESPACOS)
+- Paralelismo: cada par (candidato, fold) é uma tarefa do joblib (loky),
+  usando todos os núcleos; os dados são compartilhados via memmap
+- Orçamento: as tarefas são despachadas em ondas; quando o tempo acaba,
+  nenhuma onda nova começa e o melhor resultado até ali é usado
+- Cache: o fold de cada linha vem do hash da própria linha, então linhas já
+  vistas nunca mudam de fold. O R² de cada (fold, modelo, parâmetros) fica
+  gravado em disco, indexado pelo conteúdo do fold: refazer a busca com os
+  mesmos dados (ex.: com mais candidatos ou mais tempo) só avalia o que
+  ainda não foi avaliado
+- Dados novos: como cada linha nova muda o treino de todos os folds, nada do
+  cache vale. Em vez de refazer a busca inteira, só os finalistas da busca
+  anterior (mesma configuração) são reavaliados, com o recurso máximo
+- Poucos dados: folds com menos de 2 linhas (R² indefinido) não são usados
+  para validação, e k cai para o número de folds restantes; abaixo de
+  MIN_AMOSTRAS linhas a busca não roda
+
+Configuração via .env:
+    BUSCA_CACHE_DIR=data/cache_busca
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import math
+import time
+import random
+import hashlib
+import logging
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BUSCA_CACHE_DIR = os.getenv("BUSCA_CACHE_DIR", "data/cache_busca")
+MIN_AMOSTRAS = 10
+
+# estimador: caminho da classe | recurso: parâmetro que o halving aumenta
+ESPACOS: Dict[str, Dict] = {
+    "floresta": {
+        "estimador": "sklearn.ensemble.RandomForestRegressor",
+        "recurso": "n_estimators",
+        "params": {
+            "n_estimators": [100, 200, 400],
+            "max_depth": [None, 4, 8, 16],
+            "min_samples_leaf": [1, 2, 5, 10],
+            "max_features": [1.0, 0.5, "sqrt"],
+        },
+    },
+    "gbm": {
+        "estimador": "sklearn.ensemble.HistGradientBoostingRegressor",
+        "recurso": "max_iter",
+        "params": {
+            "max_iter": [100, 200, 400],
+            "learning_rate": [0.03, 0.1, 0.3],
+            "max_leaf_nodes": [15, 31, 63],
+            "min_samples_leaf": [5, 20, 50],
+            "l2_regularization": [0.0, 0.1, 1.0],
+        },
+    },
+}
+
+
+def _classe(modelo: str):
+    modulo, nome = ESPACOS[modelo]["estimador"].rsplit(".", 1)
+    return getattr(importlib.import_module(modulo), nome)
+
+
+def criar_estimador(modelo: str, params: Dict, random_state: int = 42):
+    return _classe(modelo)(random_state=random_state, **params)
+
+
+def _json(obj) -> str:
+    return json.dumps(obj, sort_keys=True, default=str)
+
+
+# -----------------------------------------------------------------------------
+# Folds e cache
+# -----------------------------------------------------------------------------
+def hash_linhas(X: pd.DataFrame, y: pd.Series) -> np.ndarray:
+    """Hash (uint64) de cada linha (features + alvo)."""
+    linhas = pd.util.hash_pandas_object(X, index=False).to_numpy()
+    alvo = pd.util.hash_pandas_object(y, index=False).to_numpy()
+    return linhas ^ (alvo * np.uint64(0x9E3779B97F4A7C15))
+
+
+def atribuir_folds(hashes: np.ndarray, k: int) -> np.ndarray:
+    """Fold de cada linha pelo seu hash: estável quando linhas são adicionadas."""
+    return (hashes % np.uint64(k)).astype(np.int16)
+
+
+def folds_validos(folds: np.ndarray, k: int) -> List[int]:
+    """Folds com ao menos 2 linhas: com menos, o R² do fold é indefinido."""
+    contagem = np.bincount(folds, minlength=k)
+    return [f for f in range(k) if contagem[f] >= 2]
+
+
+def _hash_conjunto(hashes: np.ndarray) -> str:
+    return hashlib.sha256(np.sort(hashes).tobytes()).hexdigest()[:24]
+
+
+class CacheAvaliacoes:
+    """R² por (conteúdo do fold, modelo, parâmetros), em um arquivo JSON Lines."""
+
+    def __init__(self, diretorio: Optional[str] = BUSCA_CACHE_DIR):
+        self.caminho = (
+            os.path.join(diretorio, "avaliacoes.jsonl") if diretorio else None
+        )
+        self._dados: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if self.caminho and os.path.exists(self.caminho):
+            with open(self.caminho, encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        continue  # linha parcial de uma execução interrompida
+                    self._dados[registro["chave"]] = registro["r2"]
+        self._finalistas: Dict[str, Dict] = {}
+        caminho_finalistas = self._caminho_finalistas()
+        if caminho_finalistas and os.path.exists(caminho_finalistas):
+            with open(caminho_finalistas, encoding="utf-8") as f:
+                self._finalistas = json.load(f)
+
+    def _caminho_finalistas(self) -> Optional[str]:
+        if not self.caminho:
+            return None
+        return os.path.join(os.path.dirname(self.caminho), "finalistas.json")
+
+    @staticmethod
+    def chave(hash_fold: str, modelo: str, params: Dict) -> str:
+        conteudo = f"{hash_fold}|{modelo}|{_json(params)}"
+        return hashlib.sha256(conteudo.encode()).hexdigest()
+
+    def obter(self, chave: str) -> Optional[float]:
+        return self._dados.get(chave)
+
+    def gravar(self, chave: str, r2: float) -> None:
+        with self._lock:
+            self._dados[chave] = r2
+            if self.caminho:
+                os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+                with open(self.caminho, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"chave": chave, "r2": r2}) + "\n")
+
+    def finalistas(self, chave_config: str) -> Optional[Dict]:
+        """Finalistas da última busca com a configuração (e o hash dos dados)."""
+        return self._finalistas.get(chave_config)
+
+    def gravar_finalistas(
+        self, chave_config: str, hash_dados: str, candidatos: List[tuple]
+    ) -> None:
+        with self._lock:
+            self._finalistas[chave_config] = {
+                "hash_dados": hash_dados,
+                "candidatos": [[modelo, params] for modelo, params in candidatos],
+            }
+            caminho = self._caminho_finalistas()
+            if caminho:
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(self._finalistas, f)
+                os.replace(caminho + ".tmp", caminho)
+
+
+def _avaliar(modelo: str, params: Dict, X, y, folds, fold: int) -> float:
+    """Treina nos outros folds e retorna o R² no fold `fold` (roda nos workers)."""
+    from sklearn.metrics import r2_score
+
+    validacao = folds == fold
+    estimador = criar_estimador(modelo, params)
+    estimador.fit(X[~validacao], y[~validacao])
+    return float(r2_score(y[validacao], estimador.predict(X[validacao])))
+
+
+# -----------------------------------------------------------------------------
+# Busca
+# -----------------------------------------------------------------------------
+@dataclass
+class ResultadoBusca:
+    melhor_modelo: str
+    melhores_params: Dict
+    melhor_r2: float
+    resultados: pd.DataFrame
+    config: Dict
+    avaliacoes: int = 0
+    do_cache: int = 0
+    segundos: float = 0.0
+    orcamento_esgotado: bool = False
+    rodadas: int = 0
+    so_finalistas: bool = False
+    folds: int = 0
+
+    def criar_estimador(self, random_state: int = 42):
+        return criar_estimador(self.melhor_modelo, self.melhores_params, random_state)
+
+    def resumo(self) -> Dict:
+        """Metadados para gravar junto do modelo no registro."""
+        return {
+            "modelo": self.melhor_modelo,
+            "params": self.melhores_params,
+            "r2_cv": round(self.melhor_r2, 4),
+            "avaliacoes": self.avaliacoes,
+            "do_cache": self.do_cache,
+            "segundos": round(self.segundos, 2),
+            "orcamento_esgotado": self.orcamento_esgotado,
+            "so_finalistas": self.so_finalistas,
+            "folds": self.folds,
+            **self.config,
+        }
+
+
+def amostrar_candidatos(
+    n: int, modelos: Sequence[str], semente: int = 42, sem_recurso: bool = False
+) -> List[tuple]:
+    """
+    `n` combinações (modelo, params) distintas, sorteadas dos espaços. Com
+    `sem_recurso`, o parâmetro de recurso fica de fora (o halving o define).
+    """
+
+    def espaco(modelo):
+        params = ESPACOS[modelo]["params"]
+        if sem_recurso:
+            return {p: v for p, v in params.items() if p != ESPACOS[modelo]["recurso"]}
+        return params
+
+    rng = random.Random(semente)
+    vistos, candidatos = set(), []
+    total = sum(math.prod(map(len, espaco(m).values())) for m in modelos)
+    while len(candidatos) < min(n, total):
+        modelo = modelos[len(candidatos) % len(modelos)]
+        params = {p: rng.choice(v) for p, v in espaco(modelo).items()}
+        assinatura = (modelo, _json(params))
+        if assinatura not in vistos:
+            vistos.add(assinatura)
+            candidatos.append((modelo, params))
+    return candidatos
+
+
+def buscar(
+    X: pd.DataFrame,
+    y: pd.Series,
+    modo: str = "halving",
+    modelos: Sequence[str] = ("floresta", "gbm"),
+    n_candidatos: int = 24,
+    k: int = 5,
+    orcamento_s: Optional[float] = 120.0,
+    n_jobs: int = -1,
+    fator: int = 3,
+    semente: int = 42,
+    cache: Optional[CacheAvaliacoes] = None,
+    reaproveitar_finalistas: bool = True,
+) -> ResultadoBusca:
+    """
+    Busca os melhores hiperparâmetros por validação cruzada em `k` folds.
+
+    Argumentos:
+        modo: "aleatoria" (todos os candidatos com o recurso sorteado) ou
+            "halving" (rodadas com recurso crescente; a cada rodada só
+            1/`fator` dos candidatos segue)
+        orcamento_s: tempo máximo de parede (None = sem limite)
+        n_jobs: processos do joblib (-1 = todos os núcleos)
+        cache: CacheAvaliacoes (padrão: em BUSCA_CACHE_DIR)
+        reaproveitar_finalistas: com dados diferentes da última busca de
+            mesma configuração, avalia só os finalistas dela (False = busca
+            completa)
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+
+    if modo not in ("aleatoria", "halving"):
+        raise ValueError(f"Modo de busca desconhecido: {modo}")
+    if len(X) < MIN_AMOSTRAS:
+        raise ValueError(
+            f"Poucos dados ({len(X)} linhas) para a busca de hiperparâmetros: "
+            f"mínimo de {MIN_AMOSTRAS}."
+        )
+
+    inicio = time.perf_counter()
+    cache = cache if cache is not None else CacheAvaliacoes()
+    config = {
+        "modo": modo,
+        "modelos": list(modelos),
+        "n_candidatos": n_candidatos,
+        "k": k,
+        "fator": fator,
+        "semente": semente,
+    }
+
+    hashes = hash_linhas(X, y)
+    folds = atribuir_folds(hashes, k)
+    validos = folds_validos(folds, k)
+    if len(validos) < 2:
+        raise ValueError(
+            f"Poucos dados ({len(X)} linhas): menos de 2 folds com 2+ linhas."
+        )
+    if len(validos) < k:
+        logger.warning(
+            f"Busca com {len(validos)} de {k} folds (os demais têm menos de 2 linhas)."
+        )
+    hash_folds = {
+        f: _hash_conjunto(hashes[folds == f]) + _hash_conjunto(hashes[folds != f])
+        for f in validos
+    }
+    Xv, yv = X.to_numpy(dtype=float), y.to_numpy(dtype=float)
+    hash_dados = _hash_conjunto(hashes)
+    chave_config = hashlib.sha256(_json(config).encode()).hexdigest()[:24]
+
+    anterior = cache.finalistas(chave_config)
+    so_finalistas = bool(
+        reaproveitar_finalistas and anterior and anterior["hash_dados"] != hash_dados
+    )
+    if so_finalistas:
+        # Uma única rodada, com o recurso máximo (escala 1 no halving)
+        candidatos = [(modelo, params) for modelo, params in anterior["candidatos"]]
+        n_rodadas = 1
+    else:
+        candidatos = amostrar_candidatos(
+            n_candidatos, list(modelos), semente, sem_recurso=modo == "halving"
+        )
+        if modo == "halving":
+            n_rodadas = max(1, math.ceil(math.log(len(candidatos), fator)))
+        else:
+            n_rodadas = 1
+
+    linhas, avaliacoes, do_cache = [], 0, 0
+    esgotado = False
+    rodada = 0
+    paralelo_n = max(1, effective_n_jobs(n_jobs))
+
+    with Parallel(n_jobs=n_jobs) as paralelo:
+        for rodada in range(n_rodadas):
+            # Recurso da rodada: fração do máximo de cada espaço
+            avaliados = []
+            for modelo, params in candidatos:
+                params = dict(params)
+                if modo == "halving":
+                    recurso = ESPACOS[modelo]["recurso"]
+                    maximo = max(ESPACOS[modelo]["params"][recurso])
+                    escala = fator ** (n_rodadas - 1 - rodada)
+                    params[recurso] = max(10, maximo // escala)
+                avaliados.append((modelo, params))
+
+            scores: Dict[int, Dict[int, float]] = {i: {} for i in range(len(avaliados))}
+            pendentes = []
+            for i, (modelo, params) in enumerate(avaliados):
+                for f in validos:
+                    chave = cache.chave(hash_folds[f], modelo, params)
+                    r2 = cache.obter(chave)
+                    if r2 is None:
+                        pendentes.append((i, f, chave))
+                    else:
+                        scores[i][f] = r2
+                        do_cache += 1
+
+            # Ondas de tarefas: o orçamento é checado antes de cada uma
+            onda = 2 * paralelo_n
+            for j in range(0, len(pendentes), onda):
+                if (
+                    orcamento_s is not None
+                    and time.perf_counter() - inicio > orcamento_s
+                ):
+                    esgotado = True
+                    break
+                lote = pendentes[j : j + onda]
+                r2s = paralelo(
+                    delayed(_avaliar)(*avaliados[i], Xv, yv, folds, f)
+                    for i, f, _ in lote
+                )
+                for (i, f, chave), r2 in zip(lote, r2s):
+                    scores[i][f] = r2
+                    cache.gravar(chave, r2)
+                    avaliacoes += 1
+
+            completos = []
+            for i, (modelo, params) in enumerate(avaliados):
+                valores = list(scores[i].values())
+                if not valores:
+                    continue
+                linha = {
+                    "rodada": rodada,
+                    "modelo": modelo,
+                    "params": _json(params),
+                    "r2_medio": float(np.mean(valores)),
+                    "r2_std": float(np.std(valores)),
+                    "folds": len(valores),
+                }
+                linhas.append(linha)
+                if len(valores) == len(validos):
+                    completos.append((linha["r2_medio"], i))
+
+            completos.sort(reverse=True)
+            if esgotado:
+                break
+            if rodada == n_rodadas - 1:
+                # Guarda os finalistas para a próxima busca com dados novos
+                manter = len(candidatos)
+                if modo == "aleatoria" and not so_finalistas:
+                    manter = max(1, math.ceil(len(candidatos) / fator))
+                finalistas = [candidatos[i] for _, i in completos[:manter]]
+                cache.gravar_finalistas(chave_config, hash_dados, finalistas)
+                break
+            # Só os melhores 1/fator seguem para a próxima rodada
+            manter = max(1, math.ceil(len(candidatos) / fator))
+            candidatos = [candidatos[i] for _, i in completos[:manter]]
+
+    resultados = pd.DataFrame(linhas)
+    if resultados.empty:
+        raise TimeoutError("Orçamento esgotado antes de qualquer avaliação.")
+
+    # Melhor candidato da rodada mais avançada, preferindo os avaliados em
+    # todos os folds
+    resultados["completo"] = resultados["folds"] == len(validos)
+    melhor = resultados.sort_values(
+        ["completo", "rodada", "r2_medio"], ascending=False
+    ).iloc[0]
+
+    resultado = ResultadoBusca(
+        melhor_modelo=melhor["modelo"],
+        melhores_params=json.loads(melhor["params"]),
+        melhor_r2=float(melhor["r2_medio"]),
+        resultados=resultados.sort_values(
+            "r2_medio", ascending=False, ignore_index=True
+        ),
+        config=config,
+        avaliacoes=avaliacoes,
+        do_cache=do_cache,
+        segundos=time.perf_counter() - inicio,
+        orcamento_esgotado=esgotado,
+        rodadas=rodada + 1,
+        so_finalistas=so_finalistas,
+        folds=len(validos),
+    )
+    escopo = f"{modo}, só finalistas" if so_finalistas else modo
+    logger.info(
+        f"Busca ({escopo}): melhor {resultado.melhor_modelo} "
+        f"R² CV={resultado.melhor_r2:.3f} | {avaliacoes} avaliações, "
+        f"{do_cache} do cache, {resultado.segundos:.1f}s"
+        + (" (orçamento esgotado)" if esgotado else "")
+    )
+    return resultado
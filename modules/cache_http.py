@@ -0,0 +1,248 @@
+"""
+cache_http.py
+Cache em disco das respostas JSON do Instagram, instalado no contexto do Instaloader.
+
+Todas as consultas do Instaloader (perfil, páginas GraphQL, API iPhone)
+passam por `InstaloaderContext.get_json`. O cache intercepta essa chamada:
+
+- Respostas gravadas em disco, indexadas pelo hash de host + path + parâmetros
+  + usuário da sessão (respostas anônimas e autenticadas não se misturam)
+- Validade (TTL) configurável
+- Tamanho máximo do diretório com remoção LRU (menos recentemente usadas)
+- Modo "offline": apenas replay do cache, sem nenhuma requisição de rede
+
+Configuração via .env:
+    HTTP_CACHE_MODO=desativado|normal|offline
+    HTTP_CACHE_DIR=data/cache_http
+    HTTP_CACHE_TTL=86400          (segundos)
+    HTTP_CACHE_MAX_MB=200
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_MODO = os.getenv("HTTP_CACHE_MODO", "desativado").lower()
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "data/cache_http")
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", str(24 * 3600)))
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", "200"))
+
+MODOS = ("desativado", "normal", "offline")
+
+
+class RespostaNaoEmCache(LookupError):
+    """Requisição sem resposta gravada no modo offline."""
+
+
+class CacheRespostas:
+    """
+    Cache de respostas JSON em disco com TTL e remoção LRU por tamanho.
+
+    A ordem LRU é mantida pelo mtime dos arquivos, atualizado a cada acerto.
+    """
+
+    def __init__(
+        self,
+        diretorio: str = HTTP_CACHE_DIR,
+        ttl: Optional[float] = HTTP_CACHE_TTL,
+        tamanho_max_mb: float = HTTP_CACHE_MAX_MB,
+        modo: str = "normal",
+    ):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de cache inválido: {modo}. Use {MODOS}.")
+
+        self.diretorio = diretorio
+        self.ttl = ttl
+        self.tamanho_max = int(tamanho_max_mb * 1024 * 1024)
+        self.modo = modo
+        self.stats = {"acertos": 0, "faltas": 0, "gravacoes": 0, "removidos": 0}
+
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+        self._tamanho = sum(t for _, t, _ in self._arquivos())
+
+    # -------------------------------------------------------------------------
+    # Chaves e arquivos
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def chave(
+        host: str, path: str, params: Dict[str, Any], usuario: Optional[str] = None
+    ) -> str:
+        bruto = json.dumps(
+            {"host": host, "path": path, "params": params, "usuario": usuario},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave[:2], f"{chave}.json")
+
+    def _arquivos(self):
+        """(caminho, tamanho, mtime) de todas as entradas."""
+        for raiz, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                if nome.endswith(".json"):
+                    caminho = os.path.join(raiz, nome)
+                    try:
+                        st = os.stat(caminho)
+                    except FileNotFoundError:
+                        continue
+                    yield caminho, st.st_size, st.st_mtime
+
+    # -------------------------------------------------------------------------
+    # Leitura e escrita
+    # -------------------------------------------------------------------------
+    def obter(self, chave: str) -> Optional[Dict]:
+        """Resposta gravada ou None se ausente/expirada."""
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                entrada = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # No modo offline, respostas expiradas ainda são servidas
+        expirada = self.ttl is not None and time.time() - entrada["criado"] > self.ttl
+        if expirada and self.modo != "offline":
+            return None
+
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        return entrada["resposta"]
+
+    def _contar(self, estatistica: str) -> None:
+        # Threads do pool de sessões usam o mesmo cache
+        with self._lock:
+            self.stats[estatistica] += 1
+
+    def gravar(self, chave: str, resposta: Dict) -> None:
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+        conteudo = json.dumps({"criado": time.time(), "resposta": resposta})
+        tmp = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+
+        with self._lock:
+            anterior = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+            os.replace(tmp, caminho)
+            self._tamanho += os.path.getsize(caminho) - anterior
+            self.stats["gravacoes"] += 1
+
+            if self._tamanho > self.tamanho_max:
+                self._remover_lru()
+
+        """Remove as entradas menos usadas até 90% do tamanho máximo (com o lock)."""
+        """Remove as entradas menos usadas até 90% do tamanho máximo."""
+        alvo = int(self.tamanho_max * 0.9)
+        for caminho, tamanho, _ in sorted(self._arquivos(), key=lambda a: a[2]):
+            if self._tamanho <= alvo:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                continue
+            self._tamanho -= tamanho
+            self.stats["removidos"] += 1
+
+    def limpar(self) -> None:
+        with self._lock:
+            for caminho, _, _ in list(self._arquivos()):
+                os.remove(caminho)
+            self._tamanho = 0
+
+    @property
+    def tamanho_bytes(self) -> int:
+        return self._tamanho
+
+    # -------------------------------------------------------------------------
+    # Integração com o Instaloader
+    # -------------------------------------------------------------------------
+    def envolver(self, get_json, usuario: Callable[[], Optional[str]] = lambda: None):
+        """
+        Envolve `InstaloaderContext.get_json` com leitura/gravação do cache.
+
+        `usuario()` identifica a sessão no momento de cada requisição (o login
+        pode acontecer depois da instalação do cache).
+        """
+
+        def get_json_com_cache(
+            path,
+            params,
+            host="www.instagram.com",
+            session=None,
+            _attempt=1,
+            response_headers=None,
+        ):
+            kwargs = dict(host=host, session=session, response_headers=response_headers)
+
+            # Retentativas internas do Instaloader vão direto à rede
+            if _attempt > 1:
+                return get_json(path, params, _attempt=_attempt, **kwargs)
+
+            chave = self.chave(host, path, params, usuario())
+            resposta = self.obter(chave)
+
+            if resposta is not None:
+                self._contar("acertos")
+                if response_headers is not None:
+                    response_headers.clear()
+                return resposta
+
+            self._contar("faltas")
+            if self.modo == "offline":
+                raise RespostaNaoEmCache(f"Sem resposta em cache para {host}/{path}")
+
+            resposta = get_json(path, params, **kwargs)
+            self.gravar(chave, resposta)
+            return resposta
+
+        get_json_com_cache.__wrapped__ = get_json
+        return get_json_com_cache
+
+
+_cache_padrao: Optional[CacheRespostas] = None
+_cache_lock = threading.Lock()
+
+
+def cache_padrao() -> Optional[CacheRespostas]:
+    """Cache configurado pelo .env, ou None se desativado."""
+    global _cache_padrao
+    if HTTP_CACHE_MODO == "desativado":
+        return None
+    with _cache_lock:
+        if _cache_padrao is None:
+            _cache_padrao = CacheRespostas(modo=HTTP_CACHE_MODO)
+        return _cache_padrao
+
+
+def instalar_cache(L, cache: Optional[CacheRespostas] = None):
+    """
+    Instala o cache no contexto de uma instância do Instaloader.
+
+    Sem `cache`, usa o configurado no .env (ou nada, se desativado).
+    """
+    cache = cache or cache_padrao()
+    if cache is None or cache.modo == "desativado":
+        return L
+
+    context = L.context
+    original = getattr(context.get_json, "__wrapped__", context.get_json)
+    context.get_json = cache.envolver(
+        original, usuario=lambda: getattr(context, "username", None)
+    )
+    return L
@@ -9,6 +9,11 @@ Melhorias incluídas:
 - Conversão e normalização de campos para DataFrame
 - Função auxiliar para salvar em SQLite
 - Função simulada para testes
+- Coleta concorrente de vários perfis com limitador de taxa compartilhado
+- Coleta incremental com marca d'água (último post conhecido) por perfil
+- Download de mídias em segundo plano (ver download_midia.py)
+- Coleta em lotes com gravação incremental (ver sink_posts.py)
+- Cache em disco / replay offline das respostas do Instagram (ver cache_http.py)
 
 Autor: Leonardo França
 Data: 24/11/2025
@@ -17,12 +22,19 @@ Data: 24/11/2025
 from __future__ import annotations
 
 import os
+import json
+import time
+import random
 import logging
-from typing import Optional, List, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Callable, Tuple, Iterator
 import instaloader
 import pandas as pd
 from dotenv import load_dotenv
 
+from modules.posts import Post, PostBatch
+
 # Carrega .env
 load_dotenv()
 
@@ -38,6 +50,12 @@ INSTAGRAM_PASS = os.getenv("INSTAGRAM_PASS")
 
 SESSION_FILE = os.getenv("SESSION_FILE", "data/session-instagram.session")
 SQLITE_DB = os.getenv("SQLITE_DB", "data/instagram_posts.db")
+ESTADO_COLETA = os.getenv("ESTADO_COLETA", "data/coleta_estado.json")
+
+# Coleta concorrente
+INSTAGRAM_HOST = "www.instagram.com"
+COLETA_MAX_WORKERS = int(os.getenv("COLETA_MAX_WORKERS", "4"))
+COLETA_REQ_POR_SEGUNDO = float(os.getenv("COLETA_REQ_POR_SEGUNDO", "1.0"))
 
 
 # -----------------------------------------------------------------------------
@@ -50,12 +68,15 @@ def _ensure_data_dirs(*paths: str) -> None:
         os.makedirs(d, exist_ok=True)
 
 
-# -----------------------------------------------------------------------------
-# Autenticação
-# -----------------------------------------------------------------------------
-def autenticar_instagram() -> instaloader.Instaloader:
-    """Autentica no Instagram ou retorna modo anônimo."""
-    _ensure_data_dirs(SESSION_FILE)
+def _criar_instaloader(
+    limitador: Optional["LimitadorTaxa"] = None,
+) -> instaloader.Instaloader:
+    """Cria uma instância do Instaloader sem downloads automáticos."""
+    kwargs = {}
+    if limitador is not None:
+        kwargs["rate_controller"] = lambda ctx: _ControladorTaxaCompartilhado(
+            ctx, limitador
+        )
 
     L = instaloader.Instaloader(
         download_pictures=False,
@@ -63,12 +84,219 @@ def autenticar_instagram() -> instaloader.Instaloader:
         download_comments=False,
         save_metadata=False,
         compress_json=False,
+        **kwargs,
     )
 
+    # Cache de respostas em disco (HTTP_CACHE_MODO no .env)
+    from modules.cache_http import instalar_cache
+
+    return instalar_cache(L)
+
+
+def _salvar_csv(df: pd.DataFrame, csv_path: str, anexar: bool = False) -> None:
+    """Salva o DataFrame em CSV, sobrescrevendo ou anexando ao arquivo."""
+    try:
+        _ensure_data_dirs(csv_path)
+        if anexar and os.path.exists(csv_path):
+            if df.empty:
+                return
+            df.to_csv(csv_path, mode="a", header=False, index=False, encoding="utf-8")
+        else:
+            df.to_csv(csv_path, index=False, encoding="utf-8")
+        logger.info(f"✅ {len(df)} posts salvos em {csv_path}")
+    except Exception as e:
+        logger.warning(f"Erro ao salvar CSV ({csv_path}): {e}")
+
+
+# -----------------------------------------------------------------------------
+# Estado da coleta incremental
+# -----------------------------------------------------------------------------
+_estado_lock = threading.Lock()
+
+
+def carregar_marca_dagua(
+    username: str, estado_path: str = ESTADO_COLETA
+) -> Optional[Dict]:
+    """
+    Retorna o post mais recente já coletado do perfil
+    ({"post_id": int, "datetime": str ISO}) ou None.
+    """
+    if not os.path.exists(estado_path):
+        return None
+
+    try:
+        with open(estado_path, encoding="utf-8") as f:
+            return json.load(f).get(username)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Estado de coleta ilegível ({estado_path}): {e}")
+        return None
+
+
+def atualizar_marca_dagua(
+    username: str, df: pd.DataFrame, estado_path: str = ESTADO_COLETA
+) -> None:
+    """Avança a marca d'água do perfil para o post mais recente de `df`."""
+    if df is None or df.empty or df["datetime"].isna().all():
+        return
+
+    mais_recente = df.loc[df["datetime"].idxmax()]
+    nova = {
+        "post_id": int(mais_recente["post_id"]),
+        "datetime": pd.Timestamp(mais_recente["datetime"]).isoformat(),
+    }
+
+    with _estado_lock:
+        estado = {}
+        if os.path.exists(estado_path):
+            try:
+                with open(estado_path, encoding="utf-8") as f:
+                    estado = json.load(f)
+            except (OSError, ValueError):
+                estado = {}
+
+        atual = estado.get(username)
+        if atual and pd.Timestamp(atual["datetime"]) >= pd.Timestamp(nova["datetime"]):
+            return
+
+        estado[username] = nova
+        _ensure_data_dirs(estado_path)
+        tmp = f"{estado_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, estado_path)
+
+
+def _post_ja_coletado(post, marca: Dict) -> bool:
+    """Indica se o post é igual ou anterior à marca d'água."""
+    media_id = getattr(post, "mediaid", None) or getattr(post, "id", None)
+    if media_id is not None and int(media_id) == marca["post_id"]:
+        return True
+
+    dt = getattr(post, "date_utc", None)
+    return dt is not None and pd.Timestamp(dt) <= pd.Timestamp(marca["datetime"])
+
+
+# -----------------------------------------------------------------------------
+# Limitador de taxa
+# -----------------------------------------------------------------------------
+class LimitadorTaxa:
+    """
+    Token bucket por host, compartilhado entre threads.
+
+    Cada requisição consome um token; os tokens são repostos a
+    `requisicoes_por_segundo`. Após um 429, `penalizar` pausa todas as
+    threads que usam o mesmo host.
+    """
+
+    def __init__(self, requisicoes_por_segundo: float = 1.0, rajada: int = 1):
+        if requisicoes_por_segundo <= 0:
+            raise ValueError("requisicoes_por_segundo deve ser positivo.")
+
+        self.taxa = float(requisicoes_por_segundo)
+        self.rajada = max(1, int(rajada))
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, float] = {}
+        self._ultimo: Dict[str, float] = {}
+        self._pausado_ate: Dict[str, float] = {}
+
+    def aguardar(self, host: str = INSTAGRAM_HOST) -> float:
+        """Bloqueia até haver um token disponível. Retorna o tempo esperado."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                pausa = self._pausado_ate.get(host, 0.0) - agora
+
+                if pausa <= 0:
+                    tokens = self._tokens.get(host, float(self.rajada))
+                    ultimo = self._ultimo.get(host, agora)
+                    tokens = min(self.rajada, tokens + (agora - ultimo) * self.taxa)
+                    self._ultimo[host] = agora
+
+                    if tokens >= 1:
+                        self._tokens[host] = tokens - 1
+                        return esperado
+
+                    self._tokens[host] = tokens
+                    pausa = (1 - tokens) / self.taxa
+
+            time.sleep(pausa)
+            esperado += pausa
+
+    def penalizar(self, segundos: float, host: str = INSTAGRAM_HOST) -> None:
+        """Pausa todas as requisições ao host pelos próximos `segundos`."""
+        with self._lock:
+            ate = time.monotonic() + segundos
+            self._pausado_ate[host] = max(self._pausado_ate.get(host, 0.0), ate)
+
+
+class _ControladorTaxaCompartilhado(instaloader.RateController):
+    """RateController do Instaloader que também consulta o LimitadorTaxa."""
+
+    def __init__(self, context, limitador: LimitadorTaxa):
+        super().__init__(context)
+        self._limitador = limitador
+
+    def wait_before_query(self, query_type: str) -> None:
+        self._limitador.aguardar(INSTAGRAM_HOST)
+        super().wait_before_query(query_type)
+
+
+_limitador_padrao: Optional[LimitadorTaxa] = None
+_limitador_lock = threading.Lock()
+
+
+def limitador_padrao() -> LimitadorTaxa:
+    """Limitador compartilhado pelo processo (COLETA_REQ_POR_SEGUNDO)."""
+    global _limitador_padrao
+    with _limitador_lock:
+        if _limitador_padrao is None:
+            _limitador_padrao = LimitadorTaxa(COLETA_REQ_POR_SEGUNDO)
+        return _limitador_padrao
+
+
+def aplicar_limitador(L, limitador: LimitadorTaxa):
+    """
+    Faz as requisições de uma instância já criada (ex.: vinda do pool de
+    sessões) passarem pelo `limitador`.
+    """
+    context = getattr(L, "context", None)
+    if context is None:
+        return L
+
+    if isinstance(context, instaloader.InstaloaderContext):
+        atual = getattr(context, "_rate_controller", None)
+        if getattr(atual, "_limitador", None) is not limitador:
+            context._rate_controller = _ControladorTaxaCompartilhado(context, limitador)
+    else:
+        # Backends de teste (instagram_fake.ContextoFake) consultam context.limitador
+        context.limitador = limitador
+    return L
+
+
+# -----------------------------------------------------------------------------
+# Autenticação
+# -----------------------------------------------------------------------------
+def autenticar_instagram(
+    limitador: Optional[LimitadorTaxa] = None,
+    session_file: str = SESSION_FILE,
+    usuario: Optional[str] = None,
+) -> instaloader.Instaloader:
+    """
+    Autentica no Instagram ou retorna modo anônimo.
+
+    Para reaproveitar instâncias entre chamadas (processos de longa
+    duração), use sessoes_instagram.pool_padrao().
+    """
+    usuario = usuario or INSTAGRAM_USER
+    _ensure_data_dirs(session_file)
+
+    L = _criar_instaloader(limitador)
+
     # Carregar sessão se existir
-    if os.path.exists(SESSION_FILE):
+    if os.path.exists(session_file):
         try:
-            L.load_session_from_file(INSTAGRAM_USER, SESSION_FILE)
+            L.load_session_from_file(usuario, session_file)
             logger.info("Sessão do Instagram carregada com sucesso.")
             return L
         except Exception as e:
@@ -79,14 +307,14 @@ def autenticar_instagram() -> instaloader.Instaloader:
         logger.info("Modo anônimo selecionado.")
         return L
 
-    # Verificar credenciais
-    if not INSTAGRAM_USER or not INSTAGRAM_PASS:
+    # Verificar credenciais (a senha do .env vale apenas para INSTAGRAM_USER)
+    if not usuario or usuario != INSTAGRAM_USER or not INSTAGRAM_PASS:
         raise RuntimeError("LOGIN_INSTAGRAM ativo, mas credenciais ausentes no .env")
 
     # Tentativa de login
     try:
-        L.login(INSTAGRAM_USER, INSTAGRAM_PASS)
-        L.save_session_to_file(SESSION_FILE)
+        L.login(usuario, INSTAGRAM_PASS)
+        L.save_session_to_file(session_file)
         logger.info("Login realizado com sucesso.")
         return L
     except Exception as exc:
@@ -97,41 +325,105 @@ def autenticar_instagram() -> instaloader.Instaloader:
 # -----------------------------------------------------------------------------
 # Normalização de posts
 # -----------------------------------------------------------------------------
-def _normalize_post_to_row(post) -> Dict:
-    """Converte objeto Post do Instaloader em dicionário limpo."""
+class _AcumuladorColunar:
+    """
+    Acumula posts em listas por coluna em vez de um dicionário por post.
+
+    A conversão de datas e a montagem da URL são feitas uma única vez, de
+    forma vetorizada, em `para_lote` (PostBatch, ver modules/posts.py);
+    `para_dataframe` entrega o lote como DataFrame com tipos compactos:
+    Int64 (nulável) para ids e métricas, bool e strings em Arrow.
+    """
+
+    def __init__(self):
+        self.post_id: List = []
+        self.shortcode: List = []
+        self.caption: List = []
+        self.datetime: List = []
+        self.likes: List = []
+        self.comments: List = []
+        self.is_video: List = []
+
+    def __len__(self) -> int:
+        return len(self.post_id)
+
+    def adicionar(self, post) -> None:
+        """Extrai os campos do Post do Instaloader (tudo ou nada)."""
+        media_id = getattr(post, "mediaid", None) or getattr(post, "id", None)
+        likes = getattr(post, "likes", None)
+        comments = getattr(post, "comments", None)
+
+        valores = (
+            int(media_id) if media_id else None,
+            getattr(post, "shortcode", None),
+            getattr(post, "caption", "") or "",
+            getattr(post, "date_utc", None),
+            int(likes) if likes is not None else None,
+            int(comments) if comments is not None else None,
+            bool(getattr(post, "is_video", False)),
+        )
 
-    media_id = getattr(post, "mediaid", None) or getattr(post, "id", None)
-    shortcode = getattr(post, "shortcode", None)
-    caption = getattr(post, "caption", "") or ""
-    dt = getattr(post, "date_utc", None)
-    likes = getattr(post, "likes", None)
-    comments = getattr(post, "comments", None)
-    is_video = getattr(post, "is_video", False)
-
-    return {
-        "post_id": int(media_id) if media_id else None,
-        "shortcode": shortcode,
-        "url": f"https://www.instagram.com/p/{shortcode}/" if shortcode else None,
-        "caption": caption,
-        "datetime": pd.to_datetime(dt) if dt else pd.NaT,
-        "likes": int(likes) if likes is not None else None,
-        "comments": int(comments) if comments is not None else None,
-        "is_video": bool(is_video),
-    }
+        self.post_id.append(valores[0])
+        self.shortcode.append(valores[1])
+        self.caption.append(valores[2])
+        self.datetime.append(valores[3])
+        self.likes.append(valores[4])
+        self.comments.append(valores[5])
+        self.is_video.append(valores[6])
+
+    def para_lote(self, username: str) -> PostBatch:
+        return PostBatch.de_colunas(
+            post_id=self.post_id,
+            shortcode=self.shortcode,
+            datetime=self.datetime,
+            likes=self.likes,
+            comments=self.comments,
+            caption=self.caption,
+            is_video=self.is_video,
+            profile=username,
+        )
+
+    def para_dataframe(self, username: str) -> pd.DataFrame:
+        return self.para_lote(username).para_pandas()
 
 
 # -----------------------------------------------------------------------------
 # Função principal de coleta
 # -----------------------------------------------------------------------------
-def coletar_posts_publicos(
+def coletar_posts_em_chunks(
     username: str,
-    max_posts: Optional[int] = 50,
-    save_csv: bool = True,
-    csv_path: str = "data/instagram_posts.csv",
+    chunk_size: Optional[int] = 500,
+    max_posts: Optional[int] = None,
     download_media: bool = False,
     media_dir: str = "data/instagram_media",
     use_session: Optional[bool] = None,
-) -> pd.DataFrame:
+    loader: Optional[instaloader.Instaloader] = None,
+    incremental: bool = False,
+    estado_path: str = ESTADO_COLETA,
+    baixador=None,
+    sink=None,
+    indice=None,
+    marca: Optional[Dict] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Coleta posts de um perfil em lotes de `chunk_size`, sem acumular o perfil
+    inteiro em memória.
+
+    Cada lote é gravado em `sink` (caminho .csv/.parquet/.db ou SinkPosts)
+    antes de ser devolvido. Sempre produz ao menos um lote (possivelmente
+    vazio). No modo incremental, a marca d'água só avança quando a
+    iteração termina e alcança a marca anterior (ou o fim do perfil), para
+    que uma coleta interrompida ou cortada por `max_posts` seja refeita.
+
+    Com `indice` (IndiceVistos ou diretório, ver indice_vistos.py), posts já
+    vistos em execuções anteriores são pulados antes de qualquer trabalho
+    (extração, download de mídia, gravação). Como a marca d'água, os posts
+    desta coleta só são marcados como vistos quando a iteração termina.
+
+    Com `marca` ({"post_id", "datetime"}, ex.: armazenamento_posts.ultimo_post),
+    a coleta para nesse post e o arquivo de estado não é lido nem gravado,
+    mesmo com `incremental`: quem chamou mantém a marca (ex.: no banco).
+    """
 
     if not username:
         raise ValueError("username é obrigatório.")
@@ -139,24 +431,16 @@ def coletar_posts_publicos(
     if use_session is None:
         use_session = LOGGING_INSTAGRAM
 
-    _ensure_data_dirs(csv_path, SESSION_FILE)
-
-    if download_media:
-        os.makedirs(media_dir, exist_ok=True)
+    _ensure_data_dirs(SESSION_FILE)
 
-    # Instância do Instaloader
+    # Instância do Instaloader (reaproveitada entre chamadas pelo pool)
     try:
-        L = (
-            autenticar_instagram()
-            if use_session
-            else instaloader.Instaloader(
-                download_pictures=False,
-                download_videos=False,
-                download_comments=False,
-                save_metadata=False,
-                compress_json=False,
-            )
-        )
+        if loader is not None:
+            L = loader
+        else:
+            from modules.sessoes_instagram import pool_padrao
+
+            L = pool_padrao().obter(autenticado=use_session)
     except Exception as e:
         logger.error(f"Erro ao preparar Instaloader: {e}")
         raise
@@ -168,47 +452,400 @@ def coletar_posts_publicos(
         logger.error(f"Erro ao obter perfil '{username}': {e}")
         raise
 
-    rows = []
+    from modules.sink_posts import SinkPosts, abrir_sink
+
+    sink_proprio = sink is not None and not isinstance(sink, SinkPosts)
+    sink = abrir_sink(sink, anexar=incremental)
+
+    from modules.indice_vistos import IndiceVistos, abrir_indice, chaves_do_dataframe
+
+    indice_proprio = indice is not None and not isinstance(indice, IndiceVistos)
+    indice = abrir_indice(indice)
+    vistos_nesta_coleta = []
+
+    baixador_proprio = None
+    if download_media and baixador is None:
+        from modules.download_midia import BaixadorMidia
+
+        baixador = baixador_proprio = BaixadorMidia(media_dir).iniciar()
+        baixador.retomar_pendentes(L.context)
+
+    estado_em_arquivo = incremental and marca is None
+    if estado_em_arquivo:
+        marca = carregar_marca_dagua(username, estado_path)
+    if marca:
+        logger.info(
+            f"Coleta incremental de '{username}' a partir de {marca['datetime']}"
+        )
+
+    acumulador = _AcumuladorColunar()
     count = 0
+    pulados = 0
+    lotes = 0
+    mais_recentes = []
+
+    def _emitir(acumulador):
+        df = acumulador.para_dataframe(username)
+        if indice is not None and not df.empty:
+            df = indice.filtrar_novos(df, marcar=False)
+            chaves, validas = chaves_do_dataframe(df)
+            vistos_nesta_coleta.append(chaves[validas])
+        if not df.empty and df["datetime"].notna().any():
+            mais_recentes.append(df.loc[[df["datetime"].idxmax()]])
+        if sink is not None:
+            sink.escrever(df)
+        return df
+
+    # Se a coleta parar em max_posts antes de alcançar a marca d'água, os
+    # posts entre o corte e a marca ainda não foram coletados: a marca fica
+    # onde está e a próxima execução recomeça do topo
+    completa = True
 
-    for post in profile.get_posts():
-        if max_posts and count >= max_posts:
-            break
+    try:
+        for post in profile.get_posts():
+            if marca and _post_ja_coletado(post, marca):
+                # Posts fixados aparecem primeiro mesmo sendo antigos
+                if getattr(post, "is_pinned", False):
+                    continue
+                break
+
+            if max_posts and count >= max_posts:
+                completa = False
+                break
+
+            if indice is not None and indice.contem(
+                getattr(post, "mediaid", None), getattr(post, "shortcode", None)
+            ):
+                pulados += 1
+                continue
+
+            try:
+                acumulador.adicionar(post)
+                count += 1
+
+                if download_media:
+                    baixador.enfileirar(post)
+
+            except Exception as e:
+                logger.warning(f"Erro processando post: {e}")
+
+            if chunk_size and len(acumulador) >= chunk_size:
+                lotes += 1
+                yield _emitir(acumulador)
+                acumulador = _AcumuladorColunar()
+
+        if len(acumulador) or not lotes:
+            yield _emitir(acumulador)
+
+        if estado_em_arquivo and mais_recentes:
+            if completa:
+                atualizar_marca_dagua(username, pd.concat(mais_recentes), estado_path)
+            else:
+                logger.warning(
+                    f"Coleta de '{username}' interrompida em max_posts={max_posts} "
+                    "antes do último post conhecido; marca d'água mantida."
+                )
+
+        if indice is not None:
+            for chaves in vistos_nesta_coleta:
+                indice.adicionar_muitos(chaves)
+            if indice_proprio:
+                indice.salvar()
+
+        extra = f" ({pulados} já vistos pulados)" if pulados else ""
+        logger.info(f"Coleta concluída. Total: {count} posts{extra}.")
+    finally:
+        if baixador_proprio is not None:
+            baixador_proprio.finalizar()
+        if sink_proprio:
+            sink.fechar()
 
-        try:
-            row = _normalize_post_to_row(post)
-            rows.append(row)
-            count += 1
 
-            if download_media:
-                try:
-                    L.download_post(post, target=media_dir)
-                except Exception as e:
-                    logger.warning(f"Falha ao baixar mídia {row.get('shortcode')}: {e}")
+def coletar_posts_publicos(
+    username: str,
+    max_posts: Optional[int] = 50,
+    save_csv: bool = True,
+    csv_path: str = "data/instagram_posts.csv",
+    download_media: bool = False,
+    media_dir: str = "data/instagram_media",
+    use_session: Optional[bool] = None,
+    loader: Optional[instaloader.Instaloader] = None,
+    incremental: bool = False,
+    estado_path: str = ESTADO_COLETA,
+    baixador=None,
+    chunk_size: Optional[int] = None,
+    indice=None,
+    marca: Optional[Dict] = None,
+) -> pd.DataFrame:
+    """
+    Coleta posts públicos de um perfil.
 
-        except Exception as e:
-            logger.warning(f"Erro processando post: {e}")
+    Com `incremental=True`, a iteração para no primeiro post já coletado
+    em execuções anteriores (marca d'água em `estado_path`), o CSV é
+    anexado em vez de sobrescrito e apenas os posts novos são retornados.
+    Se `max_posts` cortar a coleta antes desse post, a marca não avança.
+
+    Com `download_media=True`, as mídias são baixadas em segundo plano por
+    um BaixadorMidia. Se `baixador` for informado (ex.: compartilhado entre
+    perfis), ele não é finalizado aqui.
 
-    df = pd.DataFrame(rows)
+    Com `chunk_size`, o CSV é gravado a cada `chunk_size` posts. Para manter
+    a memória constante em perfis muito grandes, use coletar_posts_em_chunks.
 
-    if not df.empty:
-        if not pd.api.types.is_datetime64_any_dtype(df.get("datetime")):
-            df["datetime"] = pd.to_datetime(df["datetime"])
+    Com `indice` (IndiceVistos ou diretório), só posts nunca vistos são
+    coletados e retornados, o que evita duplicatas ao anexar o CSV.
 
-        df["date"] = df["datetime"].dt.date
-        df["hour"] = df["datetime"].dt.hour
+    Com `marca`, a coleta para no post informado em vez de usar o arquivo
+    de estado (ver coletar_posts_em_chunks).
+    """
+    sink = None
+    if save_csv and chunk_size:
+        from modules.sink_posts import SinkPosts
+
+        sink = SinkPosts(csv_path, anexar=incremental)
+
+    try:
+        chunks = list(
+            coletar_posts_em_chunks(
+                username,
+                chunk_size=chunk_size,
+                max_posts=max_posts,
+                download_media=download_media,
+                media_dir=media_dir,
+                use_session=use_session,
+                loader=loader,
+                incremental=incremental,
+                estado_path=estado_path,
+                baixador=baixador,
+                sink=sink,
+                indice=indice,
+                marca=marca,
+            )
+        )
+    finally:
+        if sink is not None:
+            sink.fechar()
+
+    df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
 
     # Salvar CSV
-    if save_csv:
+    if save_csv and sink is None:
+        _salvar_csv(df, csv_path, anexar=incremental)
+
+    return df
+
+
+# -----------------------------------------------------------------------------
+# Coleta concorrente de vários perfis
+# -----------------------------------------------------------------------------
+_ERROS_NAO_RECUPERAVEIS = (
+    instaloader.exceptions.ProfileNotExistsException,
+    instaloader.exceptions.QueryReturnedNotFoundException,
+    instaloader.exceptions.LoginRequiredException,
+    instaloader.exceptions.PrivateProfileNotFollowedException,
+)
+
+
+def _coletar_com_backoff(
+    username: str,
+    loader_factory: Callable[[], instaloader.Instaloader],
+    limitador: LimitadorTaxa,
+    max_tentativas: int,
+    backoff_base: float,
+    ao_falhar: Optional[Callable[[instaloader.Instaloader], None]] = None,
+    **kwargs,
+) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Coleta um perfil com retentativas e backoff exponencial com jitter.
+
+    `ao_falhar(loader)` é chamado quando a instância recebe um 429 ou perde
+    o login (ex.: PoolSessoes.marcar_falha, que a tira do rodízio); nesse
+    caso a próxima tentativa usa outra instância de `loader_factory`.
+    """
+    stats = {
+        "profile": username,
+        "posts": 0,
+        "tentativas": 0,
+        "segundos": 0.0,
+        "erro": None,
+    }
+    df = pd.DataFrame()
+    inicio = time.perf_counter()
+
+    for tentativa in range(1, max_tentativas + 1):
+        stats["tentativas"] = tentativa
+        loader = None
         try:
-            os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
-            df.to_csv(csv_path, index=False, encoding="utf-8")
-            logger.info(f"✅ {len(df)} posts salvos em {csv_path}")
+            limitador.aguardar(INSTAGRAM_HOST)
+            loader = loader_factory()
+            df = coletar_posts_publicos(
+                username, save_csv=False, loader=loader, **kwargs
+            )
+            stats["erro"] = None
+            break
+        except _ERROS_NAO_RECUPERAVEIS as e:
+            stats["erro"] = f"{type(e).__name__}: {e}"
+            if (
+                ao_falhar is not None
+                and loader is not None
+                and isinstance(e, instaloader.exceptions.LoginRequiredException)
+            ):
+                # Sessão expirada: sai do rodízio e a próxima tentativa usa outra
+                ao_falhar(loader)
+                if tentativa < max_tentativas:
+                    continue
+            break
+        except instaloader.exceptions.ConnectionException as e:
+            stats["erro"] = f"{type(e).__name__}: {e}"
+            muitas = isinstance(e, instaloader.exceptions.TooManyRequestsException)
+            if muitas and ao_falhar is not None and loader is not None:
+                ao_falhar(loader)
+            if tentativa == max_tentativas:
+                break
+
+            espera = backoff_base * (2 ** (tentativa - 1))
+            espera += random.uniform(0, backoff_base)
+            if muitas:
+                limitador.penalizar(espera, INSTAGRAM_HOST)
+
+            logger.warning(
+                f"Falha ao coletar '{username}' (tentativa {tentativa}): {e}. "
+                f"Nova tentativa em {espera:.1f}s."
+            )
+            time.sleep(espera)
         except Exception as e:
-            logger.warning(f"Erro ao salvar CSV ({csv_path}): {e}")
+            stats["erro"] = f"{type(e).__name__}: {e}"
+            break
 
-    logger.info(f"Coleta concluída. Total: {len(df)} posts.")
-    return df
+    stats["posts"] = len(df)
+    stats["segundos"] = time.perf_counter() - inicio
+    return df, stats
+
+
+def coletar_varios_perfis(
+    usernames: List[str],
+    max_posts: Optional[int] = 50,
+    max_workers: int = COLETA_MAX_WORKERS,
+    requisicoes_por_segundo: Optional[float] = None,
+    max_tentativas: int = 3,
+    backoff_base: float = 2.0,
+    save_csv: bool = True,
+    csv_path: str = "data/instagram_posts.csv",
+    use_session: Optional[bool] = None,
+    loader_factory: Optional[Callable[[], instaloader.Instaloader]] = None,
+    limitador: Optional[LimitadorTaxa] = None,
+    incremental: bool = False,
+    estado_path: str = ESTADO_COLETA,
+    download_media: bool = False,
+    media_dir: str = "data/instagram_media",
+    indice=None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Coleta vários perfis em paralelo com um pool de threads limitado.
+
+    Todas as threads compartilham o mesmo LimitadorTaxa, de modo que o
+    volume total de requisições ao Instagram respeita
+    `requisicoes_por_segundo`, independentemente de `max_workers`. Sem
+    `limitador` nem `requisicoes_por_segundo`, usa limitador_padrao(), o
+    mesmo das demais coletas do processo. As sessões do pool recebem esse
+    limitador e, após um 429 ou perda de login, ficam em quarentena.
+
+    Com `indice` (IndiceVistos ou diretório), todos os perfis consultam e
+    atualizam o mesmo índice de posts já vistos.
+
+    Retorna:
+        df: DataFrame com os posts de todos os perfis (coluna `profile`)
+        estatisticas: DataFrame com posts, tentativas, segundos e erro por perfil
+    """
+    usernames = list(dict.fromkeys(u for u in usernames if u))
+    if not usernames:
+        raise ValueError("usernames deve conter ao menos um perfil.")
+
+    if use_session is None:
+        use_session = LOGGING_INSTAGRAM
+
+    if limitador is None:
+        if requisicoes_por_segundo:
+            limitador = LimitadorTaxa(requisicoes_por_segundo)
+        else:
+            limitador = limitador_padrao()
+
+    ao_falhar = None
+    if loader_factory is None:
+        if use_session:
+            from modules.sessoes_instagram import pool_padrao
+
+            # Sessões aquecidas, distribuídas em round-robin entre as threads
+            pool = pool_padrao()
+            loader_factory = lambda: pool.obter(  # noqa: E731
+                autenticado=True, limitador=limitador
+            )
+            ao_falhar = pool.marcar_falha
+        else:
+            loader_factory = lambda: _criar_instaloader(limitador)  # noqa: E731
+
+    frames = []
+    estatisticas = []
+    inicio = time.perf_counter()
+
+    # Um único pool de downloads de mídia para todos os perfis
+    baixador = None
+    if download_media:
+        from modules.download_midia import BaixadorMidia
+
+        baixador = BaixadorMidia(media_dir).iniciar()
+
+    from modules.indice_vistos import IndiceVistos, abrir_indice
+
+    indice_proprio = indice is not None and not isinstance(indice, IndiceVistos)
+    indice = abrir_indice(indice)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futuros = {
+            executor.submit(
+                _coletar_com_backoff,
+                username,
+                loader_factory,
+                limitador,
+                max_tentativas,
+                backoff_base,
+                ao_falhar,
+                max_posts=max_posts,
+                incremental=incremental,
+                estado_path=estado_path,
+                download_media=download_media,
+                baixador=baixador,
+                indice=indice,
+            ): username
+            for username in usernames
+        }
+
+        for futuro in as_completed(futuros):
+            df_perfil, stats = futuro.result()
+            estatisticas.append(stats)
+            if not df_perfil.empty:
+                frames.append(df_perfil)
+
+    if baixador is not None:
+        baixador.finalizar()
+    if indice_proprio:
+        indice.salvar()
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    df_stats = (
+        pd.DataFrame(estatisticas).set_index("profile").reindex(usernames).reset_index()
+    )
+
+    falhas = int(df_stats["erro"].notna().sum())
+    logger.info(
+        f"Coleta de {len(usernames)} perfis concluída em "
+        f"{time.perf_counter() - inicio:.1f}s. Posts: {len(df)}. Falhas: {falhas}."
+    )
+
+    if save_csv and not df.empty:
+        _salvar_csv(df, csv_path, anexar=incremental)
+
+    return df, df_stats
 
 
 # -----------------------------------------------------------------------------
@@ -218,26 +855,19 @@ def coletar_simulado(n: int = 5) -> pd.DataFrame:
     """Gera DataFrame simulado para testes."""
     import datetime
 
-    data = []
-    for i in range(n):
-        ts = datetime.datetime.utcnow() - pd.Timedelta(days=i)
-        data.append(
-            {
-                "post_id": 1000 + i,
-                "shortcode": f"POST_{i}",
-                "url": f"https://www.instagram.com/p/POST_{i}/",
-                "caption": f"Legenda teste {i}",
-                "datetime": ts,
-                "likes": (i + 1) * 10,
-                "comments": (i + 1) * 2,
-                "is_video": False,
-            }
+    agora = datetime.datetime.utcnow()
+    posts = [
+        Post(
+            post_id=1000 + i,
+            shortcode=f"POST_{i}",
+            datetime=agora - datetime.timedelta(days=i),
+            likes=(i + 1) * 10,
+            comments=(i + 1) * 2,
+            caption=f"Legenda teste {i}",
         )
-
-    df = pd.DataFrame(data)
-    df["date"] = df["datetime"].dt.date
-    df["hour"] = df["datetime"].dt.hour
-    return df
+        for i in range(n)
+    ]
+    return PostBatch.de_posts(posts).para_pandas()
 
 
 # -----------------------------------------------------------------------------
@@ -246,18 +876,16 @@ def coletar_simulado(n: int = 5) -> pd.DataFrame:
 def save_posts_to_sqlite(
     df: pd.DataFrame, db_path: str = SQLITE_DB, table: str = "posts"
 ) -> None:
+    """Grava posts no SQLite via upsert (sem duplicar posts já salvos)."""
     if df is None or df.empty:
         logger.info("Nenhum dado para salvar no banco.")
         return
 
-    _ensure_data_dirs(db_path)
-
     try:
-        import sqlalchemy as sa
+        from modules.armazenamento_posts import upsert_posts
 
-        engine = sa.create_engine(f"sqlite:///{db_path}")
-        df.to_sql(table, con=engine, if_exists="append", index=False)
-        logger.info(f"✅ {len(df)} posts gravados em {db_path}:{table}")
+        n = upsert_posts(df, db_path=db_path, tabela=table)
+        logger.info(f"✅ {n} posts gravados em {db_path}:{table}")
     except Exception as e:
         logger.warning(f"Erro ao salvar no SQLite: {e}")
 
@@ -1,33 +1,38 @@
 """
 Módulo: dados_sinteticos.py
-Função: Gerar dados artificais de posts para sinmuar interações reais
+Função: Gerar dados artificais de posts para simular interações reais
 (likes, comentários, hashtags, etc.)
+
+Geração vetorizada com numpy (sem laços por linha): milhões de linhas em
+poucos segundos, para testes e benchmarks de escala do modelo.
 """
 
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
-import numpy as numpy
-from datetime import datetime, timedelta
-import random
 
-def gerar_dados_sinteticos(n=50, salvar_csv=True):
+
+def gerar_dados_sinteticos(n=50, salvar_csv=True, semente=None):
     """
     Gera um conjunto de dados sintético para simular posts do Instagram.
     Esses dados serão usados para testar o modelo de otimização e engajamento.
     """
+    rng = np.random.default_rng(semente)
 
     # Criar uma lista de datas recentes:
-    hoje = datetime.now()
-    datas = [hoje - timedelta(days=i) for i in range(n)]
+    hoje = pd.Timestamp(datetime.now())
+    datas = hoje - pd.to_timedelta(np.arange(n), unit="D")
 
     # Geração de dados aleatório coerentes com posts reais
     dados = {
-        "data_postagem": datas, # quantidade de curtidas
-        "likes": np.random.randint(0, 400, n), # número de comentários
-        "hashtags": [random.randint(0,10) for _ in range (n)] # número de hashtags
-        "hora_postagem": [random.randit(0,23) for _ in range (n)] # hora do post
-        "legenda_tamanho": np.random.randint(50,500,n), # tamanho da legenda
-        "tipo_post": np.random.choice(["foto", "video", "carrosesel"], n) # tipo de post
-        
+        "data_postagem": datas,
+        "likes": rng.integers(0, 400, n),  # quantidade de curtidas
+        "comentarios": rng.integers(0, 60, n),  # número de comentários
+        "hashtags": rng.integers(0, 11, n),  # número de hashtags
+        "hora_postagem": rng.integers(0, 24, n),  # hora do post
+        "legenda_tamanho": rng.integers(50, 500, n),  # tamanho da legenda
+        "tipo_post": rng.choice(["foto", "video", "carrossel"], n),  # tipo de post
     }
 
     # Converter para DataFrame
@@ -36,20 +41,63 @@ def gerar_dados_sinteticos(n=50, salvar_csv=True):
     # Criar coluna de engajamento simulado (likes + comentários com peso)
     df["engajamento"] = df["likes"] * 0.7 + df["comentarios"] * 1.3
 
-    # Converter para DataFrame
-    df = pd.DataFrame(dados)
-
-    # Criar coluna de engajamaento simulado (likes + comentários com peso)
-    df["engajamento"] = df["likes"] * 0.7 + df["comentarios"] * 1.3
-
     # Salvar localmente caso solicitado
-    if salvar_scv:
+    if salvar_csv:
         df.to_csv("dados_sinteticos.csv", index=False)
-        print ("✅ Dataset sintético salvo em 'dados_sinteticos.csv'.")
+        print("✅ Dataset sintético salvo em 'dados_sinteticos.csv'.")
 
     return df
 
-    if __name__ == "__main__":
-        # Teste rápido de geração
-        df_teste = gerar_dados_sinteticos(30)
-        print(df_teste.head())
+
+def gerar_dados_engajamento(n=1000, semente=0, perfis=50):
+    """
+    Posts sintéticos com as colunas do modelo de engajamento (e as demais
+    features do store), com curtidas que dependem delas de forma não linear:
+    pico de audiência à noite, fim de semana, hashtag em tendência, vídeo e
+    tamanho do perfil. Tipos compactos (int8/int16/float32) para caber
+    dezenas de milhões de linhas em memória.
+    """
+    rng = np.random.default_rng(semente)
+
+    hora = rng.integers(0, 24, n, dtype=np.int8)
+    dia = rng.integers(0, 7, n, dtype=np.int8)
+    tendencia = (rng.random(n) < 0.3).astype(np.int8)
+    video = (rng.random(n) < 0.25).astype(np.int8)
+    n_hashtags = rng.poisson(4, n).astype(np.int8)
+    tamanho_legenda = rng.integers(0, 2200, n, dtype=np.int16)
+
+    # Cada perfil tem um público base (log-normal)
+    base_perfil = rng.lognormal(6, 0.4, perfis).astype(np.float32)
+    perfil = rng.integers(0, perfis, n)
+    media_perfil = base_perfil[perfil] * rng.normal(1, 0.1, n).astype(np.float32)
+
+    fator_hora = 0.6 + 0.4 * np.exp(-(((hora - 19) / 3.5) ** 2))
+    fator_dia = np.where(dia >= 5, 1.15, 1.0)
+    curtidas = (
+        media_perfil
+        * fator_hora
+        * fator_dia
+        * (1 + 0.3 * tendencia)
+        * (1 + 0.2 * video)
+        * (1 - tamanho_legenda / 2200 * 0.1)
+        * rng.lognormal(0, 0.15, n)
+    )
+
+    return pd.DataFrame(
+        {
+            "hora_postagem": hora,
+            "dia_semana": dia,
+            "hashtag_tendencia": tendencia,
+            "tamanho_legenda": tamanho_legenda,
+            "n_hashtags": n_hashtags,
+            "tipo_midia": video,
+            "media_curtidas_perfil": media_perfil.astype(np.float32),
+            "curtidas": np.rint(curtidas).astype(np.int32),
+        }
+    )
+
+
+if __name__ == "__main__":
+    # Teste rápido de geração
+    df_teste = gerar_dados_sinteticos(30)
+    print(df_teste.head())
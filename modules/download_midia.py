@@ -0,0 +1,264 @@
+"""
+download_midia.py
+Download de mídias (imagens/vídeos) de posts em segundo plano.
+
+As mídias são baixadas por um pool limitado de threads alimentado por uma
+fila, de modo que a coleta de metadados não espera pelos downloads.
+
+- Arquivos nomeados pelo shortcode do post (`{shortcode}.jpg`, `{shortcode}_1.mp4`...)
+- Posts já presentes em `media_dir` são ignorados (arquivos `.temp` de um
+  download interrompido não contam)
+- Arquivos com conteúdo idêntico (SHA-256) a um já baixado são descartados
+- Manifesto JSONL em `media_dir` permite retomar uma execução interrompida
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import json
+import queue
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Callable
+
+import instaloader
+
+logger = logging.getLogger(__name__)
+
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "4"))
+MANIFESTO_MIDIA = "manifesto.jsonl"
+
+_FIM = object()
+
+
+def criar_loader_midia() -> instaloader.Instaloader:
+    """Instaloader configurado apenas para baixar mídias, nomeadas por shortcode."""
+    return instaloader.Instaloader(
+        filename_pattern="{shortcode}",
+        download_pictures=True,
+        download_videos=True,
+        download_video_thumbnails=False,
+        download_comments=False,
+        save_metadata=False,
+        compress_json=False,
+        post_metadata_txt_pattern="",
+    )
+
+
+def _sha256(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class BaixadorMidia:
+    """
+    Pool de threads para download de mídias com deduplicação e manifesto.
+
+    Uso:
+        with BaixadorMidia("data/instagram_media") as baixador:
+            for post in profile.get_posts():
+                baixador.enfileirar(post)
+    """
+
+    def __init__(
+        self,
+        media_dir: str,
+        max_workers: int = MEDIA_WORKERS,
+        tamanho_fila: int = 1000,
+        loader_factory: Callable[[], instaloader.Instaloader] = criar_loader_midia,
+    ):
+        self.media_dir = media_dir
+        self.manifesto_path = os.path.join(media_dir, MANIFESTO_MIDIA)
+        self.max_workers = max(1, max_workers)
+        self.loader_factory = loader_factory
+
+        os.makedirs(media_dir, exist_ok=True)
+
+        self._fila: queue.Queue = queue.Queue(maxsize=tamanho_fila)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._concluidos: set = set()
+        self._pendentes: set = set()
+        self._hashes: Dict[str, str] = {}
+        self.stats = {"baixados": 0, "ignorados": 0, "duplicados": 0, "erros": 0}
+
+        self._carregar_manifesto()
+
+    # -------------------------------------------------------------------------
+    # Manifesto
+    # -------------------------------------------------------------------------
+    def _carregar_manifesto(self) -> None:
+        if not os.path.exists(self.manifesto_path):
+            return
+
+        with open(self.manifesto_path, encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    # Última linha truncada por interrupção
+                    continue
+
+                shortcode = registro.get("shortcode")
+                status = registro.get("status")
+                if status == "pendente":
+                    self._pendentes.add(shortcode)
+                elif status in ("ok", "duplicado"):
+                    self._pendentes.discard(shortcode)
+                    self._concluidos.add(shortcode)
+                    for h in registro.get("sha256", []):
+                        self._hashes.setdefault(h, shortcode)
+
+    def _registrar(self, registro: Dict) -> None:
+        with self._lock:
+            with open(self.manifesto_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    @property
+    def pendentes(self) -> List[str]:
+        """Shortcodes enfileirados numa execução anterior e não concluídos."""
+        with self._lock:
+            return sorted(self._pendentes - self._concluidos)
+
+    # -------------------------------------------------------------------------
+    # Workers
+    # -------------------------------------------------------------------------
+    def iniciar(self) -> "BaixadorMidia":
+        for i in range(self.max_workers):
+            t = threading.Thread(target=self._worker, name=f"midia-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def _arquivos(self, shortcode: str) -> List[str]:
+        """
+        Mídias finais do post (`{shortcode}.jpg`, `{shortcode}_2.mp4`...). Não
+        inclui `.temp` parciais nem posts cujo shortcode começa com este.
+        """
+        padrao = re.compile(re.escape(shortcode) + r"(_\d+)?\.[A-Za-z0-9]+")
+        return sorted(
+            os.path.join(self.media_dir, nome)
+            for nome in os.listdir(self.media_dir)
+            if padrao.fullmatch(nome) and not nome.endswith(".temp")
+        )
+
+    def _ja_existe(self, shortcode: str) -> bool:
+        if shortcode in self._concluidos:
+            return True
+        return bool(self._arquivos(shortcode))
+
+    def enfileirar(self, post) -> bool:
+        """Agenda o download do post. Retorna False se a mídia já existe."""
+        shortcode = getattr(post, "shortcode", None)
+        if not shortcode:
+            return False
+
+        with self._lock:
+            if self._ja_existe(shortcode):
+                self.stats["ignorados"] += 1
+                return False
+            self._concluidos.add(shortcode)
+
+        self._registrar({"shortcode": shortcode, "status": "pendente"})
+        self._fila.put(post)
+        return True
+
+    def retomar_pendentes(self, context=None) -> int:
+        """Reenfileira os downloads pendentes de execuções anteriores."""
+        if context is None:
+            context = self.loader_factory().context
+
+        n = 0
+        for shortcode in self.pendentes:
+            try:
+                post = instaloader.Post.from_shortcode(context, shortcode)
+            except Exception as e:
+                logger.warning(f"Falha ao retomar mídia {shortcode}: {e}")
+                continue
+            with self._lock:
+                self._concluidos.add(shortcode)
+            self._fila.put(post)
+            n += 1
+
+        logger.info(f"{n} downloads de mídia retomados.")
+        return n
+
+    def _worker(self) -> None:
+        # Qualquer exceção é tratada por post: um worker morto deixaria a fila
+        # (limitada) cheia e finalizar() bloqueado para sempre
+        L = None
+
+        while True:
+            post = self._fila.get()
+            try:
+                if post is _FIM:
+                    return
+                if L is None:
+                    L = self.loader_factory()
+                self._baixar(L, post)
+            except Exception as e:
+                self._falha(getattr(post, "shortcode", None), e)
+            finally:
+                self._fila.task_done()
+
+    def _falha(self, shortcode: str, erro: Exception) -> None:
+        logger.warning(f"Falha ao baixar mídia {shortcode}: {erro}")
+        with self._lock:
+            self._concluidos.discard(shortcode)
+            self.stats["erros"] += 1
+        self._registrar({"shortcode": shortcode, "status": "erro", "erro": str(erro)})
+
+    def _baixar(self, L, post) -> None:
+        shortcode = post.shortcode
+        L.download_post(post, target=self.media_dir)
+
+        arquivos = self._arquivos(shortcode)
+        hashes = []
+        status = "ok"
+
+        with self._lock:
+            for arquivo in arquivos:
+                h = _sha256(arquivo)
+                original = self._hashes.get(h)
+                if original and original != shortcode:
+                    os.remove(arquivo)
+                    status = "duplicado"
+                else:
+                    self._hashes[h] = shortcode
+                hashes.append(h)
+
+            self._pendentes.discard(shortcode)
+            self.stats["duplicados" if status == "duplicado" else "baixados"] += 1
+
+        self._registrar(
+            {
+                "shortcode": shortcode,
+                "status": status,
+                "arquivos": [os.path.basename(a) for a in arquivos],
+                "sha256": hashes,
+            }
+        )
+
+    def finalizar(self) -> Dict[str, int]:
+        """Aguarda a fila esvaziar e encerra os workers."""
+        for _ in self._threads:
+            self._fila.put(_FIM)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+        logger.info(f"Download de mídias concluído: {self.stats}")
+        return dict(self.stats)
+
+    def __enter__(self) -> "BaixadorMidia":
+        return self.iniciar()
+
+    def __exit__(self, *exc) -> None:
+        self.finalizar()
@@ -0,0 +1,22 @@
+"""
+estatisticas.py
+Funções estatísticas pequenas compartilhadas pelos serviços de longa duração
+(agendador, servico_previsao).
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+
+def percentil(valores: Iterable[float], p: float) -> Optional[float]:
+    """
+    Percentil `p` (0-1) de `valores` pelo método do vizinho mais próximo,
+    arredondado a 3 casas; None se não houver valores.
+    """
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    return round(ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))], 3)
@@ -0,0 +1,527 @@
+"""
+features.py
+Armazenamento de features por post, derivadas da tabela de posts.
+
+Liga os posts coletados (datetime, likes, comments, caption, is_video) ao
+modelo de engajamento (hora_postagem, dia_semana, hashtag_tendencia,
+curtidas). A tabela `<tabela>_features` guarda, por post:
+
+- hora_postagem, dia_semana (0 = segunda), curtidas, comentarios
+- tamanho_legenda, n_hashtags, n_mencoes, hashtags (texto, separado por espaço)
+- tipo_midia (0 = foto, 1 = vídeo)
+- hashtag_tendencia: 1 se o post usa alguma hashtag do conjunto de tendências
+- media_curtidas_perfil, media_comentarios_perfil: médias dos
+  FEATURES_JANELA_PERFIL posts anteriores do mesmo perfil (sem o próprio post)
+- hash_entrada: hash das colunas do post usadas no cálculo
+
+A manutenção é feita por armazenamento_posts.upsert_posts, na mesma
+transação: só os posts cujo hash_entrada mudou são recalculados, junto com os
+FEATURES_JANELA_PERFIL posts seguintes do mesmo perfil (cujas médias móveis
+dependem deles). Treino e inferência leem as features prontas
+(dataset_engajamento), sem recalcular.
+
+O conjunto de tendências é definido no primeiro cálculo, por
+HASHTAGS_TENDENCIA ou, se vazio, pelas hashtags mais usadas no índice de
+termos naquele momento, e fica gravado em `<tabela>_features_meta`. Ele não
+acompanha o índice de termos sozinho: é refeito quando HASHTAGS_TENDENCIA
+muda ou com definir_tendencias (ambos refazem apenas a coluna
+hashtag_tendencia; uma lista passada a definir_tendencias prevalece sobre o
+.env). Mudar VERSAO_FEATURES ou a janela reconstrói a tabela no próximo
+acesso.
+
+Posts sem `profile` também recebem features, agrupados entre si.
+
+Configuração via .env:
+    FEATURES_JANELA_PERFIL=10
+    HASHTAGS_TENDENCIA=          # ex.: verao,promo,receitas
+    N_HASHTAGS_TENDENCIA=20
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from modules.armazenamento_posts import (
+    SQLITE_DB,
+    _metadata,
+    criar_schema,
+    obter_engine,
+    tabela_posts,
+)
+from modules.hashtags import HASHTAG, extrair_hashtags, extrair_mencoes, tabela_termos
+
+logger = logging.getLogger(__name__)
+
+VERSAO_FEATURES = 1
+JANELA_PERFIL = int(os.getenv("FEATURES_JANELA_PERFIL", "10"))
+N_HASHTAGS_TENDENCIA = int(os.getenv("N_HASHTAGS_TENDENCIA", "20"))
+
+ENTRADAS = [
+    "post_id",
+    "profile",
+    "datetime",
+    "likes",
+    "comments",
+    "caption",
+    "is_video",
+]
+
+_tabelas_features: Dict[str, sa.Table] = {}
+
+
+# -----------------------------------------------------------------------------
+# Schema
+# -----------------------------------------------------------------------------
+def tabela_features(tabela: str = "posts") -> sa.Table:
+    nome = f"{tabela}_features"
+    t = _tabelas_features.get(nome)
+    if t is None:
+        t = sa.Table(
+            nome,
+            _metadata,
+            sa.Column("post_id", sa.BigInteger, primary_key=True),
+            sa.Column("profile", sa.String),
+            sa.Column("datetime", sa.DateTime),
+            sa.Column("hora_postagem", sa.Integer),
+            sa.Column("dia_semana", sa.Integer),
+            sa.Column("hashtag_tendencia", sa.Integer),
+            sa.Column("curtidas", sa.Integer),
+            sa.Column("comentarios", sa.Integer),
+            sa.Column("tamanho_legenda", sa.Integer),
+            sa.Column("n_hashtags", sa.Integer),
+            sa.Column("n_mencoes", sa.Integer),
+            sa.Column("tipo_midia", sa.Integer),
+            sa.Column("media_curtidas_perfil", sa.Float),
+            sa.Column("media_comentarios_perfil", sa.Float),
+            sa.Column("hashtags", sa.Text),
+            sa.Column("hash_entrada", sa.BigInteger),
+            sa.Index(f"ix_{nome}_profile_datetime", "profile", "datetime"),
+        )
+        _tabelas_features[nome] = t
+    return t
+
+
+def tabela_meta(tabela: str = "posts") -> sa.Table:
+    nome = f"{tabela}_features_meta"
+    t = _tabelas_features.get(nome)
+    if t is None:
+        t = sa.Table(
+            nome,
+            _metadata,
+            sa.Column("chave", sa.String, primary_key=True),
+            sa.Column("valor", sa.Text),
+        )
+        _tabelas_features[nome] = t
+    return t
+
+
+COLUNAS_FEATURES = [c.name for c in tabela_features().columns]
+
+
+def _versao() -> str:
+    return f"{VERSAO_FEATURES}:{JANELA_PERFIL}"
+
+
+def _ler_meta(conn, tabela: str) -> Dict[str, str]:
+    t = tabela_meta(tabela)
+    return dict(conn.execute(sa.select(t.c.chave, t.c.valor)).all())
+
+
+def _gravar_meta(conn, tabela: str, **valores) -> None:
+    t = tabela_meta(tabela)
+    stmt = sqlite_insert(t)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["chave"], set_={"valor": stmt.excluded.valor}
+    )
+    conn.execute(stmt, [{"chave": k, "valor": v} for k, v in valores.items()])
+
+
+# -----------------------------------------------------------------------------
+# Cálculo (vetorizado)
+# -----------------------------------------------------------------------------
+def hash_entradas(posts: pd.DataFrame) -> np.ndarray:
+    """Hash (int64) das colunas de entrada de cada post."""
+    normalizado = pd.DataFrame(
+        {
+            "post_id": pd.to_numeric(posts["post_id"]).astype("int64"),
+            "profile": posts["profile"].astype(object).fillna(""),
+            "datetime": pd.to_datetime(posts["datetime"]).astype("int64"),
+            "likes": pd.to_numeric(posts["likes"], errors="coerce").astype(float),
+            "comments": pd.to_numeric(posts["comments"], errors="coerce").astype(float),
+            "caption": posts["caption"].astype(object).fillna(""),
+            "is_video": posts["is_video"].astype("boolean").astype(float),
+        }
+    )
+    return (
+        pd.util.hash_pandas_object(normalizado, index=False).to_numpy().view(np.int64)
+    )
+
+
+def construir_features(
+    posts: pd.DataFrame, tendencias: Iterable[str] = (), janela: int = None
+) -> pd.DataFrame:
+    """
+    Features de cada post (colunas ENTRADAS). As médias do perfil usam os
+    `janela` posts anteriores presentes em `posts`.
+    """
+    janela = janela or JANELA_PERFIL
+    if posts.empty:
+        return pd.DataFrame(columns=COLUNAS_FEATURES)
+
+    posts = posts.assign(datetime=pd.to_datetime(posts["datetime"]))
+    posts = posts[posts["datetime"].notna()]
+    posts = posts.sort_values(["profile", "datetime", "post_id"], ignore_index=True)
+
+    dt = posts["datetime"].dt
+    legendas = posts["caption"].fillna("").astype(str)
+    hashtags = extrair_hashtags(legendas)
+    curtidas = pd.to_numeric(posts["likes"], errors="coerce")
+    comentarios = pd.to_numeric(posts["comments"], errors="coerce")
+
+    explodidas = hashtags.explode()
+    tendencia = explodidas.isin(set(tendencias)).groupby(level=0).any()
+
+    def media_anterior(valores: pd.Series) -> pd.Series:
+        # Posts sem perfil formam um grupo próprio (dropna=False)
+        anteriores = valores.groupby(posts["profile"], dropna=False).shift()
+        return (
+            anteriores.groupby(posts["profile"], dropna=False)
+            .rolling(janela, min_periods=1)
+            .mean()
+            .reset_index(level=0, drop=True)
+        )
+
+    return pd.DataFrame(
+        {
+            "post_id": posts["post_id"].astype("int64"),
+            "profile": posts["profile"],
+            "datetime": posts["datetime"],
+            "hora_postagem": dt.hour,
+            "dia_semana": dt.dayofweek,
+            "hashtag_tendencia": tendencia.astype(int),
+            "curtidas": curtidas.astype("Int64"),
+            "comentarios": comentarios.astype("Int64"),
+            "tamanho_legenda": legendas.str.len(),
+            "n_hashtags": hashtags.str.len(),
+            "n_mencoes": extrair_mencoes(legendas).str.len(),
+            "tipo_midia": posts["is_video"].astype("boolean").fillna(False).astype(int),
+            "media_curtidas_perfil": media_anterior(curtidas),
+            "media_comentarios_perfil": media_anterior(comentarios),
+            "hashtags": hashtags.str.join(" "),
+            "hash_entrada": hash_entradas(posts),
+        }
+    )[COLUNAS_FEATURES]
+
+
+# -----------------------------------------------------------------------------
+# Manutenção incremental
+# -----------------------------------------------------------------------------
+def _ler_posts(conn, posts: sa.Table, *condicoes, ordem=None, limite=None):
+    query = sa.select(*[posts.c[c] for c in ENTRADAS]).where(*condicoes)
+    if ordem is not None:
+        query = query.order_by(*ordem)
+    if limite is not None:
+        query = query.limit(limite)
+    return pd.DataFrame(conn.execute(query).all(), columns=ENTRADAS)
+
+
+def _gravar(conn, t: sa.Table, features: pd.DataFrame) -> int:
+    if features.empty:
+        return 0
+    df = features.astype(object)
+    registros = df.where(df.notna(), None).to_dict("records")
+    stmt = sqlite_insert(t)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["post_id"],
+        set_={c: stmt.excluded[c] for c in COLUNAS_FEATURES if c != "post_id"},
+    )
+    for i in range(0, len(registros), 1000):
+        conn.execute(stmt, registros[i : i + 1000])
+    return len(registros)
+
+
+def _tendencias_padrao(conn, tabela: str) -> List[str]:
+    ambiente = os.getenv("HASHTAGS_TENDENCIA", "")
+    if ambiente.strip():
+        return sorted(
+            {h.strip().lstrip("#").lower() for h in ambiente.split(",")} - {""}
+        )
+
+    termos = tabela_termos(tabela)
+    termos.create(conn, checkfirst=True)
+    posts = sa.func.count().label("posts")
+    query = (
+        sa.select(termos.c.termo, posts)
+        .where(termos.c.tipo == HASHTAG)
+        .group_by(termos.c.termo)
+        .order_by(posts.desc(), termos.c.termo)
+        .limit(N_HASHTAGS_TENDENCIA)
+    )
+    return [linha.termo for linha in conn.execute(query)]
+
+
+ORIGEM_MANUAL = "definir_tendencias"
+
+
+def _origem_tendencias() -> str:
+    return "env:" + os.getenv("HASHTAGS_TENDENCIA", "").strip()
+
+
+def _tendencias(conn, tabela: str, meta: Dict[str, str]) -> List[str]:
+    """Conjunto gravado, ou o padrão se ainda não há um ou o .env mudou."""
+    origem = meta.get("origem_tendencias")
+    if "tendencias" in meta and origem in (None, ORIGEM_MANUAL, _origem_tendencias()):
+        return json.loads(meta["tendencias"])
+    return _tendencias_padrao(conn, tabela)
+
+
+def _preparar(conn, tabela: str) -> Set[str]:
+    """
+    Cria as tabelas e reconstrói as features gravadas com outra versão.
+    Retorna o conjunto de tendências.
+    """
+    tabela_features(tabela).create(conn, checkfirst=True)
+    tabela_meta(tabela).create(conn, checkfirst=True)
+    meta = _ler_meta(conn, tabela)
+    tendencias = _tendencias(conn, tabela, meta)
+
+    if meta.get("versao") != _versao():
+        _reconstruir(conn, tabela, tendencias)
+    elif "tendencias" not in meta or tendencias != json.loads(meta["tendencias"]):
+        # HASHTAGS_TENDENCIA mudou desde o último cálculo
+        _aplicar_tendencias(conn, tabela, tendencias, _origem_tendencias())
+    return set(tendencias)
+
+
+def _reconstruir(conn, tabela: str, tendencias: List[str]) -> int:
+    t = tabela_features(tabela)
+    conn.execute(sa.delete(t))
+    features = construir_features(
+        _ler_posts(conn, tabela_posts(tabela)), tendencias, JANELA_PERFIL
+    )
+    total = _gravar(conn, t, features)
+    _gravar_meta(
+        conn,
+        tabela,
+        versao=_versao(),
+        tendencias=json.dumps(tendencias),
+        origem_tendencias=_ler_meta(conn, tabela).get(
+            "origem_tendencias", _origem_tendencias()
+        ),
+    )
+    logger.info(f"Features reconstruídas: {total} posts.")
+    return total
+
+
+def _aplicar_tendencias(conn, tabela: str, tendencias: List[str], origem: str) -> int:
+    """Refaz só hashtag_tendencia, a partir da coluna `hashtags` já gravada."""
+    t = tabela_features(tabela)
+    df = pd.DataFrame(
+        conn.execute(sa.select(t.c.post_id, t.c.hashtags)).all(),
+        columns=["post_id", "hashtags"],
+    )
+    explodidas = df["hashtags"].fillna("").str.split().explode()
+    marcado = explodidas.isin(set(tendencias)).groupby(level=0).any().astype(int)
+    df["hashtag_tendencia"] = marcado
+
+    atualizacao = (
+        sa.update(t)
+        .where(t.c.post_id == sa.bindparam("b_post_id"))
+        .values(hashtag_tendencia=sa.bindparam("b_tendencia"))
+    )
+    registros = [
+        {"b_post_id": int(p), "b_tendencia": int(v)}
+        for p, v in zip(df["post_id"], df["hashtag_tendencia"])
+    ]
+    if registros:
+        conn.execute(atualizacao, registros)
+    _gravar_meta(
+        conn, tabela, tendencias=json.dumps(tendencias), origem_tendencias=origem
+    )
+    return len(registros)
+
+
+def atualizar_features(conn, post_ids: Iterable, tabela: str = "posts") -> int:
+    """
+    Recalcula, na conexão/transação dada, as features dos posts informados
+    (já gravados na tabela) cujas entradas mudaram, e dos JANELA_PERFIL posts
+    seguintes do mesmo perfil. Retorna o número de posts recalculados.
+    """
+    ids = [int(i) for i in pd.unique(pd.Series(list(post_ids)).dropna())]
+    if not ids:
+        return 0
+
+    posts = tabela_posts(tabela)
+    t = tabela_features(tabela)
+    tendencias = _preparar(conn, tabela)
+
+    partes = []
+    for i in range(0, len(ids), 500):
+        lote = ids[i : i + 500]
+        atuais = _ler_posts(conn, posts, posts.c.post_id.in_(lote))
+        gravados = dict(
+            conn.execute(
+                sa.select(t.c.post_id, t.c.hash_entrada).where(t.c.post_id.in_(lote))
+            ).all()
+        )
+        atuais = atuais[pd.to_datetime(atuais["datetime"]).notna()]
+        if atuais.empty:
+            continue
+        mudou = [
+            gravados.get(int(p)) != int(h)
+            for p, h in zip(atuais["post_id"], hash_entradas(atuais))
+        ]
+        if any(mudou):
+            partes.append(atuais[mudou])
+
+    mudados = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    if mudados.empty:
+        return 0
+
+    total = 0
+    mudados["datetime"] = pd.to_datetime(mudados["datetime"])
+    for perfil, grupo in mudados.groupby("profile", dropna=False):
+        do_perfil = (
+            posts.c.profile.is_(None) if pd.isna(perfil) else posts.c.profile == perfil
+        )
+        # Posts a partir do mais antigo alterado + a janela anterior a ele
+        desde = grupo["datetime"].min().to_pydatetime()
+        faixa = _ler_posts(conn, posts, do_perfil, posts.c.datetime >= desde)
+        contexto = _ler_posts(
+            conn,
+            posts,
+            do_perfil,
+            posts.c.datetime < desde,
+            ordem=[posts.c.datetime.desc(), posts.c.post_id.desc()],
+            limite=JANELA_PERFIL,
+        )
+        features = construir_features(
+            pd.concat([p for p in (contexto, faixa) if not p.empty], ignore_index=True),
+            tendencias,
+        )
+        # Um post alterado muda as médias dos JANELA_PERFIL posts seguintes
+        alterado = features["post_id"].isin(grupo["post_id"]).astype(int)
+        afetado = alterado.rolling(JANELA_PERFIL + 1, min_periods=1).max() > 0
+        total += _gravar(conn, t, features[afetado])
+    return total
+
+
+def reconstruir_features(db_path: str = SQLITE_DB, tabela: str = "posts") -> int:
+    """Recalcula as features do zero a partir de todos os posts."""
+    criar_schema(db_path, tabela)
+    with obter_engine(db_path).begin() as conn:
+        tabela_features(tabela).create(conn, checkfirst=True)
+        tabela_meta(tabela).create(conn, checkfirst=True)
+        tendencias = _tendencias(conn, tabela, _ler_meta(conn, tabela))
+        return _reconstruir(conn, tabela, tendencias)
+
+
+def definir_tendencias(
+    hashtags: Optional[Iterable[str]] = None,
+    db_path: str = SQLITE_DB,
+    tabela: str = "posts",
+) -> List[str]:
+    """
+    Troca o conjunto de hashtags em tendência (None = as mais usadas no
+    índice de termos agora) e atualiza hashtag_tendencia de todos os posts.
+    """
+    criar_schema(db_path, tabela)
+    with obter_engine(db_path).begin() as conn:
+        _preparar(conn, tabela)
+        if hashtags is None:
+            tendencias, origem = _tendencias_padrao(conn, tabela), _origem_tendencias()
+        else:
+            tendencias = sorted({h.lstrip("#").lower() for h in hashtags})
+            origem = ORIGEM_MANUAL
+        _aplicar_tendencias(conn, tabela, tendencias, origem)
+    return tendencias
+
+
+# -----------------------------------------------------------------------------
+# Consultas
+# -----------------------------------------------------------------------------
+def carregar_features(
+    db_path: str = SQLITE_DB,
+    profile: Optional[str] = None,
+    inicio=None,
+    fim=None,
+    colunas: Optional[List[str]] = None,
+    tabela: str = "posts",
+) -> pd.DataFrame:
+    """Features gravadas, com filtros de perfil e período aplicados no SQL."""
+    criar_schema(db_path, tabela)
+    engine = obter_engine(db_path)
+    with engine.begin() as conn:
+        _preparar(conn, tabela)
+
+    t = tabela_features(tabela)
+    query = sa.select(*[t.c[c] for c in colunas] if colunas else [t])
+    if profile is not None:
+        query = query.where(t.c.profile == profile)
+    if inicio is not None:
+        query = query.where(t.c.datetime >= pd.Timestamp(inicio).to_pydatetime())
+    if fim is not None:
+        query = query.where(t.c.datetime < pd.Timestamp(fim).to_pydatetime())
+    query = query.order_by(t.c.profile, t.c.datetime)
+
+    datas = ["datetime"] if not colunas or "datetime" in colunas else None
+    with engine.connect() as conn:
+        return pd.read_sql(query, conn, parse_dates=datas)
+
+
+def dataset_engajamento(
+    db_path: str = SQLITE_DB,
+    profile: Optional[str] = None,
+    inicio=None,
+    fim=None,
+    tabela: str = "posts",
+) -> pd.DataFrame:
+    """Colunas do modelo de engajamento (FEATURES + curtidas) lidas do store."""
+    from modules.otimizacao_engajamento import ALVO, FEATURES
+
+    df = carregar_features(
+        db_path, profile, inicio, fim, colunas=FEATURES + [ALVO], tabela=tabela
+    )
+    return df.dropna(subset=[ALVO]).reset_index(drop=True)
+
+
+def treinar_engajamento(
+    db_path: str = SQLITE_DB,
+    perfil: Optional[str] = None,
+    inicio=None,
+    fim=None,
+    tabela: str = "posts",
+    **kwargs,
+):
+    """prever_engajamento sobre as features do store (modelo do perfil, se dado)."""
+    from modules.otimizacao_engajamento import prever_engajamento
+
+    df = dataset_engajamento(db_path, perfil, inicio, fim, tabela)
+    return prever_engajamento(df, perfil=perfil, **kwargs)
+
+
+def prever_posts(
+    db_path: str = SQLITE_DB,
+    profile: Optional[str] = None,
+    inicio=None,
+    fim=None,
+    tabela: str = "posts",
+    registro=None,
+) -> pd.DataFrame:
+    """Features dos posts com a coluna curtidas_previstas (modelo de cada perfil)."""
+    from modules.otimizacao_engajamento import prever_em_lote
+
+    df = carregar_features(db_path, profile, inicio, fim, tabela=tabela)
+    if df.empty:
+        return df.assign(curtidas_previstas=pd.Series(dtype=float))
+    return df.assign(curtidas_previstas=prever_em_lote(df, registro))
@@ -1,6 +1,14 @@
 # modules/geracao_conteudo.py
 
-from transformers import pipeline
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _resumidor(modelo: str = "facebook/bart-large-cnn"):
+    # transformers (e o modelo) só são carregados na primeira chamada
+    from transformers import pipeline
+
+    return pipeline("summarization", model=modelo)
 
 
 def gerar_resumo(texto, max_lenght=60, min_lenght=20):
@@ -8,7 +16,7 @@ def gerar_resumo(texto, max_lenght=60, min_lenght=20):
     Gera resumo automático de um texto usando modelo BART da Hugging Face.
     """
 
-    resumidor = pipeline("summarization", model="facebook/bart-large-cnn")
+    resumidor = _resumidor()
     resumo = resumidor(
         texto, max_lenght=max_lenght, min_length=min_lenght, do_sample=False
     )
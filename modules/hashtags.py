@@ -0,0 +1,236 @@
+"""
+hashtags.py
+Extração vetorizada de hashtags e menções das legendas e índice invertido
+(termo -> posts) persistido no banco de posts.
+
+O índice é uma tabela `<tabela>_termos` com chave (tipo, termo, post_id) e
+as colunas `profile`/`datetime` desnormalizadas, de modo que perguntas como
+"top hashtags do perfil X nos últimos 30 dias" ou "todos os posts com #tag"
+são consultas por índice, sem varrer legendas com regex.
+
+O índice é mantido automaticamente por armazenamento_posts.upsert_posts.
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Optional
+
+import pandas as pd
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from modules.armazenamento_posts import (
+    SQLITE_DB,
+    _metadata,
+    consultar_posts,
+    criar_schema,
+    obter_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+# Não captura âncoras de URL (site.com/#x) nem e-mails (a@b.com)
+REGEX_HASHTAG = r"(?<![\w&/])#(\w+)"
+REGEX_MENCAO = r"(?<![\w.])@([A-Za-z0-9_](?:[A-Za-z0-9_.]*[A-Za-z0-9_])?)"
+
+HASHTAG = "#"
+MENCAO = "@"
+
+_tabelas_termos: Dict[str, sa.Table] = {}
+
+
+# -----------------------------------------------------------------------------
+# Extração
+# -----------------------------------------------------------------------------
+def extrair_hashtags(legendas: pd.Series) -> pd.Series:
+    """Lista de hashtags (minúsculas, sem '#') de cada legenda."""
+    return legendas.fillna("").astype(str).str.lower().str.findall(REGEX_HASHTAG)
+
+
+def extrair_mencoes(legendas: pd.Series) -> pd.Series:
+    """Lista de perfis mencionados (minúsculos, sem '@') de cada legenda."""
+    return legendas.fillna("").astype(str).str.lower().str.findall(REGEX_MENCAO)
+
+
+def explodir_termos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uma linha por (post, termo), extraída de `caption` com `str.extractall`.
+
+    Retorna as colunas: tipo, termo, post_id, profile, datetime.
+    """
+    colunas = ["tipo", "termo", "post_id", "profile", "datetime"]
+    if df is None or df.empty or "caption" not in df.columns:
+        return pd.DataFrame(columns=colunas)
+
+    base = pd.DataFrame(
+        {c: df[c] if c in df.columns else None for c in colunas[2:]}
+    ).reset_index(drop=True)
+    legendas = df["caption"].fillna("").astype(str).str.lower().reset_index(drop=True)
+
+    partes = []
+    for tipo, regex in ((HASHTAG, REGEX_HASHTAG), (MENCAO, REGEX_MENCAO)):
+        achados = legendas.str.extractall(regex)[0]
+        if achados.empty:
+            continue
+        parte = base.iloc[achados.index.get_level_values(0)].reset_index(drop=True)
+        parte.insert(0, "termo", achados.to_numpy())
+        parte.insert(0, "tipo", tipo)
+        partes.append(parte)
+
+    if not partes:
+        return pd.DataFrame(columns=colunas)
+
+    termos = pd.concat(partes, ignore_index=True)
+    return termos.drop_duplicates(["tipo", "termo", "post_id"])[colunas]
+
+
+# -----------------------------------------------------------------------------
+# Índice invertido
+# -----------------------------------------------------------------------------
+def tabela_termos(tabela: str = "posts") -> sa.Table:
+    nome = f"{tabela}_termos"
+    t = _tabelas_termos.get(nome)
+    if t is None:
+        t = sa.Table(
+            nome,
+            _metadata,
+            sa.Column("tipo", sa.String(1), primary_key=True),
+            sa.Column("termo", sa.String, primary_key=True),
+            sa.Column("post_id", sa.BigInteger, primary_key=True),
+            sa.Column("profile", sa.String),
+            sa.Column("datetime", sa.DateTime),
+            sa.Index(f"ix_{nome}_profile_tipo_datetime", "profile", "tipo", "datetime"),
+            sa.Index(f"ix_{nome}_post_id", "post_id"),
+        )
+        _tabelas_termos[nome] = t
+    return t
+
+
+def indexar_termos(conn, df: pd.DataFrame, tabela: str = "posts") -> int:
+    """
+    Atualiza o índice invertido dos posts de `df` na conexão/transação dada.
+
+    Os termos anteriores desses posts são removidos antes, pois a legenda
+    pode ter sido editada.
+    """
+    if df is None or df.empty or "caption" not in df.columns:
+        return 0
+
+    t = tabela_termos(tabela)
+    t.create(conn, checkfirst=True)
+
+    ids = [int(i) for i in df["post_id"].dropna().unique()]
+    for i in range(0, len(ids), 500):
+        conn.execute(sa.delete(t).where(t.c.post_id.in_(ids[i : i + 500])))
+
+    termos = explodir_termos(df)
+    if termos.empty:
+        return 0
+
+    termos["datetime"] = pd.to_datetime(termos["datetime"], errors="coerce")
+    termos = termos.astype(object)
+    registros = termos.where(termos.notna(), None).to_dict("records")
+    conn.execute(sqlite_insert(t).on_conflict_do_nothing(), registros)
+    return len(registros)
+
+
+def reindexar_termos(
+    db_path: str = SQLITE_DB, tabela: str = "posts", tamanho_lote: int = 5000
+) -> int:
+    """Reconstrói o índice a partir de todos os posts já armazenados."""
+    criar_schema(db_path, tabela)
+    df = consultar_posts(
+        db_path, colunas=["post_id", "profile", "datetime", "caption"], tabela=tabela
+    )
+
+    total = 0
+    with obter_engine(db_path).begin() as conn:
+        for i in range(0, len(df), tamanho_lote):
+            total += indexar_termos(conn, df.iloc[i : i + tamanho_lote], tabela)
+
+    logger.info(f"Índice de termos reconstruído: {total} entradas.")
+    return total
+
+
+# -----------------------------------------------------------------------------
+# Consultas
+# -----------------------------------------------------------------------------
+def _top_termos(
+    tipo: str,
+    db_path: str,
+    profile: Optional[str],
+    dias: Optional[int],
+    limite: int,
+    referencia,
+    tabela: str,
+) -> pd.DataFrame:
+    criar_schema(db_path, tabela)
+    t = tabela_termos(tabela)
+    engine = obter_engine(db_path)
+    t.create(engine, checkfirst=True)
+
+    posts = sa.func.count().label("posts")
+    query = sa.select(t.c.termo, posts).where(t.c.tipo == tipo)
+    if profile is not None:
+        query = query.where(t.c.profile == profile)
+    if dias is not None:
+        fim = pd.Timestamp(referencia) if referencia is not None else pd.Timestamp.now()
+        inicio = (fim - pd.Timedelta(days=dias)).to_pydatetime()
+        query = query.where(t.c.datetime >= inicio)
+
+    query = query.group_by(t.c.termo).order_by(posts.desc(), t.c.termo).limit(limite)
+
+    with engine.connect() as conn:
+        return pd.read_sql(query, conn)
+
+
+def top_hashtags(
+    profile: Optional[str] = None,
+    dias: Optional[int] = 30,
+    limite: int = 10,
+    db_path: str = SQLITE_DB,
+    referencia=None,
+    tabela: str = "posts",
+) -> pd.DataFrame:
+    """Hashtags mais usadas (colunas termo, posts) no período, por perfil."""
+    return _top_termos(HASHTAG, db_path, profile, dias, limite, referencia, tabela)
+
+
+def top_mencoes(
+    profile: Optional[str] = None,
+    dias: Optional[int] = 30,
+    limite: int = 10,
+    db_path: str = SQLITE_DB,
+    referencia=None,
+    tabela: str = "posts",
+) -> pd.DataFrame:
+    """Perfis mais mencionados (colunas termo, posts) no período."""
+    return _top_termos(MENCAO, db_path, profile, dias, limite, referencia, tabela)
+
+
+def posts_com_hashtag(
+    hashtag: str,
+    db_path: str = SQLITE_DB,
+    profile: Optional[str] = None,
+    tabela: str = "posts",
+) -> pd.DataFrame:
+    """Posts que usam a hashtag, via índice invertido (join pela chave)."""
+    posts = criar_schema(db_path, tabela)
+    t = tabela_termos(tabela)
+    engine = obter_engine(db_path)
+    t.create(engine, checkfirst=True)
+
+    query = (
+        sa.select(posts)
+        .join(t, t.c.post_id == posts.c.post_id)
+        .where(t.c.tipo == HASHTAG, t.c.termo == hashtag.lstrip("#").lower())
+        .order_by(posts.c.datetime.desc())
+    )
+    if profile is not None:
+        query = query.where(t.c.profile == profile)
+
+    with engine.connect() as conn:
+        return pd.read_sql(query, conn, parse_dates=["datetime"])
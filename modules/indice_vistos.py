@@ -0,0 +1,406 @@
+"""
+indice_vistos.py
+Índice persistente de posts já vistos, para deduplicar entre execuções.
+
+A chave de cada post é o media id (`post_id`). O shortcode do Instagram é o
+próprio media id em base64, então posts que só têm shortcode caem na mesma
+chave.
+
+Estrutura em disco (`INDICE_VISTOS_DIR`):
+- bloom.bin: filtro de Bloom (bits mapeados em memória com np.memmap).
+  Responde "não visto" em O(1) para a grande maioria das consultas
+- ids.npy:   media ids ordenados (uint64), abertos com mmap. É o fallback
+  exato para os positivos do filtro (busca binária)
+- meta.json: parâmetros do filtro
+
+Com 10 bits por post (1% de falsos positivos antes do fallback), 50 milhões
+de posts ocupam ~60 MB de filtro e ~400 MB de ids, e só as páginas tocadas
+são lidas. Os bits do filtro podem ficar à frente de ids.npy após uma
+interrupção; isso só gera falsos positivos, que o fallback exato corrige.
+
+Configuração via .env:
+    INDICE_VISTOS_DIR=data/indice_vistos
+    INDICE_VISTOS_CAPACIDADE=10000000      (posts até o filtro ser redimensionado)
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import math
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDICE_VISTOS_DIR = os.getenv("INDICE_VISTOS_DIR", "data/indice_vistos")
+INDICE_VISTOS_CAPACIDADE = int(os.getenv("INDICE_VISTOS_CAPACIDADE", "10000000"))
+
+_ALFABETO = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+_VALOR_B64 = {c: i for i, c in enumerate(_ALFABETO)}
+_MASCARA_64 = (1 << 64) - 1
+_TAMANHO_BLOCO = 1 << 18
+
+
+# -----------------------------------------------------------------------------
+# Chaves
+# -----------------------------------------------------------------------------
+def chave_post(post_id=None, shortcode: Optional[str] = None) -> Optional[int]:
+    """
+    Media id do post (int de 64 bits) a partir do post_id ou do shortcode.
+    Shortcodes fora do formato padrão recebem um hash estável de 64 bits.
+    """
+    if post_id is not None and not pd.isna(post_id):
+        return int(post_id) & _MASCARA_64
+    if not shortcode:
+        return None
+
+    if len(shortcode) <= 11 and all(c in _VALOR_B64 for c in shortcode):
+        valor = 0
+        for c in shortcode:
+            valor = valor * 64 + _VALOR_B64[c]
+        return valor & _MASCARA_64
+
+    resumo = hashlib.blake2b(shortcode.encode(), digest_size=8).digest()
+    return int.from_bytes(resumo, "big")
+
+
+def chaves_do_dataframe(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Chaves (uint64) das linhas de um DataFrame de posts, e máscara das
+    linhas que têm chave. Usa post_id e, na falta dele, o shortcode.
+    """
+    n = len(df)
+    chaves = np.zeros(n, dtype=np.uint64)
+    validas = np.zeros(n, dtype=bool)
+
+    if "post_id" in df.columns:
+        ids = pd.to_numeric(df["post_id"], errors="coerce")
+        validas = ids.notna().to_numpy()
+        chaves[validas] = ids[validas].to_numpy().astype(np.int64).view(np.uint64)
+
+    if "shortcode" in df.columns and not validas.all():
+        faltantes = np.flatnonzero(~validas)
+        shortcodes = df["shortcode"].to_numpy(dtype=object)[faltantes]
+        for i, sc in zip(faltantes, shortcodes):
+            chave = chave_post(shortcode=sc if isinstance(sc, str) else None)
+            if chave is not None:
+                chaves[i] = chave
+                validas[i] = True
+
+    return chaves, validas
+
+
+def _misturar(x: np.ndarray) -> np.ndarray:
+    """splitmix64 vetorizado (aritmética uint64 com overflow)."""
+    z = x + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _como_chaves(chaves) -> np.ndarray:
+    chaves = np.asarray(chaves).ravel()
+    if not len(chaves):
+        return np.empty(0, dtype=np.uint64)
+    # Floats perdem precisão em ids de 64 bits (ex.: int64 + uint64 -> float64)
+    if chaves.dtype.kind not in "iu":
+        raise TypeError(f"Chaves devem ser media ids inteiros, não {chaves.dtype}.")
+    return chaves.astype(np.uint64, copy=False)
+
+
+def parametros_bloom(capacidade: int, taxa_falsos: float) -> tuple:
+    """(bits, hashes) ótimos para `capacidade` itens e a taxa de falsos dada."""
+    capacidade = max(1, capacidade)
+    bits = math.ceil(-capacidade * math.log(taxa_falsos) / math.log(2) ** 2)
+    bits = max(64, (bits + 7) // 8 * 8)
+    hashes = max(1, round(bits / capacidade * math.log(2)))
+    return bits, hashes
+
+
+# -----------------------------------------------------------------------------
+# Índice
+# -----------------------------------------------------------------------------
+class IndiceVistos:
+    """
+    Conjunto persistente de media ids: filtro de Bloom + ids ordenados.
+
+    Uso:
+        with IndiceVistos() as indice:
+            novos = indice.filtrar_novos(df)     # descarta e marca
+            if post_id in indice: ...
+
+    Os posts adicionados ficam em memória até `salvar()` (chamado também
+    ao sair do `with`). Seguro para uso entre threads.
+    """
+
+    def __init__(
+        self,
+        diretorio: str = INDICE_VISTOS_DIR,
+        capacidade: int = INDICE_VISTOS_CAPACIDADE,
+        taxa_falsos: float = 0.01,
+    ):
+        self.diretorio = diretorio
+        self.taxa_falsos = taxa_falsos
+        self._lock = threading.RLock()
+        self._pendentes: List[np.ndarray] = []  # blocos ordenados, ainda não gravados
+        self.stats = {"consultas": 0, "descartados_bloom": 0, "fallbacks": 0}
+
+        os.makedirs(diretorio, exist_ok=True)
+        meta = self._ler_meta()
+        if meta is None:
+            self.bits, self.hashes = parametros_bloom(capacidade, taxa_falsos)
+            self.capacidade = capacidade
+        else:
+            self.bits, self.hashes = meta["bits"], meta["hashes"]
+            self.capacidade = meta["capacidade"]
+
+        self._ids = self._abrir_ids()
+        self._filtro = self._abrir_filtro(self._caminho("bloom.bin"), self.bits)
+        if meta is None:
+            self._gravar_meta()
+
+    # -------------------------------------------------------------------------
+    # Arquivos
+    # -------------------------------------------------------------------------
+    def _caminho(self, nome: str) -> str:
+        return os.path.join(self.diretorio, nome)
+
+    def _ler_meta(self) -> Optional[Dict]:
+        try:
+            with open(self._caminho("meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _gravar_meta(self) -> None:
+        meta = {
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "capacidade": self.capacidade,
+            "posts": len(self),
+        }
+        tmp = self._caminho("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._caminho("meta.json"))
+
+    def _abrir_ids(self) -> np.ndarray:
+        caminho = self._caminho("ids.npy")
+        if not os.path.exists(caminho):
+            return np.empty(0, dtype=np.uint64)
+        return np.load(caminho, mmap_mode="r")
+
+    @staticmethod
+    def _abrir_filtro(caminho: str, bits: int) -> np.memmap:
+        tamanho = bits // 8
+        if not os.path.exists(caminho) or os.path.getsize(caminho) != tamanho:
+            with open(caminho, "wb") as f:
+                f.truncate(tamanho)
+        return np.memmap(caminho, dtype=np.uint8, mode="r+", shape=(tamanho,))
+
+    # -------------------------------------------------------------------------
+    # Filtro de Bloom
+    # -------------------------------------------------------------------------
+    def _posicoes(self, chaves: np.ndarray, bits: int, hashes: int) -> np.ndarray:
+        # Hashing duplo: h1 + i*h2 (mod bits), matriz (n, hashes)
+        h1 = _misturar(chaves)
+        h2 = _misturar(chaves ^ np.uint64(0x5BD1E9955BD1E995)) | np.uint64(1)
+        i = np.arange(hashes, dtype=np.uint64)
+        return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(bits)
+
+    def _marcar_bits(self, filtro, chaves: np.ndarray, bits: int, hashes: int):
+        for inicio in range(0, len(chaves), _TAMANHO_BLOCO):
+            pos = self._posicoes(
+                chaves[inicio : inicio + _TAMANHO_BLOCO], bits, hashes
+            ).ravel()
+            mascaras = np.left_shift(1, (pos & np.uint64(7)).astype(np.uint8))
+            np.bitwise_or.at(filtro, (pos >> np.uint64(3)).astype(np.intp), mascaras)
+
+    def _talvez_contem(self, chaves: np.ndarray) -> np.ndarray:
+        partes = []
+        for inicio in range(0, len(chaves), _TAMANHO_BLOCO):
+            pos = self._posicoes(
+                chaves[inicio : inicio + _TAMANHO_BLOCO], self.bits, self.hashes
+            )
+            bytes_ = self._filtro[(pos >> np.uint64(3)).astype(np.intp)]
+            ligados = (bytes_ >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+            partes.append(ligados.all(axis=1))
+        return np.concatenate(partes) if partes else np.zeros(0, dtype=bool)
+
+    # -------------------------------------------------------------------------
+    # Consulta
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _em_ordenado(ordenado: np.ndarray, chaves: np.ndarray) -> np.ndarray:
+        if not len(ordenado):
+            return np.zeros(len(chaves), dtype=bool)
+        pos = np.searchsorted(ordenado, chaves)
+        dentro = pos < len(ordenado)
+        achados = np.zeros(len(chaves), dtype=bool)
+        achados[dentro] = ordenado[pos[dentro]] == chaves[dentro]
+        return achados
+
+    def _exato(self, chaves: np.ndarray) -> np.ndarray:
+        achados = self._em_ordenado(self._ids, chaves)
+        for bloco in self._pendentes:
+            achados |= self._em_ordenado(bloco, chaves)
+        return achados
+
+    def _anexar_pendentes(self, chaves: np.ndarray) -> None:
+        self._pendentes.append(np.sort(chaves))
+        # Poucos blocos mantêm o fallback exato barato
+        if len(self._pendentes) > 8:
+            self._pendentes = [np.sort(np.concatenate(self._pendentes))]
+
+    def contem_muitos(self, chaves) -> np.ndarray:
+        """Máscara booleana: quais chaves (media ids) já foram vistas."""
+        chaves = _como_chaves(chaves)
+        with self._lock:
+            talvez = self._talvez_contem(chaves)
+            vistos = np.zeros(len(chaves), dtype=bool)
+            candidatos = np.flatnonzero(talvez)
+            if len(candidatos):
+                vistos[candidatos] = self._exato(chaves[candidatos])
+
+            self.stats["consultas"] += len(chaves)
+            self.stats["descartados_bloom"] += len(chaves) - len(candidatos)
+            self.stats["fallbacks"] += len(candidatos)
+        return vistos
+
+    def contem(self, post_id=None, shortcode: Optional[str] = None) -> bool:
+        chave = chave_post(post_id, shortcode)
+        if chave is None:
+            return False
+        return bool(self.contem_muitos(np.array([chave], dtype=np.uint64))[0])
+
+    def __contains__(self, post_id) -> bool:
+        return self.contem(post_id=post_id)
+
+    def __len__(self) -> int:
+        return len(self._ids) + sum(len(bloco) for bloco in self._pendentes)
+
+    # -------------------------------------------------------------------------
+    # Inclusão
+    # -------------------------------------------------------------------------
+    def adicionar_muitos(self, chaves) -> np.ndarray:
+        """Marca as chaves como vistas; retorna a máscara das que eram novas."""
+        chaves = _como_chaves(chaves)
+        with self._lock:
+            primeira = ~pd.Series(chaves).duplicated().to_numpy()
+            novas = primeira & ~self.contem_muitos(chaves)
+            if novas.any():
+                self._marcar_bits(self._filtro, chaves[novas], self.bits, self.hashes)
+                self._anexar_pendentes(chaves[novas])
+        return novas
+
+    def adicionar(self, post_id=None, shortcode: Optional[str] = None) -> bool:
+        chave = chave_post(post_id, shortcode)
+        if chave is None:
+            return False
+        return bool(self.adicionar_muitos(np.array([chave], dtype=np.uint64))[0])
+
+    def filtrar_novos(self, df: pd.DataFrame, marcar: bool = True) -> pd.DataFrame:
+        """
+        Remove de `df` os posts já vistos e os repetidos dentro do próprio
+        lote. Com `marcar=True`, os posts restantes passam a contar como vistos.
+        Linhas sem post_id nem shortcode são mantidas.
+        """
+        if df is None or df.empty:
+            return df
+
+        chaves, validas = chaves_do_dataframe(df)
+        manter = ~validas
+        if validas.any():
+            if marcar:
+                novas = self.adicionar_muitos(chaves[validas])
+            else:
+                primeira = ~pd.Series(chaves[validas]).duplicated().to_numpy()
+                novas = primeira & ~self.contem_muitos(chaves[validas])
+            manter[validas] = novas
+
+        if manter.all():
+            return df
+        return df[manter]
+
+    # -------------------------------------------------------------------------
+    # Persistência
+    # -------------------------------------------------------------------------
+    def _redimensionar(self, capacidade: int) -> None:
+        bits, hashes = parametros_bloom(capacidade, self.taxa_falsos)
+        tmp = self._caminho("bloom.bin.tmp")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        filtro = self._abrir_filtro(tmp, bits)
+        ids = np.asarray(self._ids)
+        for inicio in range(0, len(ids), 4 * _TAMANHO_BLOCO):
+            self._marcar_bits(
+                filtro, ids[inicio : inicio + 4 * _TAMANHO_BLOCO], bits, hashes
+            )
+        filtro.flush()
+        del filtro
+
+        self._filtro = None
+        os.replace(tmp, self._caminho("bloom.bin"))
+        self.bits, self.hashes, self.capacidade = bits, hashes, capacidade
+        self._filtro = self._abrir_filtro(self._caminho("bloom.bin"), bits)
+        logger.info(f"Índice de vistos redimensionado para {capacidade} posts.")
+
+    def salvar(self) -> None:
+        """Grava os posts pendentes em ids.npy e sincroniza o filtro."""
+        with self._lock:
+            if self._pendentes:
+                # Pendentes nunca repetem ids gravados: basta juntar e ordenar
+                ids = np.concatenate([self._ids, *self._pendentes])
+                ids.sort()
+
+                tmp = self._caminho("ids.tmp.npy")
+                np.save(tmp, ids)
+                self._ids = ids
+                os.replace(tmp, self._caminho("ids.npy"))
+                self._ids = self._abrir_ids()
+                self._pendentes.clear()
+
+            if len(self) > self.capacidade:
+                capacidade = self.capacidade
+                while capacidade < len(self):
+                    capacidade *= 2
+                self._redimensionar(capacidade)
+
+            self._filtro.flush()
+            self._gravar_meta()
+
+    def estatisticas(self) -> Dict:
+        """Tamanho do índice e efetividade do filtro nas consultas feitas."""
+        with self._lock:
+            n = len(self)
+            # Taxa teórica de falsos positivos com n itens
+            taxa = (1 - math.exp(-self.hashes * n / self.bits)) ** self.hashes
+            return {
+                **self.stats,
+                "posts": n,
+                "pendentes": n - len(self._ids),
+                "filtro_mb": round(self.bits / 8 / 1024**2, 2),
+                "ids_mb": round(len(self._ids) * 8 / 1024**2, 2),
+                "taxa_falsos": round(taxa, 5),
+            }
+
+    def __enter__(self) -> "IndiceVistos":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.salvar()
+
+
+def abrir_indice(indice) -> Optional[IndiceVistos]:
+    """Aceita None, um diretório ou um IndiceVistos já aberto."""
+    if indice is None or isinstance(indice, IndiceVistos):
+        return indice
+    return IndiceVistos(str(indice))
@@ -0,0 +1,171 @@
+"""
+instagram_fake.py
+Backend local que imita o Instaloader para testes e benchmarks do coletor.
+
+Substitui `instaloader.Profile.from_username` por perfis sintéticos cujos
+posts são servidos em páginas, como o NodeIterator real, com:
+
+- latência configurável por página (e jitter)
+- tamanho de página configurável
+- taxa de erro (ConnectionException) por página
+- respeito ao LimitadorTaxa do coletor, quando informado
+
+Uso:
+    backend = BackendFake({"perfil_a": 1000}, latencia=0.005)
+    with backend.ativar():
+        df = coletar_posts_publicos("perfil_a", max_posts=None,
+                                    save_csv=False, loader=backend.loader())
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import zlib
+import random
+import datetime
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from unittest import mock
+
+import instaloader
+
+DATA_BASE = datetime.datetime(2025, 1, 1)
+
+
+class PostFake:
+    """Subconjunto dos atributos de instaloader.Post usados pelo coletor."""
+
+    __slots__ = (
+        "mediaid",
+        "shortcode",
+        "caption",
+        "date_utc",
+        "likes",
+        "comments",
+        "is_video",
+        "is_pinned",
+    )
+
+    def __init__(self, perfil: str, i: int, total: int):
+        # Posts do mais recente (i=0) para o mais antigo
+        self.mediaid = (zlib.crc32(perfil.encode()) % 10**6) * 10**9 + (total - i)
+        self.shortcode = f"{perfil[:4]}{total - i:07d}"
+        self.caption = f"Post {total - i} de @{perfil} #tag{i % 20} #ia"
+        self.date_utc = DATA_BASE + datetime.timedelta(hours=total - i)
+        self.likes = (i * 37) % 5000
+        self.comments = (i * 11) % 300
+        self.is_video = i % 5 == 0
+        self.is_pinned = False
+
+
+class ContextoFake:
+    def __init__(self, backend: "BackendFake", limitador=None):
+        self.backend = backend
+        self.limitador = limitador
+        self.is_logged_in = False
+
+
+class LoaderFake:
+    """Imita instaloader.Instaloader; apenas `context` é usado pelo coletor."""
+
+    def __init__(self, backend: "BackendFake", limitador=None):
+        self.context = ContextoFake(backend, limitador)
+
+    def download_post(self, post, target) -> bool:
+        self.context.backend._requisicao(self.context)
+        return True
+
+
+class PerfilFake:
+    def __init__(self, backend: "BackendFake", context: ContextoFake, username: str):
+        self.backend = backend
+        self.context = context
+        self.username = username
+        self.total = backend.perfis[username]
+
+    def get_posts(self) -> Iterator[PostFake]:
+        tamanho = self.backend.tamanho_pagina
+        for inicio in range(0, self.total, tamanho):
+            self.backend._requisicao(self.context)
+            fim = min(inicio + tamanho, self.total)
+            for i in range(inicio, fim):
+                yield PostFake(self.username, i, self.total)
+
+
+class BackendFake:
+    """
+    Conjunto de perfis sintéticos com latência, paginação e erros simulados.
+
+    Argumentos:
+        perfis: {username: número de posts}
+        latencia: segundos por requisição (perfil ou página)
+        jitter: variação aleatória máxima somada à latência
+        tamanho_pagina: posts por página (o Instagram usa 12)
+        taxa_erro: probabilidade de uma requisição falhar
+    """
+
+    def __init__(
+        self,
+        perfis: Dict[str, int],
+        latencia: float = 0.0,
+        jitter: float = 0.0,
+        tamanho_pagina: int = 12,
+        taxa_erro: float = 0.0,
+        seed: Optional[int] = 42,
+    ):
+        self.perfis = dict(perfis)
+        self.latencia = latencia
+        self.jitter = jitter
+        self.tamanho_pagina = max(1, tamanho_pagina)
+        self.taxa_erro = taxa_erro
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.latencias: List[float] = []
+        self.requisicoes = 0
+        self.erros = 0
+
+    def _requisicao(self, context: ContextoFake) -> None:
+        inicio = time.perf_counter()
+        if context.limitador is not None:
+            context.limitador.aguardar()
+
+        with self._lock:
+            self.requisicoes += 1
+            espera = self.latencia + self._rng.uniform(0, self.jitter)
+            falhou = self._rng.random() < self.taxa_erro
+            if falhou:
+                self.erros += 1
+
+        if espera:
+            time.sleep(espera)
+
+        with self._lock:
+            self.latencias.append(time.perf_counter() - inicio)
+
+        if falhou:
+            raise instaloader.exceptions.ConnectionException("Erro simulado")
+
+    def loader(self, limitador=None) -> LoaderFake:
+        return LoaderFake(self, limitador)
+
+    def from_username(self, context, username: str) -> PerfilFake:
+        if username not in self.perfis:
+            raise instaloader.exceptions.ProfileNotExistsException(
+                f"Perfil {username} não existe."
+            )
+        if not isinstance(context, ContextoFake):
+            context = ContextoFake(self)
+        self._requisicao(context)
+        return PerfilFake(self, context, username)
+
+    @contextmanager
+    def ativar(self):
+        """Redireciona `instaloader.Profile.from_username` para este backend."""
+        with mock.patch.object(
+            instaloader.Profile, "from_username", side_effect=self.from_username
+        ):
+            yield self
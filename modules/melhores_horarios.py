@@ -0,0 +1,126 @@
+"""
+melhores_horarios.py
+Tabelas pré-calculadas de melhores horários de postagem.
+
+Para cada modelo de engajamento gravado no registro (global ou por perfil),
+a grade completa hora_postagem x dia_semana x hashtag_tendencia é pontuada
+uma única vez, com prever_em_lote, e guardada em Parquet ao lado do modelo:
+
+    <MODELOS_DIR>/<nome do modelo>/<chave>.horarios.parquet
+
+Responder "quando o perfil X deve postar?" é então uma consulta a essa
+tabela (mantida também em memória), sem chamar o modelo. Quando um modelo
+novo é gravado, a chave muda e a tabela é recalculada no próximo acesso.
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from modules.otimizacao_engajamento import (
+    FEATURES,
+    NOME_MODELO,
+    carregar_modelo_engajamento,
+    grade_candidatos,
+    nome_modelo,
+    prever_em_lote,
+)
+from modules.registro_modelos import RegistroModelos, registro_padrao
+
+logger = logging.getLogger(__name__)
+
+DIAS_SEMANA = ["seg", "ter", "qua", "qui", "sex", "sáb", "dom"]
+
+# (diretorio do registro, perfil) -> (versões dos modelos, tabela)
+_tabelas: Dict[Tuple[str, Optional[str]], Tuple[tuple, pd.DataFrame]] = {}
+_lock = threading.Lock()
+
+
+def _versoes(registro: RegistroModelos, perfil: Optional[str]) -> tuple:
+    versao_perfil = registro.versao(nome_modelo(perfil)) if perfil else None
+    return versao_perfil, registro.versao(NOME_MODELO)
+
+
+def calcular_tabela(modelo) -> pd.DataFrame:
+    """Pontua a grade inteira e ordena do melhor para o pior horário."""
+    grade = grade_candidatos()
+    grade["curtidas_previstas"] = modelo.predict(grade[FEATURES])
+    grade["posicao"] = (
+        grade.groupby("hashtag_tendencia")["curtidas_previstas"]
+        .rank(method="first", ascending=False)
+        .astype("int16")
+    )
+    return grade.sort_values(["hashtag_tendencia", "posicao"], ignore_index=True)
+
+
+def tabela_horarios(
+    perfil: Optional[str] = None, registro: RegistroModelos = None
+) -> pd.DataFrame:
+    """
+    Tabela de horários do perfil (modelo do perfil ou, na falta dele, o
+    global). Lida da memória, do Parquet gravado ou calculada e gravada.
+    """
+    registro = registro or registro_padrao()
+    chave_cache = (os.path.abspath(registro.diretorio), perfil)
+    versoes = _versoes(registro, perfil)
+
+    with _lock:
+        em_cache = _tabelas.get(chave_cache)
+    if em_cache is not None and em_cache[0] == versoes:
+        return em_cache[1]
+
+    modelo, meta = carregar_modelo_engajamento(registro, perfil)
+    caminho = registro.caminho_artefato(meta["nome"], meta["chave"], "horarios.parquet")
+    if os.path.exists(caminho):
+        tabela = pd.read_parquet(caminho)
+    else:
+        tabela = calcular_tabela(modelo)
+        tabela.to_parquet(caminho + ".tmp", index=False)
+        os.replace(caminho + ".tmp", caminho)
+        logger.info(f"Tabela de horários calculada para o modelo {meta['chave']}.")
+
+    with _lock:
+        # Gravar a tabela altera o diretório do modelo: relê as versões
+        _tabelas[chave_cache] = (_versoes(registro, perfil), tabela)
+    return tabela
+
+
+def melhores_horarios(
+    perfil: Optional[str] = None,
+    n: int = 3,
+    hashtag_tendencia: Optional[int] = None,
+    registro: RegistroModelos = None,
+) -> pd.DataFrame:
+    """
+    Os `n` melhores horários (dia da semana + hora) para o perfil postar,
+    com as curtidas previstas. `hashtag_tendencia` filtra a grade (0/1).
+    """
+    tabela = tabela_horarios(perfil, registro)
+    if hashtag_tendencia is not None:
+        tabela = tabela[tabela["hashtag_tendencia"] == hashtag_tendencia]
+    else:
+        tabela = tabela.sort_values("curtidas_previstas", ascending=False)
+
+    melhores = tabela.head(n).reset_index(drop=True)
+    return melhores.assign(dia=[DIAS_SEMANA[d] for d in melhores["dia_semana"]])
+
+
+def atualizar_tabelas(
+    perfis: Iterable[Optional[str]] = (None,), registro: RegistroModelos = None
+) -> Dict[Optional[str], int]:
+    """Pré-calcula as tabelas dos perfis (ex.: após um novo treino)."""
+    return {perfil: len(tabela_horarios(perfil, registro)) for perfil in perfis}
+
+
+def pontuar_grade(perfis: Iterable[str], registro: RegistroModelos = None):
+    """Grade completa por perfil com as curtidas previstas (uma chamada por modelo)."""
+    grade = grade_candidatos(perfis)
+    grade["curtidas_previstas"] = prever_em_lote(grade, registro)
+    return grade
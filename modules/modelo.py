@@ -1,26 +1,147 @@
 """
 Módulo: modelo.py
-Funções responsáveis por transformar os dados brutos coletados (por exemplo, do Instagram)
-em DataFrames prontos para análise e visualização.
+Funções responsáveis por transformar os dados brutos coletados (por exemplo,
+do Instagram) em DataFrames prontos para análise e visualização.
 
 Autor: Leonardo França.
 Data: 2025-11-09
 """
 
+import os
+import sys
+from typing import Iterable, Iterator
+
 import pandas as pd
 
+COLUNAS_POSTS = ["shortcode", "post_date", "likes", "comments"]
+
+# Nome de post_date nos dados do coletor (coleta_instagram, PostBatch)
+COLUNA_DATA_COLETOR = "datetime"
+
+
+def _vazio() -> pd.DataFrame:
+    return pd.DataFrame(columns=COLUNAS_POSTS)
+
+
+def _eh_tabela_arrow(obj) -> bool:
+    # Evita importar pyarrow só para o isinstance
+    return type(obj).__module__.startswith("pyarrow") and hasattr(obj, "to_pandas")
+
+
+def _eh_lista_de_registros(obj) -> bool:
+    return isinstance(obj, list) and all(isinstance(r, dict) for r in obj)
+
+
+def _como_lote(obj):
+    """PostBatch a partir de um PostBatch ou de uma lista de Post; senão None."""
+    # Se modules.posts não foi importado, obj não pode ser um Post/PostBatch
+    posts = sys.modules.get("modules.posts")
+    if posts is None:
+        return None
+    if isinstance(obj, posts.PostBatch):
+        return obj
+    if isinstance(obj, list) and obj and all(isinstance(p, posts.Post) for p in obj):
+        return posts.PostBatch.de_posts(obj)
+    return None
+
+
+def _colunas_lidas(nomes) -> list:
+    """Colunas esperadas em `nomes`; `datetime` entra no lugar de `post_date`."""
+    presentes = [c for c in COLUNAS_POSTS if c in nomes]
+    if "post_date" not in presentes and COLUNA_DATA_COLETOR in nomes:
+        presentes.append(COLUNA_DATA_COLETOR)
+    return presentes
+
+
+def _para_dataframe(dados) -> pd.DataFrame:
+    """
+    Converte um bloco (registros, DataFrame, tabela Arrow ou PostBatch)
+    projetando só as colunas esperadas.
+    """
+    lote = _como_lote(dados)
+    if lote is not None:
+        return pd.DataFrame(
+            {
+                "shortcode": lote.shortcode.to_pandas(),
+                "post_date": lote.datetime,
+                "likes": pd.arrays.IntegerArray(lote.likes, lote.likes_nulo),
+                "comments": pd.arrays.IntegerArray(lote.comments, lote.comments_nulo),
+            }
+        )
+
+    if isinstance(dados, pd.DataFrame):
+        presentes = {
+            "post_date" if c == COLUNA_DATA_COLETOR else c: dados[c]
+            for c in _colunas_lidas(dados.columns)
+        }
+        return pd.DataFrame(presentes, index=dados.index, copy=False)
+
+    if _eh_tabela_arrow(dados):
+        presentes = _colunas_lidas(dados.schema.names)
+        df = dados.select(presentes).to_pandas()
+        return df.rename(columns={COLUNA_DATA_COLETOR: "post_date"})
+
+    return _para_dataframe(pd.DataFrame.from_records(dados))
+
+
+def _converter_datas(valores: pd.Series) -> pd.Series:
+    """Datas ISO 8601; as que falham são relidas em formato livre (03/11/2025)."""
+    datas = pd.to_datetime(valores, errors="coerce", format="ISO8601")
+    falharam = datas.isna() & valores.notna()
+    if not falharam.any():
+        return datas
+
+    datas.loc[falharam] = pd.to_datetime(
+        valores[falharam], errors="coerce", format="mixed", dayfirst=True
+    )
+    invalidas = int((datas.isna() & valores.notna()).sum())
+    if invalidas:
+        print(f"[AVISO] {invalidas} datas inválidas em post_date substituídas por NaT.")
+    return datas
+
+
+def _normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza um bloco já projetado, coluna a coluna e sem cópias extras."""
+    ausente = pd.Series(None, index=df.index, dtype=object)
+    brutas = {c: df[c] if c in df.columns else ausente for c in COLUNAS_POSTS}
+
+    # --- Linhas totalmente vazias são detectadas nos valores brutos, para
+    # que valores inválidos (ex.: likes="cem") não esvaziem a linha ---
+    vazias = pd.DataFrame(brutas, index=df.index, copy=False).isna().all(axis=1)
+
+    # --- Converte tipos de dados ---
+    df = pd.DataFrame(
+        {
+            "shortcode": brutas["shortcode"],
+            "post_date": _converter_datas(brutas["post_date"]),
+            "likes": pd.to_numeric(brutas["likes"], errors="coerce"),
+            "comments": pd.to_numeric(brutas["comments"], errors="coerce"),
+        },
+        index=df.index,
+        copy=False,
+    )
+
+    # --- Remove linhas totalmente vazias ---
+    if vazias.any():
+        df = df.loc[~vazias.to_numpy()]
+
+    return df
+
 
 def criar_dataframe_posts(dados_brutos):
     """
-    Cria um DataFrame do pandas a partir de uma lista de dicionários com informações de posts.
+    Cria um DataFrame do pandas a partir dos posts brutos.
 
     Parâmetros:
     -----------
-    dados_brutos: list[dict]
-        Lista contendo dicionários com informações dos posts.
+    dados_brutos: list[dict] | pd.DataFrame | pyarrow.Table | PostBatch | Iterable
+        Lista de dicionários, DataFrame, tabela Arrow, PostBatch (ou lista
+        de Post, ver modules/posts.py) ou um iterável de blocos desses tipos
+        (ex.: chunks de `pd.read_csv`). Sem a coluna `post_date` (PostBatch,
+        dados do coletor), a data vem da coluna `datetime`.
         {
             "shortcode": str,
-            "post_date": str (YYYY-MM-DD),
+            "post_date": str (YYYY-MM-DD; também DD/MM/YYYY e outros formatos),
             "likes": int,
             "comments": int
         }
@@ -34,35 +155,94 @@ def criar_dataframe_posts(dados_brutos):
     Tratamentos:
     ------------
     - Remove linhas totalmente vazias.
-    - Substitui valores inválidos ou ausentes por None.
-    - Converte colunas numéricas corretamente.
+    - Substitui valores inválidos ou ausentes por None/NaN/NaT.
+    - Converte colunas numéricas e a data (`post_date`) de forma vetorizada.
     """
 
     # --- Validação inicial ---
-    if not dados_brutos or not isinstance(dados_brutos, list):
+    if dados_brutos is None or isinstance(dados_brutos, (str, bytes, dict)):
         print("[AVISO] Nenhum dado válido recebido.")
-        return pd.DataFrame(columns=["shortcode", "post_date", "likes", "comments"])
+        return _vazio()
 
-    # --- Criação inicial do DataFrame ---
-    df = pd.DataFrame(dados_brutos)
+    lote = _como_lote(dados_brutos)
+    if lote is not None:
+        dados_brutos = lote
 
-    # --- Normaliza as colunas esperadas ---
-    colunas_esperadas = ["shortcode", "post_date", "likes", "comments"]
-    for col in colunas_esperadas:
-        if col not in df.columns:
-            df[col] = None  # Cria colunas faltantes
+    if (
+        isinstance(dados_brutos, pd.DataFrame)
+        or _eh_tabela_arrow(dados_brutos)
+        or lote is not None
+    ):
+        if len(dados_brutos) == 0:
+            print("[AVISO] Nenhum dado válido recebido.")
+            return _vazio()
+        return _normalizar(_para_dataframe(dados_brutos))
 
-    # --- Converte tipos de dados ---
-    df["likes"] = pd.to_numeric(df["likes"], errors="coerce")
-    df["comments"] = pd.to_numeric(df["comments"], errors="coerce")
+    if _eh_lista_de_registros(dados_brutos):
+        if not dados_brutos:
+            print("[AVISO] Nenhum dado válido recebido.")
+            return _vazio()
+        return _normalizar(_para_dataframe(dados_brutos))
 
-    # --- Remove linhas totalmente vazias ---
-    df = df.dropna(how="all")
+    if not isinstance(dados_brutos, Iterable):
+        print("[AVISO] Nenhum dado válido recebido.")
+        return _vazio()
 
-    # --- Garante ordem correta das colunas ---
-    df = df[colunas_esperadas]
+    # --- Iterável de blocos ---
+    blocos = list(criar_dataframe_posts_em_chunks(dados_brutos))
+    if not blocos:
+        print("[AVISO] Nenhum dado válido recebido.")
+        return _vazio()
+    return pd.concat(blocos, ignore_index=True)
 
-    return df
+
+def criar_dataframe_posts_em_chunks(
+    fonte, tamanho_chunk: int = 100_000
+) -> Iterator[pd.DataFrame]:
+    """
+    Versão em blocos de `criar_dataframe_posts`, para entradas maiores que a memória.
+
+    Parâmetros:
+    -----------
+    fonte: str | Iterable
+        Caminho de um CSV (lido em blocos de `tamanho_chunk` linhas), de um
+        arquivo/diretório Parquet (lido por row groups, só com as colunas
+        esperadas) ou um iterável de blocos (list[dict], DataFrame, tabela
+        ou RecordBatch do Arrow, PostBatch).
+
+    Retorno:
+    --------
+    Iterator[pd.DataFrame]
+        Um DataFrame normalizado por bloco; blocos vazios são omitidos.
+    """
+    if isinstance(fonte, (str, os.PathLike)):
+        fonte = _blocos_do_arquivo(os.fspath(fonte), tamanho_chunk)
+
+    for bloco in fonte:
+        if bloco is None or len(bloco) == 0:
+            continue
+        df = _normalizar(_para_dataframe(bloco))
+        if not df.empty:
+            yield df
+
+
+def _blocos_do_arquivo(caminho: str, tamanho_chunk: int) -> Iterator:
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+
+    if os.path.isdir(caminho) or caminho.endswith(".parquet"):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(caminho, format="parquet")
+        colunas = _colunas_lidas(dataset.schema.names)
+        yield from dataset.to_batches(columns=colunas, batch_size=tamanho_chunk)
+        return
+
+    yield from pd.read_csv(
+        caminho,
+        usecols=lambda c: c in COLUNAS_POSTS or c == COLUNA_DATA_COLETOR,
+        chunksize=tamanho_chunk,
+    )
 
 
 # ---------------------------------------------------
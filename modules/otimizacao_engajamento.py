@@ -1,59 +1,227 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import r2_score
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import logging
 
+from modules.registro_modelos import RegistroModelos, hash_dados, registro_padrao
 
-def prever_engajamento(df, plot=False):
+logger = logging.getLogger(__name__)
+
+NOME_MODELO = "engajamento"
+FEATURES = ["hora_postagem", "dia_semana", "hashtag_tendencia"]
+ALVO = "curtidas"
+
+# Linhas de teste guardadas com cada modelo para validar as atualizações
+TAMANHO_VALIDACAO = 1000
+
+# Domínio de cada feature, usado para montar a grade de candidatos
+VALORES_FEATURES = {
+    "hora_postagem": range(24),
+    "dia_semana": range(7),
+    "hashtag_tendencia": (0, 1),
+}
+
+
+def detectar_dia_inicial(dias) -> int:
+    """
+    Convenção de `dia_semana` dos dados: 0 (0-6, 0 = segunda) se houver 0,
+    1 (1-7, 1 = segunda, como data/posts_exemplo.csv) se houver 7. Sem
+    nenhum dos dois (ex.: um lote pequeno sem segundas nem domingos) a
+    convenção é ambígua e levanta ValueError: informe `dia_inicial`.
+    """
+    tem_0, tem_7 = bool((dias == 0).any()), bool((dias == 7).any())
+    if tem_0 != tem_7:
+        return 0 if tem_0 else 1
+    encontrados = sorted(dias.unique().tolist())
+    if tem_0:
+        raise ValueError(f"dia_semana mistura 0-6 e 1-7: {encontrados}")
+    raise ValueError(
+        f"Convenção de dia_semana ambígua (sem 0 nem 7): {encontrados}; "
+        "informe dia_inicial=0 (0-6) ou dia_inicial=1 (1-7)."
+    )
+
+
+def normalizar_dia_semana(df, dia_inicial: int = None):
+    """
+    Converte `dia_semana` da convenção `dia_inicial` (0 ou 1; None = detectar)
+    para 0-6 (0 = segunda), o domínio da grade de candidatos e de
+    DIAS_SEMANA. Levanta ValueError para valores fora da convenção.
+    """
+    dias = df["dia_semana"]
+    if dia_inicial is None:
+        dia_inicial = detectar_dia_inicial(dias)
+    if dia_inicial not in (0, 1):
+        raise ValueError(f"dia_inicial deve ser 0 ou 1, não {dia_inicial!r}")
+    if not dias.between(dia_inicial, dia_inicial + 6).all():
+        raise ValueError(
+            f"dia_semana fora de {dia_inicial}-{dia_inicial + 6}: "
+            f"{sorted(dias.unique().tolist())}"
+        )
+    return df.assign(dia_semana=dias - dia_inicial) if dia_inicial else df
+
+
+def nome_modelo(perfil=None) -> str:
+    """Nome no registro: um modelo global ou um por perfil."""
+    return NOME_MODELO if perfil is None else f"{NOME_MODELO}__{perfil}"
+
+
+def _caminho_validacao(registro: RegistroModelos, nome: str, chave: str) -> str:
+    return registro.caminho_artefato(nome, chave, "validacao.parquet")
+
+
+def _gravar_validacao(registro, nome, chave, validacao) -> None:
+    """
+    Guarda, ao lado do modelo, as linhas de validação: posts recentes que
+    nenhum treino do modelo viu (no treino completo, os mais recentes do
+    conjunto de teste; nas atualizações, os mesmos do modelo base).
+    """
+    caminho = _caminho_validacao(registro, nome, chave)
+    if validacao is None or os.path.exists(caminho):
+        return
+    validacao.to_parquet(caminho + ".tmp", index=False)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def _ler_validacao(registro, nome, chave):
+    import pandas as pd
+
+    caminho = _caminho_validacao(registro, nome, chave)
+    return pd.read_parquet(caminho) if os.path.exists(caminho) else None
+
+
+def _r2(modelo, dados):
+    """R² de `modelo` em `dados`; None com menos de 2 linhas (R² indefinido)."""
+    import math
+
+    from sklearn.metrics import r2_score
+
+    if dados is None or len(dados) < 2:
+        return None
+    r2 = float(r2_score(dados[ALVO], modelo.predict(dados[FEATURES])))
+    return r2 if math.isfinite(r2) else None
+
+
+def prever_engajamento(
+    df,
+    plot=False,
+    registro: RegistroModelos = None,
+    retreinar: bool = False,
+    perfil=None,
+    ajustar: bool = False,
+    opcoes_busca: dict = None,
+    dia_inicial: int = None,
+):
     """
     Recebe um Dataframe com colunas:
     hora_postagem, dia_semana, hastag_tendencia, curtidas
     e retorna um modelo treinado e a acurácia (R²) sobre os dados de teste.
 
+    O modelo é gravado no registro de modelos (registro_modelos.py). Se os
+    mesmos dados já foram usados em um treino anterior, o modelo gravado é
+    reaproveitado em vez de treinado de novo.
+
     Argumentos:
         df: pd.DataFrame - dados de entrada
         plot: bool - se True, exibe gráfico de previsão
+        registro: RegistroModelos - padrão: registro_padrao()
+        retreinar: bool - se True, ignora o modelo gravado
+        perfil: str - grava como modelo do perfil em vez do modelo global
+        ajustar: bool - se True, escolhe modelo e hiperparâmetros com
+            busca_hiperparametros.buscar nos dados de treino
+        opcoes_busca: dict - argumentos extras de buscar (modo, orcamento_s...)
+        dia_inicial: int - convenção de dia_semana da fonte: 0 (0-6) ou 1
+            (1-7), com a segunda no primeiro valor; None detecta pelos
+            dados. Fica nos metadados e vale para as atualizações do modelo
     Retorna:
-        modelo: RandomForestRegressor treinado
+        modelo: RandomForestRegressor treinado (ou o melhor da busca)
         r2 float - R² do modelo nos dados de teste
     """
 
+    # sklearn só é importado quando o estágio de modelo roda
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import r2_score
+
     # Verifica se todas as colunas necessárias estão presentes:
-    colunas_necessarias = [
-        "hora_postagem",
-        "dia_semana",
-        "hashtag_tendencia",
-        "curtidas",
-    ]
+    colunas_necessarias = FEATURES + [ALVO]
     for col in colunas_necessarias:
         if col not in df.columns:
             raise ValueError(f"Coluna '{col}' não encontrada no DataFrame")
+    if dia_inicial is None:
+        dia_inicial = detectar_dia_inicial(df["dia_semana"])
+    df = normalizar_dia_semana(df, dia_inicial)
 
     # Features e Target:
 
-    X = df[["hora_postagem", "dia_semana", "hashtag_tendencia"]]
-    y = df["curtidas"]
+    X = df[FEATURES]
+    y = df[ALVO]
 
     # Separação Treino/ Teste:
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.3, random_state=42
     )
 
-    # Treinamento do Modelo:
-    modelo = RandomForestRegressor(random_state=42)
-    modelo.fit(X_train, y_train)
+    opcoes_busca = dict(opcoes_busca or {})
+    if ajustar:
+        # O modelo sai da busca; a chave leva a configuração da busca
+        modelo = None
+        params = {
+            "busca": {
+                k: v for k, v in opcoes_busca.items() if k not in ("cache", "n_jobs")
+            }
+        }
+    else:
+        modelo = RandomForestRegressor(random_state=42)
+        params = modelo.get_params()
 
-    # Previão:
-    y_pred = modelo.predict(X_test)
+    # Modelo já treinado com os mesmos dados e parâmetros?
+    registro = registro or registro_padrao()
+    hash_treino = hash_dados(X, y)
+    params = {**params, "test_size": 0.3, "random_state_split": 42}
+    chave = registro.chave(hash_treino, FEATURES, params)
 
-    # Cálculo do R² :
-    r2 = r2_score(y_test, y_pred)
+    nome = nome_modelo(perfil)
+
+    if not retreinar and registro.existe(nome, chave):
+        modelo, meta = registro.carregar(nome, chave)
+        r2 = meta["r2"]
+        y_pred = modelo.predict(X_test) if plot else None
+    else:
+        extras = {}
+        if ajustar:
+            from modules.busca_hiperparametros import buscar
+
+            busca = buscar(X_train, y_train, **opcoes_busca)
+            modelo = busca.criar_estimador()
+            extras["busca"] = busca.resumo()
+
+        # Treinamento do Modelo:
+        modelo.fit(X_train, y_train)
+
+        # Previão:
+        y_pred = modelo.predict(X_test)
+
+        # Cálculo do R² :
+        r2 = r2_score(y_test, y_pred)
+
+        registro.salvar(
+            nome,
+            chave,
+            modelo,
+            features=FEATURES,
+            alvo=ALVO,
+            r2=r2,
+            hash_dados=hash_treino,
+            n_amostras=len(df),
+            dia_semana_inicial=dia_inicial,
+            **extras,
+        )
+    recentes = X_test.assign(**{ALVO: y_test}).sort_index().tail(TAMANHO_VALIDACAO)
+    _gravar_validacao(registro, nome, chave, recentes)
 
     # Plotagem Opcional ( exibição do gráfico se = True)/ Gráfico moderno para visualização:
     if plot:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         sns.set(style="whitegrid", context="talk", palette="rocket")
         plt.figure(figsize=(8, 6))
         plt.scatter(
@@ -86,8 +254,217 @@ def prever_engajamento(df, plot=False):
     return modelo, r2
 
 
+def carregar_modelo_engajamento(registro: RegistroModelos = None, perfil=None):
+    """
+    (modelo, metadados) do modelo de engajamento mais recente do registro,
+    sem treinar. Com `perfil`, usa o modelo do perfil se existir e o global
+    caso contrário. Levanta FileNotFoundError se nenhum foi treinado ainda.
+    """
+    registro = registro or registro_padrao()
+    if perfil is not None and registro.mais_recente(nome_modelo(perfil)):
+        return registro.carregar(nome_modelo(perfil))
+    return registro.carregar(NOME_MODELO)
+
+
+def grade_candidatos(perfis=None, **valores):
+    """
+    Todas as combinações de hora_postagem x dia_semana x hashtag_tendencia
+    (por perfil, se `perfis` for dado), montadas de forma vetorizada.
+    `valores` restringe o domínio de uma feature (ex.: hashtag_tendencia=[1]).
+    """
+    import numpy as np
+    import pandas as pd
+
+    dominios = [np.asarray(list(valores.get(f, VALORES_FEATURES[f]))) for f in FEATURES]
+    malha = np.meshgrid(*dominios, indexing="ij")
+    grade = pd.DataFrame({f: m.ravel() for f, m in zip(FEATURES, malha)})
+
+    if perfis is None:
+        return grade
+    perfis = list(perfis)
+    n = len(grade)
+    grade = grade.iloc[np.tile(np.arange(n), len(perfis))].reset_index(drop=True)
+    grade.insert(0, "profile", np.repeat(perfis, n))
+    return grade
+
+
+def prever_em_lote(df, registro: RegistroModelos = None, tamanho_lote: int = 1_000_000):
+    """
+    Curtidas previstas para todas as linhas de `df` (ex.: grade_candidatos).
+
+    Cada modelo é carregado uma vez e aplicado em blocos de `tamanho_lote`
+    linhas, cada um em uma única chamada vetorizada de `predict`. Se `df`
+    tiver a coluna `profile`, cada perfil usa o seu modelo (ou o global), e
+    os perfis que compartilham o mesmo modelo são pontuados juntos.
+    """
+    import numpy as np
+    import pandas as pd
+
+    registro = registro or registro_padrao()
+    previstas = np.empty(len(df), dtype=float)
+
+    # Linhas agrupadas pelo modelo que as pontua
+    por_modelo = {}
+    if "profile" in df.columns:
+        # Linhas sem perfil usam o modelo global
+        grupos = df.groupby("profile", sort=False, dropna=False).indices
+        for perfil, idx in grupos.items():
+            perfil = None if pd.isna(perfil) else perfil
+            modelo, meta = carregar_modelo_engajamento(registro, perfil)
+            por_modelo.setdefault(meta["chave"], (modelo, meta, []))[2].append(idx)
+    else:
+        modelo, meta = carregar_modelo_engajamento(registro)
+        por_modelo[meta["chave"]] = (modelo, meta, [np.arange(len(df))])
+
+    for modelo, meta, indices in por_modelo.values():
+        idx = np.concatenate(indices)
+        X = df[meta["features"]]
+        for inicio in range(0, len(idx), tamanho_lote):
+            bloco = idx[inicio : inicio + tamanho_lote]
+            previstas[bloco] = modelo.predict(X.iloc[bloco])
+    return previstas
+
+
+def prever_curtidas(df, registro: RegistroModelos = None):
+    """Curtidas previstas para as linhas de `df` com o modelo gravado."""
+    return prever_em_lote(df, registro)
+
+
+def atualizar_engajamento(
+    df_novos,
+    registro: RegistroModelos = None,
+    perfil=None,
+    historico=None,
+    arvores_por_lote: int = 20,
+    max_arvores: int = 300,
+    retreino_a_cada: int = 10,
+    tolerancia_r2: float = 0.1,
+    min_lote: int = 20,
+    dia_inicial: int = None,
+):
+    """
+    Atualiza o modelo de engajamento gravado usando só os posts novos.
+
+    Para um RandomForest, `arvores_por_lote` árvores novas são treinadas com
+    todo o `df_novos` (warm_start) e somadas às existentes; acima de
+    `max_arvores`, as mais antigas saem (janela dos lotes recentes).
+    Estimadores com `partial_fit` são atualizados com ele. O custo depende do tamanho do lote,
+    não do histórico.
+
+    O treino completo (prever_engajamento sobre `historico`) é usado quando
+    não há modelo gravado, a cada `retreino_a_cada` atualizações, quando o
+    modelo gravado, aplicado aos posts novos (que ele não viu), tem R² mais
+    de `tolerancia_r2` abaixo do seu R² na validação, ou quando o modelo não
+    aceita atualização. Lotes com menos de `min_lote` posts não passam por
+    essa checagem. `historico` pode ser um DataFrame ou uma função que o
+    carrega (só chamada se necessário).
+
+    A convenção de dia_semana dos posts novos é `dia_inicial` ou, se None,
+    a gravada nos metadados do modelo no treino completo; lotes fora dela
+    levantam ValueError.
+
+    Retorna:
+        modelo, r2 (nas linhas de validação guardadas no último treino
+        completo, que nenhuma atualização usa; None se não houver)
+    """
+    import copy
+
+    registro = registro or registro_padrao()
+    nome = nome_modelo(perfil)
+
+    def treino_completo(motivo):
+        dados = historico() if callable(historico) else historico
+        if dados is None:
+            dados = df_novos
+        logger.info(f"Treino completo de '{nome}' ({motivo}).")
+        return prever_engajamento(
+            dados, registro=registro, perfil=perfil, dia_inicial=dia_inicial
+        )
+
+    base = registro.mais_recente(nome)
+    if base is None:
+        return treino_completo("nenhum modelo gravado")
+    if historico is not None and base.get("atualizacoes", 0) >= retreino_a_cada:
+        return treino_completo(f"{base['atualizacoes']} atualizações incrementais")
+
+    modelo, _ = registro.carregar(nome, base["chave"])
+    floresta = hasattr(modelo, "estimators_") and "warm_start" in modelo.get_params()
+    if not floresta and not hasattr(modelo, "partial_fit"):
+        if historico is None:
+            raise ValueError(
+                f"{type(modelo).__name__} não aceita atualização incremental; "
+                "informe `historico` para o treino completo."
+            )
+        return treino_completo(f"{type(modelo).__name__} sem atualização incremental")
+
+    if dia_inicial is None:
+        dia_inicial = base.get("dia_semana_inicial")
+    if dia_inicial is None:
+        dia_inicial = detectar_dia_inicial(df_novos["dia_semana"])
+    df_novos = normalizar_dia_semana(df_novos, dia_inicial)
+    X, y = df_novos[FEATURES], df_novos[ALVO]
+    hash_lote = hash_dados(X, y)
+    params = {
+        "base": base["chave"],
+        "arvores_por_lote": arvores_por_lote,
+        "max_arvores": max_arvores,
+    }
+    if base.get("hash_dados") == hash_lote:
+        # Lote já aplicado no modelo mais recente
+        return modelo, base["r2"]
+    chave = registro.chave(hash_lote, FEATURES, params)
+    if registro.existe(nome, chave):
+        modelo, meta = registro.carregar(nome, chave)
+        return modelo, meta["r2"]
+
+    # Mudança de padrão: o modelo atual erra nos posts novos mais do que na
+    # validação. Com poucos posts o R² do lote é ruído e a checagem é pulada
+    validacao = _ler_validacao(registro, nome, base["chave"])
+    r2_base = _r2(modelo, validacao)
+    if historico is not None and r2_base is not None and len(df_novos) >= min_lote:
+        r2_lote = _r2(modelo, df_novos)
+        if r2_lote is not None and r2_lote < r2_base - tolerancia_r2:
+            return treino_completo(
+                f"R² nos posts novos {r2_lote:.3f}, na validação {r2_base:.3f}"
+            )
+
+    if floresta:
+        # Cópia rasa: as árvores gravadas (somente leitura) são compartilhadas
+        novo = copy.copy(modelo)
+        novo.estimators_ = list(modelo.estimators_)
+        novo.set_params(
+            warm_start=True, n_estimators=len(novo.estimators_) + arvores_por_lote
+        )
+        novo.fit(X, y)
+        novo.estimators_ = novo.estimators_[-max_arvores:]
+        novo.set_params(warm_start=False, n_estimators=len(novo.estimators_))
+    else:
+        novo = copy.deepcopy(modelo)
+        novo.partial_fit(X, y)
+
+    r2 = _r2(novo, validacao)
+    registro.salvar(
+        nome,
+        chave,
+        novo,
+        features=FEATURES,
+        alvo=ALVO,
+        r2=r2,
+        hash_dados=hash_lote,
+        n_amostras=base.get("n_amostras", 0) + len(df_novos),
+        base=base["chave"],
+        atualizacoes=base.get("atualizacoes", 0) + 1,
+        dia_semana_inicial=dia_inicial,
+        arvores=len(getattr(novo, "estimators_", ())),
+    )
+    _gravar_validacao(registro, nome, chave, validacao)
+    return novo, r2
+
+
 if __name__ == "__main__":
     # Caminho para o arquivo dados:
+    import pandas as pd
+
     caminho_csv = os.path.join("data", "posts_exemplo.csv")
 
     if os.path.exists(caminho_csv):
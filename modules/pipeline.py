@@ -0,0 +1,300 @@
+"""
+pipeline.py
+Pipeline em estágios nomeados com memoização em disco.
+
+Cada estágio tem uma chave de conteúdo (SHA-256) calculada a partir de:
+- nome, versão e parâmetros do estágio
+- chaves dos estágios de que depende (a mudança se propaga adiante)
+- conteúdo dos arquivos de entrada declarados (ex.: o CSV de posts)
+
+Se a chave já está no cache (e os arquivos de saída existem), o estágio é
+pulado e o resultado só é lido do disco se algum estágio seguinte precisar
+rodar. `executar(a_partir_de="normalizar")` refaz um estágio e todos os
+seguintes, reaproveitando os anteriores.
+
+O diretório do cache tem tamanho máximo, com remoção LRU (mtime).
+
+Configuração via .env:
+    PIPELINE_CACHE_DIR=data/cache_pipeline
+    PIPELINE_CACHE_MAX_MB=500
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import pickle
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", "data/cache_pipeline")
+PIPELINE_CACHE_MAX_MB = float(os.getenv("PIPELINE_CACHE_MAX_MB", "500"))
+
+
+def hash_arquivo(caminho: str, bloco: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo do arquivo ('ausente' se não existir)."""
+    if not os.path.exists(caminho):
+        return "ausente"
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# Cache de resultados
+# -----------------------------------------------------------------------------
+class CacheEstagios:
+    """
+    Resultados de estágios em disco, endereçados pela chave do estágio.
+
+    DataFrames são gravados em Parquet; os demais objetos com pickle. Cada
+    entrada tem um arquivo de metadados `.json` ao lado do resultado.
+    """
+
+    def __init__(
+        self,
+        diretorio: str = PIPELINE_CACHE_DIR,
+        tamanho_max_mb: float = PIPELINE_CACHE_MAX_MB,
+    ):
+        self.diretorio = diretorio
+        self.tamanho_max = int(tamanho_max_mb * 1024 * 1024)
+        self.stats = {"acertos": 0, "faltas": 0, "gravacoes": 0, "removidos": 0}
+
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _meta(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.json")
+
+    def _entradas(self):
+        """(chave, bytes, mtime) de cada entrada completa."""
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(".json"):
+                continue
+            chave = nome[:-5]
+            meta = self._ler_meta(chave)
+            if meta is None:
+                continue
+            dados = os.path.join(self.diretorio, meta["arquivo"])
+            try:
+                st = os.stat(dados)
+            except FileNotFoundError:
+                continue
+            tamanho = st.st_size + os.path.getsize(self._meta(chave))
+            yield chave, tamanho, st.st_mtime
+
+    def _ler_meta(self, chave: str) -> Optional[Dict]:
+        try:
+            with open(self._meta(chave), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def contem(self, chave: str, validade: Optional[float] = None) -> bool:
+        """Se há resultado para a chave, criado há menos de `validade` segundos."""
+        meta = self._ler_meta(chave)
+        if meta is None:
+            return False
+        if validade is not None and time.time() - meta["criado"] > validade:
+            return False
+        return os.path.exists(os.path.join(self.diretorio, meta["arquivo"]))
+
+    def obter(self, chave: str) -> Any:
+        meta = self._ler_meta(chave)
+        if meta is None:
+            raise KeyError(chave)
+
+        caminho = os.path.join(self.diretorio, meta["arquivo"])
+        if meta["formato"] == "parquet":
+            import pandas as pd
+
+            resultado = pd.read_parquet(caminho)
+        else:
+            with open(caminho, "rb") as f:
+                resultado = pickle.load(f)
+
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        return resultado
+
+    def gravar(self, chave: str, estagio: str, resultado: Any) -> None:
+        formato, arquivo = "pickle", f"{chave}.pkl"
+        tmp = os.path.join(self.diretorio, f"{arquivo}.{threading.get_ident()}.tmp")
+
+        # Sem pandas carregado o resultado não pode ser um DataFrame; assim o
+        # módulo não força a importação do pandas
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(resultado, pd.DataFrame):
+            try:
+                resultado.to_parquet(tmp, index=False)
+                formato, arquivo = "parquet", f"{chave}.parquet"
+            except Exception:
+                # Colunas com tipos mistos: cai para pickle
+                pass
+
+        if formato == "pickle":
+            with open(tmp, "wb") as f:
+                pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            os.replace(tmp, os.path.join(self.diretorio, arquivo))
+            meta = {"estagio": estagio, "formato": formato, "arquivo": arquivo}
+            with open(self._meta(chave), "w", encoding="utf-8") as f:
+                json.dump({**meta, "criado": time.time()}, f)
+            self.stats["gravacoes"] += 1
+            self._remover_lru()
+
+    def _remover_lru(self) -> None:
+        """Remove as entradas menos usadas até caber no tamanho máximo."""
+        entradas = sorted(self._entradas(), key=lambda e: e[2])
+        total = sum(t for _, t, _ in entradas)
+        for chave, tamanho, _ in entradas:
+            if total <= self.tamanho_max:
+                break
+            meta = self._ler_meta(chave)
+            for nome in (meta["arquivo"], f"{chave}.json"):
+                try:
+                    os.remove(os.path.join(self.diretorio, nome))
+                except FileNotFoundError:
+                    pass
+            total -= tamanho
+            self.stats["removidos"] += 1
+
+    def limpar(self) -> None:
+        with self._lock:
+            for nome in os.listdir(self.diretorio):
+                os.remove(os.path.join(self.diretorio, nome))
+
+
+# -----------------------------------------------------------------------------
+# Estágios
+# -----------------------------------------------------------------------------
+@dataclass
+class Estagio:
+    """
+    Estágio do pipeline.
+
+    `funcao` recebe os resultados de `entradas` (na ordem) e `params` como
+    argumentos nomeados. `arquivos` são lidos para compor a chave; `saidas`
+    são arquivos produzidos, que precisam existir para o cache valer.
+    `validade` (segundos) expira o resultado mesmo com a chave igual, para
+    estágios que dependem do mundo externo (ex.: coleta).
+    Resultados None não são memoizados (ex.: coleta que falhou).
+    """
+
+    nome: str
+    funcao: Callable[..., Any]
+    entradas: List[str] = field(default_factory=list)
+    params: Dict[str, Any] = field(default_factory=dict)
+    arquivos: List[str] = field(default_factory=list)
+    saidas: List[str] = field(default_factory=list)
+    validade: Optional[float] = None
+    versao: str = "1"
+
+
+class Pipeline:
+    def __init__(self, estagios: List[Estagio], cache: Optional[CacheEstagios] = None):
+        nomes = [e.nome for e in estagios]
+        if len(set(nomes)) != len(nomes):
+            raise ValueError("Nomes de estágios repetidos.")
+        for e in estagios:
+            anteriores = nomes[: nomes.index(e.nome)]
+            faltando = [n for n in e.entradas if n not in anteriores]
+            if faltando:
+                raise ValueError(f"Estágio {e.nome} depende de {faltando}.")
+
+        self.estagios = estagios
+        self.cache = cache
+        self.executados: List[str] = []
+        self.pulados: List[str] = []
+        self._carregadores: Dict[str, Callable[[], Any]] = {}
+        self._resultados: Dict[str, Any] = {}
+
+    @property
+    def nomes(self) -> List[str]:
+        return [e.nome for e in self.estagios]
+
+    def _chave(self, estagio: Estagio, chaves: Dict[str, str]) -> str:
+        bruto = json.dumps(
+            {
+                "estagio": estagio.nome,
+                "versao": estagio.versao,
+                "params": estagio.params,
+                "entradas": [chaves[n] for n in estagio.entradas],
+                "arquivos": {a: hash_arquivo(a) for a in estagio.arquivos},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+    def resultado(self, nome: str) -> Any:
+        """Resultado de um estágio da última execução (lido do cache se pulado)."""
+        if nome not in self._resultados:
+            self._resultados[nome] = self._carregadores.pop(nome)()
+        return self._resultados[nome]
+
+    def executar(self, a_partir_de: Optional[str] = None) -> Any:
+        """
+        Executa o pipeline e retorna o resultado do último estágio.
+
+        `a_partir_de` força a reexecução desse estágio e dos seguintes.
+        Estágios pulados só são lidos do disco se algum estágio seguinte
+        rodar ou se o resultado for pedido via `resultado(nome)`.
+        """
+        if a_partir_de is not None and a_partir_de not in self.nomes:
+            raise ValueError(
+                f"Estágio desconhecido: {a_partir_de}. Use um de {self.nomes}."
+            )
+        inicio_forcado = (
+            self.nomes.index(a_partir_de) if a_partir_de is not None else None
+        )
+
+        self.executados, self.pulados = [], []
+        self._carregadores, self._resultados = {}, {}
+        chaves: Dict[str, str] = {}
+
+        for i, estagio in enumerate(self.estagios):
+            chave = self._chave(estagio, chaves)
+            chaves[estagio.nome] = chave
+
+            forcado = inicio_forcado is not None and i >= inicio_forcado
+            em_cache = (
+                self.cache is not None
+                and not forcado
+                and self.cache.contem(chave, estagio.validade)
+                and all(os.path.exists(s) for s in estagio.saidas)
+            )
+
+            if em_cache:
+                logger.info(f"⏭️  Estágio '{estagio.nome}' em cache ({chave[:12]}).")
+                self.cache.stats["acertos"] += 1
+                self._carregadores[estagio.nome] = lambda c=chave: self.cache.obter(c)
+                self.pulados.append(estagio.nome)
+                continue
+
+            if self.cache is not None:
+                self.cache.stats["faltas"] += 1
+            logger.info(f"▶️  Executando estágio '{estagio.nome}'...")
+            args = [self.resultado(n) for n in estagio.entradas]
+            saida = estagio.funcao(*args, **estagio.params)
+            self._resultados[estagio.nome] = saida
+            self.executados.append(estagio.nome)
+
+            if self.cache is not None and saida is not None:
+                self.cache.gravar(chave, estagio.nome, saida)
+
+        return self.resultado(self.nomes[-1]) if self.estagios else None
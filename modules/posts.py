@@ -0,0 +1,330 @@
+"""
+posts.py
+Tipos compactos para posts: o registro `Post` e o lote colunar `PostBatch`.
+
+- `Post`: dataclass com __slots__ (sem __dict__ por instância), para posts
+  avulsos que trafegam entre funções
+- `PostBatch`: colunas em arrays NumPy (números, datas, máscaras de nulos)
+  e Arrow (textos). Um milhão de posts ocupa dezenas de MB em vez dos GB de
+  uma lista de dicionários, e a conversão para pandas/Arrow reaproveita os
+  buffers sem copiá-los
+
+Coletor, modelo, armazenamento e visualização aceitam `PostBatch` (e listas
+de `Post`) onde aceitam DataFrames; `como_dataframe` faz a conversão.
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass, fields
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+URL_BASE = "https://www.instagram.com/p/"
+
+
+@dataclass(slots=True)
+class Post:
+    """Um post coletado (mesmas colunas do DataFrame da coleta)."""
+
+    post_id: Optional[int]
+    shortcode: Optional[str]
+    datetime: Optional[datetime.datetime]
+    likes: Optional[int] = None
+    comments: Optional[int] = None
+    caption: str = ""
+    is_video: bool = False
+    profile: Optional[str] = None
+
+    @property
+    def url(self) -> Optional[str]:
+        return f"{URL_BASE}{self.shortcode}/" if self.shortcode else None
+
+    @classmethod
+    def de_instaloader(cls, post, profile: Optional[str] = None) -> "Post":
+        """Extrai os campos de um instaloader.Post (ou objeto equivalente)."""
+        media_id = getattr(post, "mediaid", None) or getattr(post, "id", None)
+        likes = getattr(post, "likes", None)
+        comments = getattr(post, "comments", None)
+        return cls(
+            post_id=int(media_id) if media_id else None,
+            shortcode=getattr(post, "shortcode", None),
+            datetime=getattr(post, "date_utc", None),
+            likes=int(likes) if likes is not None else None,
+            comments=int(comments) if comments is not None else None,
+            caption=getattr(post, "caption", "") or "",
+            is_video=bool(getattr(post, "is_video", False)),
+            profile=profile,
+        )
+
+
+CAMPOS_POST = [f.name for f in fields(Post)]
+
+
+def _inteiros(valores) -> tuple:
+    """(valores int64, máscara de nulos) a partir de uma sequência."""
+    arr = pd.array(valores, dtype="Int64")
+    return arr.to_numpy(dtype=np.int64, na_value=0), np.asarray(arr.isna())
+
+
+def _textos(valores) -> pa.Array:
+    if isinstance(valores, pa.ChunkedArray):
+        valores = valores.combine_chunks()
+    if isinstance(valores, pa.Array):
+        return valores.cast(pa.string())
+    if (
+        isinstance(valores, (pd.Series, pd.Index))
+        and valores.dtype == "string[pyarrow]"
+    ):
+        return _textos(pa.array(valores))
+    return pa.array(valores, type=pa.string(), from_pandas=True)
+
+
+def _datas(valores) -> np.ndarray:
+    return np.asarray(pd.to_datetime(valores), dtype="datetime64[ns]")
+
+
+class PostBatch:
+    """
+    Lote de posts em colunas.
+
+    Colunas numéricas são arrays NumPy (int64 + máscara de nulos, bool,
+    datetime64[ns]); textos são arrays Arrow. Fatias (`lote[10:20]`) são
+    views, sem cópia.
+    """
+
+    __slots__ = (
+        "profile",
+        "post_id",
+        "post_id_nulo",
+        "shortcode",
+        "caption",
+        "datetime",
+        "likes",
+        "likes_nulo",
+        "comments",
+        "comments_nulo",
+        "is_video",
+    )
+
+    def __init__(
+        self,
+        profile: pa.Array,
+        post_id: np.ndarray,
+        post_id_nulo: np.ndarray,
+        shortcode: pa.Array,
+        caption: pa.Array,
+        datetime: np.ndarray,
+        likes: np.ndarray,
+        likes_nulo: np.ndarray,
+        comments: np.ndarray,
+        comments_nulo: np.ndarray,
+        is_video: np.ndarray,
+    ):
+        self.profile = profile
+        self.post_id = post_id
+        self.post_id_nulo = post_id_nulo
+        self.shortcode = shortcode
+        self.caption = caption
+        self.datetime = datetime
+        self.likes = likes
+        self.likes_nulo = likes_nulo
+        self.comments = comments
+        self.comments_nulo = comments_nulo
+        self.is_video = is_video
+
+        n = len(post_id)
+        if any(len(getattr(self, c)) != n for c in self.__slots__):
+            raise ValueError("Colunas do PostBatch com tamanhos diferentes.")
+
+    # -------------------------------------------------------------------------
+    # Construção
+    # -------------------------------------------------------------------------
+    @classmethod
+    def de_colunas(
+        cls,
+        post_id,
+        shortcode,
+        datetime,
+        likes,
+        comments,
+        caption=None,
+        is_video=None,
+        profile=None,
+    ) -> "PostBatch":
+        """
+        Monta o lote a partir de sequências por coluna (listas, arrays ou
+        Series). `profile` pode ser uma string única para o lote inteiro.
+        """
+        n = len(post_id)
+        if profile is None or isinstance(profile, str):
+            profile = pa.array([profile] * n, type=pa.string())
+        if caption is None:
+            caption = [""] * n
+        if is_video is None:
+            is_video = np.zeros(n, dtype=bool)
+
+        post_id, post_id_nulo = _inteiros(post_id)
+        likes, likes_nulo = _inteiros(likes)
+        comments, comments_nulo = _inteiros(comments)
+        return cls(
+            profile=_textos(profile),
+            post_id=post_id,
+            post_id_nulo=post_id_nulo,
+            shortcode=_textos(shortcode),
+            caption=_textos(caption),
+            datetime=_datas(datetime),
+            likes=likes,
+            likes_nulo=likes_nulo,
+            comments=comments,
+            comments_nulo=comments_nulo,
+            is_video=np.asarray(is_video, dtype=bool),
+        )
+
+    @classmethod
+    def de_posts(cls, posts: Iterable[Post]) -> "PostBatch":
+        posts = list(posts)
+        return cls.de_colunas(
+            **{c: [getattr(p, c) for p in posts] for c in CAMPOS_POST}
+        )
+
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame) -> "PostBatch":
+        """Lote a partir de um DataFrame no formato da coleta."""
+        n = len(df)
+        return cls.de_colunas(
+            post_id=df["post_id"],
+            shortcode=df["shortcode"],
+            datetime=df["datetime"],
+            likes=df["likes"] if "likes" in df else [None] * n,
+            comments=df["comments"] if "comments" in df else [None] * n,
+            caption=df["caption"].fillna("") if "caption" in df else None,
+            is_video=df["is_video"].fillna(False) if "is_video" in df else None,
+            profile=df["profile"] if "profile" in df else None,
+        )
+
+    @classmethod
+    def vazio(cls) -> "PostBatch":
+        return cls.de_colunas([], [], [], [], [])
+
+    @classmethod
+    def concatenar(cls, lotes: Sequence["PostBatch"]) -> "PostBatch":
+        lotes = [lote for lote in lotes if len(lote)]
+        if not lotes:
+            return cls.vazio()
+        if len(lotes) == 1:
+            return lotes[0]
+
+        def juntar(coluna):
+            partes = [getattr(lote, coluna) for lote in lotes]
+            if isinstance(partes[0], pa.Array):
+                return pa.concat_arrays(partes)
+            return np.concatenate(partes)
+
+        return cls(**{c: juntar(c) for c in cls.__slots__})
+
+    # -------------------------------------------------------------------------
+    # Acesso
+    # -------------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.post_id)
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            return PostBatch(**{c: getattr(self, c)[item] for c in self.__slots__})
+
+        i = range(len(self))[item]
+        dt = self.datetime[i]
+        return Post(
+            post_id=None if self.post_id_nulo[i] else int(self.post_id[i]),
+            shortcode=self.shortcode[i].as_py(),
+            datetime=None if np.isnat(dt) else pd.Timestamp(dt).to_pydatetime(),
+            likes=None if self.likes_nulo[i] else int(self.likes[i]),
+            comments=None if self.comments_nulo[i] else int(self.comments[i]),
+            caption=self.caption[i].as_py() or "",
+            is_video=bool(self.is_video[i]),
+            profile=self.profile[i].as_py(),
+        )
+
+    def __iter__(self) -> Iterator[Post]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"PostBatch({len(self)} posts, {self.nbytes / 1024**2:.1f} MB)"
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, c).nbytes for c in self.__slots__)
+
+    # -------------------------------------------------------------------------
+    # Conversões
+    # -------------------------------------------------------------------------
+    def _url(self) -> pa.Array:
+        return pc.binary_join_element_wise(URL_BASE, self.shortcode, "/", "")
+
+    def para_arrow(self) -> pa.Table:
+        """Tabela Arrow com as colunas da coleta (buffers numéricos compartilhados)."""
+        return pa.table(
+            {
+                "profile": self.profile,
+                "post_id": pa.array(self.post_id, mask=self.post_id_nulo),
+                "shortcode": self.shortcode,
+                "url": self._url(),
+                "caption": self.caption,
+                "datetime": pa.array(self.datetime, mask=np.isnat(self.datetime)),
+                "likes": pa.array(self.likes, mask=self.likes_nulo),
+                "comments": pa.array(self.comments, mask=self.comments_nulo),
+                "is_video": self.is_video,
+            }
+        )
+
+    def para_pandas(self) -> pd.DataFrame:
+        """
+        DataFrame no formato da coleta (Int64, bool, string[pyarrow]).
+
+        Os arrays NumPy e Arrow são usados diretamente pelas colunas, sem cópia.
+        """
+
+        def texto(arr: pa.Array) -> pd.Series:
+            return pd.Series(pd.arrays.ArrowStringArray(pa.chunked_array([arr])))
+
+        def inteiro(valores, nulos) -> pd.Series:
+            return pd.Series(pd.arrays.IntegerArray(valores, nulos, copy=False))
+
+        dt = pd.Series(self.datetime, copy=False)
+        df = pd.DataFrame(
+            {
+                "profile": texto(self.profile),
+                "post_id": inteiro(self.post_id, self.post_id_nulo),
+                "shortcode": texto(self.shortcode),
+                "url": texto(self._url()),
+                "caption": texto(self.caption),
+                "datetime": dt,
+                "likes": inteiro(self.likes, self.likes_nulo),
+                "comments": inteiro(self.comments, self.comments_nulo),
+                "is_video": pd.Series(self.is_video, copy=False),
+                "date": dt.dt.date,
+                "hour": dt.dt.hour.astype("Int8"),
+            },
+            copy=False,
+        )
+        return df
+
+
+def como_dataframe(dados) -> pd.DataFrame:
+    """
+    DataFrame a partir de um PostBatch ou de uma lista de Post; outros valores
+    (DataFrames, None, listas de dicionários) são devolvidos sem alteração.
+    """
+    if isinstance(dados, PostBatch):
+        return dados.para_pandas()
+    if isinstance(dados, list) and dados and all(isinstance(p, Post) for p in dados):
+        return PostBatch.de_posts(dados).para_pandas()
+    return dados
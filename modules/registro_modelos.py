@@ -0,0 +1,292 @@
+"""
+registro_modelos.py
+Registro persistente de modelos treinados.
+
+Cada modelo é gravado com joblib ao lado de um JSON de metadados:
+
+    <MODELOS_DIR>/<nome>/<chave>.joblib
+    <MODELOS_DIR>/<nome>/<chave>.json
+
+A chave é o SHA-256 do hash dos dados de treino, da lista de features, dos
+parâmetros do modelo e da versão do scikit-learn. Treinar de novo com os
+mesmos dados e parâmetros encontra o modelo já gravado, em vez de refazer o
+ajuste.
+
+Os modelos carregados ficam em um cache LRU pequeno no processo: chamadas
+seguintes que só fazem previsões não leem o disco de novo. Ao gravar uma
+versão nova, as anteriores do mesmo nome saem do cache, e no disco só as
+`MODELOS_MANTER` mais recentes de cada nome são mantidas (com os artefatos
+derivados).
+
+Configuração via .env:
+    MODELOS_DIR=data/modelos
+    MODELOS_CACHE_MAX=4     (modelos mantidos em memória)
+    MODELOS_MANTER=5        (versões gravadas por nome; 0 = todas)
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import logging
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODELOS_DIR = os.getenv("MODELOS_DIR", "data/modelos")
+MODELOS_CACHE_MAX = int(os.getenv("MODELOS_CACHE_MAX", "4"))
+MODELOS_MANTER = int(os.getenv("MODELOS_MANTER", "5"))
+
+
+def hash_dados(X, y=None) -> str:
+    """SHA-256 do conteúdo de X (e y), independente de cópias ou da ordem das colunas."""
+    import pandas as pd
+
+    h = hashlib.sha256()
+    for parte in (X, y):
+        if parte is None:
+            continue
+        if isinstance(parte, pd.DataFrame):
+            parte = parte[sorted(parte.columns)]
+            h.update(",".join(map(str, parte.columns)).encode())
+        linhas = pd.util.hash_pandas_object(parte, index=False)
+        h.update(linhas.to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class RegistroModelos:
+    """
+    Grava, localiza e carrega modelos pelo nome e pela chave de treino.
+
+    Uso:
+        registro = RegistroModelos()
+        chave = registro.chave(hash_dados(X, y), list(X.columns), modelo.get_params())
+        if registro.existe("engajamento", chave):
+            modelo, meta = registro.carregar("engajamento", chave)
+        else:
+            modelo.fit(X, y)
+            registro.salvar("engajamento", chave, modelo, r2=...)
+
+    Argumentos:
+        max_cache: modelos mantidos em memória (os menos usados saem primeiro)
+        manter: versões gravadas por nome; as mais antigas são apagadas a
+            cada `salvar` (0 = mantém todas)
+    """
+
+    def __init__(
+        self,
+        diretorio: str = MODELOS_DIR,
+        max_cache: int = MODELOS_CACHE_MAX,
+        manter: int = MODELOS_MANTER,
+    ):
+        self.diretorio = diretorio
+        self.max_cache = max(1, max_cache)
+        self.manter = manter
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[object, Dict]]" = OrderedDict()
+        self._recentes: Dict[str, Tuple[Optional[int], Optional[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chave(hash_treino: str, features: List[str], params: Dict) -> str:
+        import sklearn
+
+        conteudo = json.dumps(
+            {
+                "dados": hash_treino,
+                "features": list(features),
+                "params": params,
+                "sklearn": sklearn.__version__,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(conteudo.encode()).hexdigest()[:32]
+
+    def _caminho(self, nome: str, chave: str, ext: str) -> str:
+        return os.path.join(self.diretorio, nome, f"{chave}.{ext}")
+
+    def caminho_artefato(self, nome: str, chave: str, sufixo: str) -> str:
+        """Caminho para um arquivo derivado do modelo (ex.: tabela pré-calculada)."""
+        return self._caminho(nome, chave, sufixo)
+
+    def versao(self, nome: str) -> Optional[int]:
+        """
+        Muda sempre que um modelo de `nome` é gravado ou removido (mtime do
+        diretório); permite validar caches sem reler os metadados.
+        """
+        try:
+            return os.stat(os.path.join(self.diretorio, nome)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _guardar(self, nome: str, chave: str, entrada: Tuple[object, Dict]) -> None:
+        # Chamado com o lock: LRU limitado a max_cache modelos
+        self._cache[(nome, chave)] = entrada
+        self._cache.move_to_end((nome, chave))
+        while len(self._cache) > self.max_cache:
+            self._cache.popitem(last=False)
+
+    def existe(self, nome: str, chave: str) -> bool:
+        with self._lock:
+            em_cache = (nome, chave) in self._cache
+        return em_cache or (
+            os.path.exists(self._caminho(nome, chave, "joblib"))
+            and os.path.exists(self._caminho(nome, chave, "json"))
+        )
+
+    def salvar(self, nome: str, chave: str, modelo, **metadados) -> Dict:
+        """
+        Grava o modelo e os metadados (ex.: features, r2, hash_dados).
+        Retorna os metadados completos.
+        """
+        import joblib
+
+        os.makedirs(os.path.join(self.diretorio, nome), exist_ok=True)
+        meta = {
+            "nome": nome,
+            "chave": chave,
+            "classe": type(modelo).__name__,
+            "criado_em": datetime.datetime.now().isoformat(),
+            **metadados,
+        }
+
+        # Grava em arquivos temporários e troca: leitores nunca veem arquivo parcial
+        destino = self._caminho(nome, chave, "joblib")
+        joblib.dump(modelo, destino + ".tmp")
+        os.replace(destino + ".tmp", destino)
+
+        destino_meta = self._caminho(nome, chave, "json")
+        with open(destino_meta + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(destino_meta + ".tmp", destino_meta)
+
+        with self._lock:
+            # Versões anteriores do nome deixam de ser as servidas
+            for antiga in [k for k in self._cache if k[0] == nome]:
+                del self._cache[antiga]
+            self._guardar(nome, chave, (modelo, meta))
+            self._recentes.pop(nome, None)
+        logger.info(f"Modelo '{nome}' gravado ({chave}).")
+
+        if self.manter > 0:
+            self.podar(nome, self.manter, preservar=chave)
+        return meta
+
+    def metadados(self, nome: str, chave: str) -> Dict:
+        with open(self._caminho(nome, chave, "json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def carregar(self, nome: str, chave: Optional[str] = None) -> Tuple[object, Dict]:
+        """
+        (modelo, metadados) pela chave; sem chave, o modelo mais recente do nome.
+        Levanta FileNotFoundError se não houver modelo gravado.
+        """
+        import joblib
+
+        if chave is None:
+            recente = self.mais_recente(nome)
+            if recente is None:
+                raise FileNotFoundError(f"Nenhum modelo '{nome}' em {self.diretorio}")
+            chave = recente["chave"]
+
+        with self._lock:
+            if (nome, chave) in self._cache:
+                self._cache.move_to_end((nome, chave))
+                return self._cache[(nome, chave)]
+
+        caminho = self._caminho(nome, chave, "joblib")
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(f"Modelo não encontrado: {caminho}")
+
+        modelo = joblib.load(caminho)
+        meta = self.metadados(nome, chave)
+        with self._lock:
+            self._guardar(nome, chave, (modelo, meta))
+        return modelo, meta
+
+    def listar(self, nome: str) -> List[Dict]:
+        """Metadados dos modelos gravados de `nome`, do mais recente ao mais antigo."""
+        pasta = os.path.join(self.diretorio, nome)
+        if not os.path.isdir(pasta):
+            return []
+
+        metas = []
+        for arquivo in os.listdir(pasta):
+            if not arquivo.endswith(".json"):
+                continue
+            chave = arquivo[: -len(".json")]
+            if not os.path.exists(self._caminho(nome, chave, "joblib")):
+                continue
+            try:
+                metas.append(self.metadados(nome, chave))
+            except (OSError, ValueError):
+                continue
+        return sorted(metas, key=lambda m: m.get("criado_em", ""), reverse=True)
+
+    def mais_recente(self, nome: str) -> Optional[Dict]:
+        # Sem gravações no diretório desde a última leitura, não relê os JSONs
+        versao = self.versao(nome)
+        with self._lock:
+            memo = self._recentes.get(nome)
+        if memo is not None and versao is not None and memo[0] == versao:
+            return memo[1]
+
+        metas = self.listar(nome)
+        recente = metas[0] if metas else None
+        with self._lock:
+            self._recentes[nome] = (versao, recente)
+        return recente
+
+    def remover(self, nome: str, chave: str) -> None:
+        """Apaga o modelo, os metadados e os artefatos derivados (`<chave>.*`)."""
+        with self._lock:
+            self._cache.pop((nome, chave), None)
+            self._recentes.pop(nome, None)
+        pasta = os.path.join(self.diretorio, nome)
+        if not os.path.isdir(pasta):
+            return
+        for arquivo in os.listdir(pasta):
+            if arquivo.startswith(f"{chave}."):
+                try:
+                    os.remove(os.path.join(pasta, arquivo))
+                except FileNotFoundError:
+                    pass
+
+    def podar(self, nome: str, manter: int, preservar: Optional[str] = None) -> int:
+        """
+        Apaga as versões de `nome` além das `manter` mais recentes (nunca a
+        chave `preservar`). Retorna quantas foram removidas.
+        """
+        antigas = [
+            m["chave"] for m in self.listar(nome)[manter:] if m["chave"] != preservar
+        ]
+        for chave in antigas:
+            self.remover(nome, chave)
+        if antigas:
+            logger.info(f"{len(antigas)} versões antigas de '{nome}' removidas.")
+        return len(antigas)
+
+    def limpar_cache(self) -> None:
+        """Esquece os modelos carregados no processo (os arquivos continuam)."""
+        with self._lock:
+            self._cache.clear()
+            self._recentes.clear()
+
+
+_registro_padrao: Optional[RegistroModelos] = None
+_registro_lock = threading.Lock()
+
+
+def registro_padrao() -> RegistroModelos:
+    """Registro compartilhado pelo processo (mantém os modelos carregados)."""
+    global _registro_padrao
+    with _registro_lock:
+        if _registro_padrao is None:
+            _registro_padrao = RegistroModelos()
+        return _registro_padrao
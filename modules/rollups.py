@@ -0,0 +1,322 @@
+"""
+rollups.py
+Agregados de engajamento materializados e mantidos incrementalmente.
+
+Duas tabelas pequenas, derivadas da tabela de posts:
+
+- `<tabela>_rollup_dia`:  perfil x data
+- `<tabela>_rollup_hora`: perfil x dia da semana x hora
+
+Cada linha guarda, para likes e comentários: soma, média, p50 e p90, além do
+número de posts. Dashboards e a construção de features leem esses agregados
+em vez de varrer o histórico de posts.
+
+A manutenção é feita por armazenamento_posts.upsert_posts, na mesma
+transação: apenas os grupos tocados pelos posts gravados são recalculados
+(percentis não são combináveis a partir de somas, então o grupo inteiro é
+relido, mas só ele). As leituras usam o índice (profile, datetime); dia da
+semana e hora são derivados de `datetime` no próprio SQLite, sem depender da
+coluna `hour` (ausente em posts gravados fora da coleta).
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import sqlalchemy as sa
+
+from modules.armazenamento_posts import (
+    SQLITE_DB,
+    _metadata,
+    criar_schema,
+    obter_engine,
+    tabela_posts,
+)
+
+logger = logging.getLogger(__name__)
+
+METRICAS = ["likes", "comments"]
+PERCENTIS = {"p50": 0.5, "p90": 0.9}
+
+_tabelas_rollup: Dict[str, sa.Table] = {}
+
+
+# -----------------------------------------------------------------------------
+# Schema
+# -----------------------------------------------------------------------------
+def _colunas_metricas() -> List[sa.Column]:
+    colunas = [sa.Column("posts", sa.Integer, nullable=False)]
+    for m in METRICAS:
+        colunas += [
+            sa.Column(f"{m}_soma", sa.BigInteger),
+            sa.Column(f"{m}_media", sa.Float),
+        ]
+        colunas += [sa.Column(f"{m}_{p}", sa.Float) for p in PERCENTIS]
+    return colunas
+
+
+def tabela_rollup_dia(tabela: str = "posts") -> sa.Table:
+    nome = f"{tabela}_rollup_dia"
+    t = _tabelas_rollup.get(nome)
+    if t is None:
+        t = sa.Table(
+            nome,
+            _metadata,
+            sa.Column("profile", sa.String, primary_key=True),
+            sa.Column("date", sa.Date, primary_key=True),
+            *_colunas_metricas(),
+        )
+        _tabelas_rollup[nome] = t
+    return t
+
+
+def tabela_rollup_hora(tabela: str = "posts") -> sa.Table:
+    nome = f"{tabela}_rollup_hora"
+    t = _tabelas_rollup.get(nome)
+    if t is None:
+        t = sa.Table(
+            nome,
+            _metadata,
+            sa.Column("profile", sa.String, primary_key=True),
+            sa.Column("dia_semana", sa.Integer, primary_key=True),  # 0 = segunda
+            sa.Column("hour", sa.Integer, primary_key=True),
+            *_colunas_metricas(),
+        )
+        _tabelas_rollup[nome] = t
+    return t
+
+
+def _criar_tabelas(conn, tabela: str) -> None:
+    tabela_rollup_dia(tabela).create(conn, checkfirst=True)
+    tabela_rollup_hora(tabela).create(conn, checkfirst=True)
+
+
+# -----------------------------------------------------------------------------
+# Agregação
+# -----------------------------------------------------------------------------
+def _derivar_chaves(df: pd.DataFrame) -> pd.DataFrame:
+    dt = pd.to_datetime(df["datetime"], errors="coerce")
+    df = df.assign(date=dt.dt.date, dia_semana=dt.dt.dayofweek, hour=dt.dt.hour)
+    return df[dt.notna()]
+
+
+def agregar(df: pd.DataFrame, chaves: List[str]) -> pd.DataFrame:
+    """Soma, média, percentis e contagem de likes/comentários por `chaves`."""
+    colunas = (
+        chaves
+        + ["posts"]
+        + [f"{m}_{s}" for m in METRICAS for s in ["soma", "media", *PERCENTIS]]
+    )
+    if df.empty:
+        return pd.DataFrame(columns=colunas)
+
+    grupos = df.groupby(chaves, sort=False)
+    res = grupos.size().rename("posts").to_frame()
+    for m in METRICAS:
+        valores = pd.to_numeric(df[m], errors="coerce")
+        g = valores.groupby([df[c] for c in chaves], sort=False)
+        res[f"{m}_soma"] = g.sum()
+        res[f"{m}_media"] = g.mean()
+        for nome, q in PERCENTIS.items():
+            res[f"{m}_{nome}"] = g.quantile(q)
+
+    return res.reset_index()[colunas]
+
+
+def _registros(df: pd.DataFrame) -> List[Dict]:
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict("records")
+
+
+# -----------------------------------------------------------------------------
+# Manutenção incremental
+# -----------------------------------------------------------------------------
+def _chaves_dos_posts(conn, posts: sa.Table, post_ids: List[int]) -> pd.DataFrame:
+    partes = []
+    for i in range(0, len(post_ids), 500):
+        query = sa.select(posts.c.profile, posts.c.datetime).where(
+            posts.c.post_id.in_(post_ids[i : i + 500])
+        )
+        partes.append(
+            pd.DataFrame(conn.execute(query).all(), columns=["profile", "datetime"])
+        )
+    return _derivar_chaves(pd.concat(partes, ignore_index=True))
+
+
+def _recalcular_dias(conn, posts: sa.Table, perfil: str, dias: Iterable) -> int:
+    dias = sorted(set(dias))
+    inicio = datetime.datetime.combine(dias[0], datetime.time())
+    um_dia = datetime.timedelta(days=1)
+    fim = datetime.datetime.combine(dias[-1] + um_dia, datetime.time())
+
+    query = sa.select(posts.c.datetime, posts.c.likes, posts.c.comments).where(
+        posts.c.profile == perfil, posts.c.datetime >= inicio, posts.c.datetime < fim
+    )
+    df = _derivar_chaves(
+        pd.DataFrame(conn.execute(query).all(), columns=["datetime", *METRICAS])
+    )
+    df = df[df["date"].isin(dias)].assign(profile=perfil)
+
+    t = tabela_rollup_dia(posts.name)
+    for i in range(0, len(dias), 500):
+        conn.execute(
+            sa.delete(t).where(t.c.profile == perfil, t.c.date.in_(dias[i : i + 500]))
+        )
+    agregados = agregar(df, ["profile", "date"])
+    if not agregados.empty:
+        conn.execute(sa.insert(t), _registros(agregados))
+    return len(agregados)
+
+
+def _recalcular_horas(conn, posts: sa.Table, perfil: str, grupos: Iterable) -> int:
+    grupos = {(int(d), int(h)) for d, h in grupos}
+
+    # Dia da semana (0 = segunda; no SQLite %w é 0 = domingo) e hora vêm de
+    # `datetime`: só as linhas dos grupos tocados saem do banco
+    domingo_0 = sa.cast(sa.func.strftime("%w", posts.c.datetime), sa.Integer)
+    hora_sql = sa.cast(sa.func.strftime("%H", posts.c.datetime), sa.Integer)
+    query = sa.select(posts.c.datetime, posts.c.likes, posts.c.comments).where(
+        posts.c.profile == perfil,
+        sa.tuple_((domingo_0 + 6) % 7, hora_sql).in_(sorted(grupos)),
+    )
+    df = _derivar_chaves(
+        pd.DataFrame(conn.execute(query).all(), columns=["datetime", *METRICAS])
+    ).assign(profile=perfil)
+
+    t = tabela_rollup_hora(posts.name)
+    for dia, hora in grupos:
+        conn.execute(
+            sa.delete(t).where(
+                t.c.profile == perfil, t.c.dia_semana == dia, t.c.hour == hora
+            )
+        )
+    agregados = agregar(df, ["profile", "dia_semana", "hour"])
+    if not agregados.empty:
+        conn.execute(sa.insert(t), _registros(agregados))
+    return len(agregados)
+
+
+def _ids(post_ids: Iterable) -> List[int]:
+    return [int(i) for i in pd.unique(pd.Series(list(post_ids)).dropna())]
+
+
+def chaves_gravadas(conn, post_ids: Iterable, tabela: str = "posts") -> pd.DataFrame:
+    """
+    Grupos (perfil, data, dia da semana, hora) em que os posts estão hoje.
+    Lido antes do upsert: se a data ou o perfil de um post mudar, o grupo
+    antigo também precisa ser recalculado.
+    """
+    ids = _ids(post_ids)
+    if not ids:
+        return _derivar_chaves(pd.DataFrame(columns=["profile", "datetime"]))
+    return _chaves_dos_posts(conn, tabela_posts(tabela), ids)
+
+
+def atualizar_rollups(
+    conn,
+    post_ids: Iterable,
+    tabela: str = "posts",
+    anteriores: Optional[pd.DataFrame] = None,
+) -> int:
+    """
+    Recalcula, na conexão/transação dada, os grupos dia/hora dos posts
+    informados (já gravados na tabela) e os grupos `anteriores` (de
+    chaves_gravadas, antes da gravação). Retorna o número de grupos gravados.
+    """
+    ids = _ids(post_ids)
+    if not ids:
+        return 0
+
+    posts = tabela_posts(tabela)
+    _criar_tabelas(conn, tabela)
+
+    chaves = _chaves_dos_posts(conn, posts, ids)
+    if anteriores is not None and not anteriores.empty:
+        chaves = pd.concat([chaves, anteriores], ignore_index=True)
+    total = 0
+    for perfil, grupo in chaves.groupby("profile"):
+        total += _recalcular_dias(conn, posts, perfil, grupo["date"])
+        total += _recalcular_horas(
+            conn, posts, perfil, zip(grupo["dia_semana"], grupo["hour"])
+        )
+    return total
+
+
+def reconstruir_rollups(db_path: str = SQLITE_DB, tabela: str = "posts") -> int:
+    """Recalcula os agregados do zero a partir de todos os posts."""
+    posts = criar_schema(db_path, tabela)
+    with obter_engine(db_path).begin() as conn:
+        _criar_tabelas(conn, tabela)
+        df = pd.DataFrame(
+            conn.execute(
+                sa.select(
+                    posts.c.profile, posts.c.datetime, posts.c.likes, posts.c.comments
+                )
+            ).all(),
+            columns=["profile", "datetime", *METRICAS],
+        )
+        df = _derivar_chaves(df)
+
+        total = 0
+        for t, chaves in (
+            (tabela_rollup_dia(tabela), ["profile", "date"]),
+            (tabela_rollup_hora(tabela), ["profile", "dia_semana", "hour"]),
+        ):
+            conn.execute(sa.delete(t))
+            agregados = agregar(df, chaves)
+            if not agregados.empty:
+                conn.execute(sa.insert(t), _registros(agregados))
+            total += len(agregados)
+
+    logger.info(f"Rollups reconstruídos: {total} grupos.")
+    return total
+
+
+# -----------------------------------------------------------------------------
+# Consultas
+# -----------------------------------------------------------------------------
+def _ler(db_path: str, tabela: str, query) -> pd.DataFrame:
+    criar_schema(db_path, tabela)
+    engine = obter_engine(db_path)
+    with engine.begin() as conn:
+        _criar_tabelas(conn, tabela)
+    with engine.connect() as conn:
+        return pd.read_sql(query, conn)
+
+
+def rollup_diario(
+    profile: Optional[str] = None,
+    inicio=None,
+    fim=None,
+    db_path: str = SQLITE_DB,
+    tabela: str = "posts",
+) -> pd.DataFrame:
+    """Agregados por perfil x data (`inicio` inclusivo, `fim` exclusivo)."""
+    t = tabela_rollup_dia(tabela)
+    query = sa.select(t)
+    if profile is not None:
+        query = query.where(t.c.profile == profile)
+    if inicio is not None:
+        query = query.where(t.c.date >= pd.Timestamp(inicio).date())
+    if fim is not None:
+        query = query.where(t.c.date < pd.Timestamp(fim).date())
+
+    df = _ler(db_path, tabela, query.order_by(t.c.profile, t.c.date))
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+    return df
+
+
+def rollup_por_hora(
+    profile: Optional[str] = None, db_path: str = SQLITE_DB, tabela: str = "posts"
+) -> pd.DataFrame:
+    """Agregados por perfil x dia da semana (0 = segunda) x hora."""
+    t = tabela_rollup_hora(tabela)
+    query = sa.select(t)
+    if profile is not None:
+        query = query.where(t.c.profile == profile)
+    return _ler(db_path, tabela, query.order_by(t.c.profile, t.c.dia_semana, t.c.hour))
@@ -0,0 +1,453 @@
+"""
+servico_previsao.py
+Serviço HTTP local (asyncio, só biblioteca padrão) de previsão de engajamento.
+
+Dashboards e agendadores pedem previsões sem importar o scikit-learn nem
+treinar nada: o modelo gravado no registro é carregado uma vez e fica em
+memória.
+
+- Micro-lotes: requisições simultâneas entram em uma fila e são agrupadas
+  (até SERVICO_LOTE_MAX linhas ou SERVICO_ESPERA_MS de espera) em uma única
+  chamada vetorizada de prever_em_lote. Enquanto um lote é previsto (em uma
+  thread, sem travar o laço), as requisições seguintes se acumulam para o
+  próximo
+- Conexões keep-alive (HTTP/1.1)
+- Estatísticas: latência p50/p99 e tamanho dos lotes
+
+Rotas:
+    POST /prever              {"linhas": [{"hora_postagem": 19, "dia_semana": 4,
+                                           "hashtag_tendencia": 1, "profile": "x"}]}
+                              -> {"curtidas_previstas": [...]}
+                              (cada feature no domínio do modelo, dia_semana
+                              em 0-6 com 0 = segunda; senão 400 com "campo")
+    GET  /melhores_horarios?perfil=x&n=3
+    GET  /estatisticas
+    GET  /saude
+
+Uso:
+    python -m modules.servico_previsao --porta 8765
+
+Configuração via .env:
+    SERVICO_HOST=127.0.0.1
+    SERVICO_PORTA=8765
+    SERVICO_LOTE_MAX=512
+    SERVICO_ESPERA_MS=2
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from modules.estatisticas import percentil
+
+logger = logging.getLogger(__name__)
+
+SERVICO_HOST = os.getenv("SERVICO_HOST", "127.0.0.1")
+SERVICO_PORTA = int(os.getenv("SERVICO_PORTA", "8765"))
+SERVICO_LOTE_MAX = int(os.getenv("SERVICO_LOTE_MAX", "512"))
+SERVICO_ESPERA_MS = float(os.getenv("SERVICO_ESPERA_MS", "2"))
+
+TAMANHO_MAX_CORPO = 1 << 20
+
+STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class CampoInvalido(ValueError):
+    """Valor de feature fora do domínio do modelo em uma linha de /prever."""
+
+    def __init__(self, campo: str, mensagem: str):
+        super().__init__(mensagem)
+        self.campo = campo
+
+
+# -----------------------------------------------------------------------------
+# Micro-lotes
+# -----------------------------------------------------------------------------
+class MicroLotes:
+    """
+    Agrupa pedidos de previsão (DataFrames) em lotes para `prever`, uma
+    função síncrona DataFrame -> array executada em uma thread dedicada.
+    """
+
+    def __init__(
+        self,
+        prever,
+        lote_max: int = SERVICO_LOTE_MAX,
+        espera_ms: float = SERVICO_ESPERA_MS,
+    ):
+        self.prever = prever
+        self.lote_max = lote_max
+        self.espera_s = espera_ms / 1000
+        self._fila: Optional[asyncio.Queue] = None
+        self._tarefa: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="micro-lotes")
+        self.tamanhos = deque(maxlen=10_000)
+
+    def iniciar(self) -> None:
+        self._fila = asyncio.Queue()
+        self._tarefa = asyncio.get_running_loop().create_task(self._laco())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def submeter(self, df):
+        """Previsões para as linhas de `df`, calculadas no próximo lote."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((df, futuro))
+        return await futuro
+
+    async def _coletar(self) -> List[Tuple[object, asyncio.Future]]:
+        pedidos = [await self._fila.get()]
+        linhas = len(pedidos[0][0])
+        limite = time.perf_counter() + self.espera_s
+
+        while linhas < self.lote_max:
+            if not self._fila.empty():
+                pedido = self._fila.get_nowait()
+            else:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    pedido = await asyncio.wait_for(self._fila.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+            pedidos.append(pedido)
+            linhas += len(pedido[0])
+        return pedidos
+
+    async def _laco(self) -> None:
+        import pandas as pd
+
+        loop = asyncio.get_running_loop()
+        while True:
+            pedidos = await self._coletar()
+            pedidos = [(df, f) for df, f in pedidos if not f.cancelled()]
+            if not pedidos:
+                continue
+
+            lote = pd.concat([df for df, _ in pedidos], ignore_index=True)
+            self.tamanhos.append(len(lote))
+            try:
+                previstas = await loop.run_in_executor(
+                    self._executor, self.prever, lote
+                )
+            except Exception as e:
+                for _, futuro in pedidos:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+
+            inicio = 0
+            for df, futuro in pedidos:
+                fim = inicio + len(df)
+                if not futuro.done():
+                    futuro.set_result(previstas[inicio:fim])
+                inicio = fim
+
+
+# -----------------------------------------------------------------------------
+# Serviço
+# -----------------------------------------------------------------------------
+class ServicoPrevisao:
+    """
+    Uso (bloqueante):
+        ServicoPrevisao(porta=8765).servir()
+
+    Ou em segundo plano, no mesmo processo:
+        servico = ServicoPrevisao(porta=0).iniciar_em_thread()
+        ... servico.url ...
+        servico.parar()
+    """
+
+    def __init__(
+        self,
+        host: str = SERVICO_HOST,
+        porta: int = SERVICO_PORTA,
+        registro=None,
+        lote_max: int = SERVICO_LOTE_MAX,
+        espera_ms: float = SERVICO_ESPERA_MS,
+    ):
+        from modules.registro_modelos import registro_padrao
+
+        self.host = host
+        self.porta = porta
+        self.registro = registro or registro_padrao()
+        self.lotes = MicroLotes(self._prever, lote_max, espera_ms)
+        self.latencias = deque(maxlen=10_000)
+        self.stats = {"requisicoes": 0, "linhas": 0, "erros": 0}
+
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pronto = threading.Event()
+        self._parar: Optional[asyncio.Event] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.porta}"
+
+    # --- previsão ------------------------------------------------------------
+    def _prever(self, df):
+        from modules.otimizacao_engajamento import prever_em_lote
+
+        return prever_em_lote(df, self.registro)
+
+    def _como_dataframe(self, corpo: bytes):
+        import pandas as pd
+
+        from modules.otimizacao_engajamento import FEATURES, VALORES_FEATURES
+
+        try:
+            dados = json.loads(corpo or b"{}")
+        except ValueError:
+            raise ValueError("Corpo não é um JSON válido.")
+        linhas = dados.get("linhas", [dados]) if isinstance(dados, dict) else dados
+        if not isinstance(linhas, list) or not linhas:
+            raise ValueError("Informe 'linhas' com ao menos uma linha.")
+
+        df = pd.DataFrame(linhas)
+        faltando = [f for f in FEATURES if f not in df.columns]
+        if faltando:
+            raise ValueError(f"Colunas ausentes: {', '.join(faltando)}")
+
+        # Cada feature dentro do domínio do modelo (dia_semana em 0-6, 0 = segunda)
+        valores = {}
+        for f in FEATURES:
+            coluna = pd.to_numeric(df[f], errors="coerce")
+            dominio = list(VALORES_FEATURES[f])
+            invalidas = ~coluna.isin(dominio)
+            if invalidas.any():
+                i = int(invalidas.to_numpy().argmax())
+                raise CampoInvalido(
+                    f,
+                    f"Linha {i}: {f}={linhas[i].get(f)!r} fora de "
+                    f"{min(dominio)}-{max(dominio)}",
+                )
+            valores[f] = coluna.astype("int64")
+        colunas = FEATURES + (["profile"] if "profile" in df.columns else [])
+        return df[colunas].assign(**valores)
+
+    # --- rotas ---------------------------------------------------------------
+    async def _rotear(self, metodo: str, alvo: str, corpo: bytes) -> Tuple[int, Dict]:
+        partes = urlsplit(alvo)
+        rota = partes.path.rstrip("/") or "/"
+
+        if rota == "/prever" and metodo == "POST":
+            df = self._como_dataframe(corpo)
+            previstas = await self.lotes.submeter(df)
+            self.stats["linhas"] += len(df)
+            return 200, {"curtidas_previstas": [float(v) for v in previstas]}
+
+        if rota == "/melhores_horarios" and metodo == "GET":
+            from modules.melhores_horarios import melhores_horarios
+
+            params = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+            tendencia = params.get("hashtag_tendencia")
+            melhores = await asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: melhores_horarios(
+                    params.get("perfil"),
+                    n=int(params.get("n", 3)),
+                    hashtag_tendencia=int(tendencia) if tendencia else None,
+                    registro=self.registro,
+                ),
+            )
+            return 200, {"horarios": json.loads(melhores.to_json(orient="records"))}
+
+        if rota == "/estatisticas" and metodo == "GET":
+            return 200, self.estatisticas()
+
+        if rota == "/saude" and metodo == "GET":
+            return 200, {"ok": True}
+
+        return 404, {"erro": f"Rota não encontrada: {metodo} {partes.path}"}
+
+    async def _responder(
+        self, metodo: str, alvo: str, corpo: bytes
+    ) -> Tuple[int, Dict]:
+        inicio = time.perf_counter()
+        try:
+            status, resposta = await self._rotear(metodo, alvo, corpo)
+        except CampoInvalido as e:
+            status, resposta = 400, {"erro": str(e), "campo": e.campo}
+        except (ValueError, KeyError) as e:
+            status, resposta = 400, {"erro": str(e)}
+        except FileNotFoundError as e:
+            status, resposta = 503, {"erro": f"Nenhum modelo treinado: {e}"}
+        except Exception as e:
+            logger.exception(f"Erro ao atender {metodo} {alvo}")
+            status, resposta = 500, {"erro": str(e)}
+
+        if status >= 400:
+            self.stats["erros"] += 1
+        if alvo.startswith("/prever"):
+            self.stats["requisicoes"] += 1
+            self.latencias.append((time.perf_counter() - inicio) * 1000)
+        return status, resposta
+
+    # --- HTTP ----------------------------------------------------------------
+    async def _atender(self, reader, writer) -> None:
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, alvo, _ = linha.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+
+                cabecalhos = {}
+                while True:
+                    cabecalho = await reader.readline()
+                    if cabecalho in (b"\r\n", b"\n", b""):
+                        break
+                    nome, _, valor = cabecalho.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                tamanho = int(cabecalhos.get("content-length") or 0)
+                fechar = cabecalhos.get("connection", "").lower() == "close"
+                if tamanho > TAMANHO_MAX_CORPO:
+                    status, resposta = 413, {"erro": "Corpo grande demais."}
+                    fechar = True
+                else:
+                    corpo = await reader.readexactly(tamanho) if tamanho else b""
+                    status, resposta = await self._responder(metodo, alvo, corpo)
+
+                dados = json.dumps(resposta, ensure_ascii=False).encode()
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+                        "Content-Type: application/json; charset=utf-8\r\n"
+                        f"Content-Length: {len(dados)}\r\n"
+                        + ("Connection: close\r\n" if fechar else "")
+                        + "\r\n"
+                    ).encode()
+                    + dados
+                )
+                await writer.drain()
+                if fechar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # --- ciclo de vida -------------------------------------------------------
+    async def _executar(self) -> None:
+        from modules.otimizacao_engajamento import carregar_modelo_engajamento
+
+        self._loop = asyncio.get_running_loop()
+        self._parar = asyncio.Event()
+        try:
+            # Carrega o modelo global antes da primeira requisição
+            carregar_modelo_engajamento(self.registro)
+        except FileNotFoundError:
+            logger.warning("Nenhum modelo de engajamento treinado ainda.")
+
+        self.lotes.iniciar()
+        self._servidor = await asyncio.start_server(
+            self._atender, self.host, self.porta
+        )
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+        logger.info(f"Serviço de previsão em {self.url}")
+        self._pronto.set()
+        try:
+            await self._parar.wait()
+        finally:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            await self.lotes.parar()
+
+    def servir(self) -> None:
+        """Atende até Ctrl+C (ou parar())."""
+        try:
+            asyncio.run(self._executar())
+        except KeyboardInterrupt:
+            pass
+
+    def iniciar_em_thread(self, timeout: float = 10.0) -> "ServicoPrevisao":
+        self._thread = threading.Thread(
+            target=self.servir, name="servico-previsao", daemon=True
+        )
+        self._thread.start()
+        if not self._pronto.wait(timeout):
+            raise RuntimeError("Serviço de previsão não iniciou a tempo.")
+        return self
+
+    def parar(self) -> None:
+        if self._loop is not None and self._parar is not None:
+            self._loop.call_soon_threadsafe(self._parar.set)
+        if self._thread is not None:
+            self._thread.join()
+
+    def estatisticas(self) -> Dict:
+        """Requisições, latência (ms) de /prever e tamanho dos lotes (linhas)."""
+        latencias, tamanhos = list(self.latencias), list(self.lotes.tamanhos)
+        return {
+            **self.stats,
+            "lotes": len(tamanhos),
+            "latencia_p50_ms": percentil(latencias, 0.50),
+            "latencia_p99_ms": percentil(latencias, 0.99),
+            "lote_medio": round(sum(tamanhos) / len(tamanhos), 2) if tamanhos else None,
+            "lote_p50": percentil(tamanhos, 0.50),
+            "lote_max": max(tamanhos, default=None),
+        }
+
+
+# -----------------------------------------------------------------------------
+# Cliente
+# -----------------------------------------------------------------------------
+def prever_remoto(
+    linhas: List[Dict], url: str = f"http://{SERVICO_HOST}:{SERVICO_PORTA}"
+) -> List[float]:
+    """Curtidas previstas pelo serviço para `linhas` (dicionários de features)."""
+    import urllib.request
+
+    requisicao = urllib.request.Request(
+        f"{url}/prever",
+        data=json.dumps({"linhas": linhas}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(requisicao, timeout=30) as resposta:
+        return json.loads(resposta.read())["curtidas_previstas"]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serviço local de previsão")
+    parser.add_argument("--host", default=SERVICO_HOST)
+    parser.add_argument("--porta", type=int, default=SERVICO_PORTA)
+    parser.add_argument("--lote-max", type=int, default=SERVICO_LOTE_MAX)
+    parser.add_argument("--espera-ms", type=float, default=SERVICO_ESPERA_MS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ServicoPrevisao(args.host, args.porta, None, args.lote_max, args.espera_ms).servir()
@@ -0,0 +1,257 @@
+"""
+sessoes_instagram.py
+Pool de sessões do Instaloader reaproveitadas entre chamadas.
+
+Em processos de longa duração (daemon, serviço), criar um Instaloader e
+recarregar o arquivo de sessão a cada coleta desperdiça tempo e requisições.
+O pool mantém as instâncias "aquecidas":
+
+- Várias sessões (vários arquivos .session), usadas em round-robin para
+  distribuir o limite de requisições entre contas
+- Verificação periódica de saúde (`test_login`) e recarga de sessões expiradas
+- Quarentena temporária de sessões que receberam 429 ou falharam
+- Login e verificação fora do lock: uma sessão lenta não trava as demais
+- Uma instância anônima por thread para coletas sem login
+- Todas as instâncias passam pelo limitador de taxa compartilhado da coleta
+
+Configuração via .env:
+    SESSION_FILES=usuario1:data/s1.session,usuario2:data/s2.session
+    (sem SESSION_FILES, usa INSTAGRAM_USER + SESSION_FILE)
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import logging
+import threading
+from typing import Optional, List, Tuple, Callable, Dict
+
+import instaloader
+
+from modules.coleta_instagram import (
+    INSTAGRAM_USER,
+    SESSION_FILE,
+    LimitadorTaxa,
+    _criar_instaloader,
+    aplicar_limitador,
+    autenticar_instagram,
+    limitador_padrao,
+)
+
+logger = logging.getLogger(__name__)
+
+SESSION_FILES = os.getenv("SESSION_FILES", "")
+INTERVALO_VERIFICACAO = float(os.getenv("SESSION_INTERVALO_VERIFICACAO", "600"))
+
+
+def sessoes_configuradas() -> List[Tuple[Optional[str], str]]:
+    """Lista (usuario, arquivo) a partir de SESSION_FILES ou SESSION_FILE."""
+    sessoes = []
+    for item in SESSION_FILES.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        usuario, sep, arquivo = item.partition(":")
+        if not sep:
+            usuario, arquivo = INSTAGRAM_USER, item
+        sessoes.append((usuario or INSTAGRAM_USER, arquivo))
+
+    return sessoes or [(INSTAGRAM_USER, SESSION_FILE)]
+
+
+class _Sessao:
+    def __init__(self, usuario: Optional[str], arquivo: str):
+        self.usuario = usuario
+        self.arquivo = arquivo
+        self.loader: Optional[instaloader.Instaloader] = None
+        self.verificada_em = 0.0
+        self.quarentena_ate = 0.0
+        self.preparando = False
+        self.usos = 0
+        self.falhas = 0
+
+
+class PoolSessoes:
+    """
+    Mantém instâncias do Instaloader vivas e as distribui em round-robin.
+
+    `fabrica(usuario, arquivo)` cria um Instaloader autenticado; por padrão
+    usa `autenticar_instagram`, que carrega o arquivo de sessão ou faz login.
+    Toda instância devolvida passa pelo `limitador` (por padrão, o
+    limitador_padrao() da coleta).
+    """
+
+    def __init__(
+        self,
+        sessoes: Optional[List[Tuple[Optional[str], str]]] = None,
+        fabrica: Optional[Callable[[Optional[str], str], object]] = None,
+        fabrica_anonima: Callable[[], object] = _criar_instaloader,
+        intervalo_verificacao: float = INTERVALO_VERIFICACAO,
+        limitador: Optional[LimitadorTaxa] = None,
+    ):
+        if fabrica is None:
+            fabrica = lambda usuario, arquivo: autenticar_instagram(  # noqa: E731
+                session_file=arquivo, usuario=usuario
+            )
+
+        self.fabrica = fabrica
+        self.fabrica_anonima = fabrica_anonima
+        self.intervalo_verificacao = intervalo_verificacao
+        self.limitador = limitador
+
+        self._sessoes = [_Sessao(u, a) for u, a in (sessoes or sessoes_configuradas())]
+        self._proxima = 0
+        self._anonimos = threading.local()
+        self._lock = threading.Lock()
+        self._pronta = threading.Condition(self._lock)
+
+    # -------------------------------------------------------------------------
+    # Obtenção de instâncias
+    # -------------------------------------------------------------------------
+    def obter(
+        self, autenticado: bool = True, limitador: Optional[LimitadorTaxa] = None
+    ):
+        """
+        Retorna a próxima instância saudável (ou a anônima da thread), ligada
+        a `limitador` (ou ao limitador do pool).
+        """
+        if autenticado:
+            loader = self._obter_autenticado()
+        else:
+            loader = self._obter_anonimo()
+        return aplicar_limitador(
+            loader, limitador or self.limitador or limitador_padrao()
+        )
+
+    def _obter_anonimo(self):
+        # Uma instância por thread: o Instaloader não é seguro entre threads
+        loader = getattr(self._anonimos, "loader", None)
+        if loader is None:
+            loader = self._anonimos.loader = self.fabrica_anonima()
+        return loader
+
+    def _escolher(self, agora: float, falharam: set) -> Optional[_Sessao]:
+        """Próxima sessão fora de quarentena e que não está sendo preparada."""
+        n = len(self._sessoes)
+        for _ in range(n):
+            sessao = self._sessoes[self._proxima]
+            self._proxima = (self._proxima + 1) % n
+            if (
+                sessao.quarentena_ate <= agora
+                and not sessao.preparando
+                and sessao not in falharam
+            ):
+                return sessao
+        return None
+
+    def _obter_autenticado(self):
+        falharam = set()  # cada sessão é tentada no máximo uma vez por chamada
+        while True:
+            with self._lock:
+                sessao = self._escolher(time.monotonic(), falharam)
+                while sessao is None and any(s.preparando for s in self._sessoes):
+                    # Todas as disponíveis estão sendo criadas/verificadas
+                    self._pronta.wait()
+                    sessao = self._escolher(time.monotonic(), falharam)
+                if sessao is None:
+                    raise RuntimeError(
+                        "Nenhuma sessão do Instagram disponível no pool."
+                    )
+
+                atual = sessao.loader
+                agora = time.monotonic()
+                verificar = agora - sessao.verificada_em >= self.intervalo_verificacao
+                if atual is not None and not verificar:
+                    sessao.usos += 1
+                    return atual
+                sessao.preparando = True
+
+            # Login e test_login fazem requisições: fora do lock, para não
+            # bloquear as threads que pedem outras sessões
+            try:
+                loader = self._preparar(sessao, atual)
+            except Exception as e:
+                logger.warning(f"Sessão {sessao.arquivo} indisponível: {e}")
+                falharam.add(sessao)
+                with self._lock:
+                    sessao.preparando = False
+                    self._quarentena(sessao, self.intervalo_verificacao)
+                    self._pronta.notify_all()
+                continue
+
+            with self._lock:
+                sessao.loader = loader
+                sessao.verificada_em = time.monotonic()
+                sessao.preparando = False
+                sessao.usos += 1
+                self._pronta.notify_all()
+                return loader
+
+    def _preparar(self, sessao: _Sessao, atual):
+        """Cria a instância na primeira vez ou a recria se expirou."""
+        if atual is None:
+            return self.fabrica(sessao.usuario, sessao.arquivo)
+
+        if not self._saudavel(atual):
+            logger.info(f"Sessão {sessao.arquivo} expirada; recarregando.")
+            return self.fabrica(sessao.usuario, sessao.arquivo)
+
+        return atual
+
+    @staticmethod
+    def _saudavel(loader) -> bool:
+        context = getattr(loader, "context", None)
+        if context is None or not getattr(context, "is_logged_in", False):
+            # Sessões anônimas não expiram
+            return True
+        try:
+            return loader.test_login() is not None
+        except Exception:
+            return False
+
+    # -------------------------------------------------------------------------
+    # Falhas
+    # -------------------------------------------------------------------------
+    def _quarentena(self, sessao: _Sessao, segundos: float) -> None:
+        sessao.falhas += 1
+        sessao.quarentena_ate = time.monotonic() + segundos
+
+    def marcar_falha(self, loader, segundos: float = 300.0) -> None:
+        """Tira a sessão de uso por `segundos` (ex.: após um 429)."""
+        with self._lock:
+            for sessao in self._sessoes:
+                if sessao.loader is loader:
+                    self._quarentena(sessao, segundos)
+                    # Força verificação quando voltar da quarentena
+                    sessao.verificada_em = 0.0
+
+    def estatisticas(self) -> List[Dict]:
+        with self._lock:
+            agora = time.monotonic()
+            return [
+                {
+                    "usuario": s.usuario,
+                    "arquivo": s.arquivo,
+                    "ativa": s.loader is not None,
+                    "em_quarentena": s.quarentena_ate > agora,
+                    "usos": s.usos,
+                    "falhas": s.falhas,
+                }
+                for s in self._sessoes
+            ]
+
+
+_pool_padrao: Optional[PoolSessoes] = None
+_pool_lock = threading.Lock()
+
+
+def pool_padrao() -> PoolSessoes:
+    """Pool compartilhado pelo processo, configurado pelo .env."""
+    global _pool_padrao
+    with _pool_lock:
+        if _pool_padrao is None:
+            _pool_padrao = PoolSessoes()
+        return _pool_padrao
@@ -0,0 +1,155 @@
+"""
+sink_posts.py
+Destinos incrementais (sinks) para gravar posts em lotes durante a coleta.
+
+Permite coletar perfis muito grandes com memória constante: cada lote é
+gravado assim que fica pronto, e uma falha no meio da coleta perde no
+máximo o lote corrente.
+
+Formatos suportados (pela extensão do caminho):
+- .csv                      -> append no mesmo arquivo
+- .parquet                  -> um row group por lote (requer pyarrow)
+- .db / .sqlite / .sqlite3  -> upsert em lotes no SQLite (armazenamento_posts.py)
+
+Com `indice` (IndiceVistos ou diretório, ver indice_vistos.py), posts já
+gravados em execuções anteriores são descartados antes da escrita. No
+SQLite isso também deixa de atualizar as métricas dos posts já vistos.
+
+Autor: Leonardo França
+"""
+
+from __future__ import annotations
+
+import os
+import logging
+from typing import Optional
+
+import pandas as pd
+
+from modules.posts import como_dataframe
+
+logger = logging.getLogger(__name__)
+
+_EXTENSOES_SQLITE = (".db", ".sqlite", ".sqlite3")
+
+
+class SinkPosts:
+    """
+    Grava DataFrames de posts incrementalmente em CSV, Parquet ou SQLite.
+
+    Uso:
+        with SinkPosts("data/posts.csv") as sink:
+            for chunk in coletar_posts_em_chunks("perfil", chunk_size=500):
+                sink.escrever(chunk)
+    """
+
+    def __init__(
+        self, caminho: str, anexar: bool = False, tabela: str = "posts", indice=None
+    ):
+        from modules.indice_vistos import IndiceVistos, abrir_indice
+
+        self.caminho = caminho
+        self.anexar = anexar
+        self.tabela = tabela
+        self.total = 0
+        self.descartados = 0
+
+        self._indice_proprio = indice is not None and not isinstance(
+            indice, IndiceVistos
+        )
+        self.indice = abrir_indice(indice)
+
+        ext = os.path.splitext(caminho)[1].lower()
+        if ext == ".csv":
+            self.formato = "csv"
+        elif ext == ".parquet":
+            self.formato = "parquet"
+        elif ext in _EXTENSOES_SQLITE:
+            self.formato = "sqlite"
+        else:
+            raise ValueError(f"Formato de sink não suportado: {caminho}")
+
+        if self.formato == "parquet" and anexar and os.path.exists(caminho):
+            raise ValueError("Parquet não permite anexar; use CSV ou SQLite.")
+
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+
+        self._iniciado = False
+        self._writer = None
+        self._schema = None
+
+    def escrever(self, df: pd.DataFrame) -> None:
+        """Grava um lote de posts (DataFrame ou PostBatch) no destino."""
+        df = como_dataframe(df)
+        if df is None or df.empty:
+            return
+
+        if self.indice is not None:
+            n = len(df)
+            df = self.indice.filtrar_novos(df)
+            self.descartados += n - len(df)
+            if df.empty:
+                return
+
+        if self.formato == "csv":
+            self._escrever_csv(df)
+        elif self.formato == "parquet":
+            self._escrever_parquet(df)
+        else:
+            self._escrever_sqlite(df)
+
+        self._iniciado = True
+        self.total += len(df)
+
+    def _escrever_csv(self, df: pd.DataFrame) -> None:
+        continuar = self._iniciado or (self.anexar and os.path.exists(self.caminho))
+        df.to_csv(
+            self.caminho,
+            mode="a" if continuar else "w",
+            header=not continuar,
+            index=False,
+            encoding="utf-8",
+        )
+
+    def _escrever_parquet(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._schema = tabela.schema
+            self._writer = pq.ParquetWriter(self.caminho, self._schema)
+        else:
+            tabela = tabela.cast(self._schema)
+        self._writer.write_table(tabela)
+
+    def _escrever_sqlite(self, df: pd.DataFrame) -> None:
+        from modules.armazenamento_posts import upsert_posts
+
+        upsert_posts(df, db_path=self.caminho, tabela=self.tabela)
+
+    def fechar(self) -> None:
+        """Finaliza o arquivo Parquet e grava o índice de vistos, se próprio."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._indice_proprio:
+            self.indice.salvar()
+
+        extra = (
+            f" ({self.descartados} duplicados descartados)" if self.descartados else ""
+        )
+        logger.info(f"✅ {self.total} posts gravados em {self.caminho}{extra}")
+
+    def __enter__(self) -> "SinkPosts":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+def abrir_sink(destino, anexar: bool = False) -> Optional[SinkPosts]:
+    """Aceita um caminho ou um SinkPosts já aberto."""
+    if destino is None or isinstance(destino, SinkPosts):
+        return destino
+    return SinkPosts(str(destino), anexar=anexar)
@@ -7,12 +7,12 @@ Autor: Leonardo França
 Data: 11-11-2025
 """
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
+from __future__ import annotations
 
-# Define um estilo dark tecnológico com grade suave e cores neon
-plt.style.use("dark_background")
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Paleta personalizada com tons de neon / AI
 
@@ -26,14 +26,26 @@ def plotar_graficos_posts(df: pd.DataFrame):
     Parâmetros:
     ----------
     df.pd.DataFrame
-        DataFrame com as colunas ['shortcode', 'post_date', 'likes', 'comments']
+        DataFrame com as colunas ['shortcode', 'post_date', 'likes', 'comments'],
+        ou um PostBatch / lista de Post (normalizados por modelo.criar_dataframe_posts)
 
     """
+    if not hasattr(df, "empty"):  # PostBatch ou lista de Post
+        from modules.modelo import criar_dataframe_posts
+
+        df = criar_dataframe_posts(df)
 
     if df.empty:
         print("[AVISO] DataFrame vazio - nenhum gráfico será gerado.")
         return
 
+    # matplotlib/seaborn só são carregados quando há gráfico a gerar
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Define um estilo dark tecnológico com grade suave e cores neon
+    plt.style.use("dark_background")
+
     # --- Configuração visual global ---
     sns.set(
         style="whitegrid",
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.registro_modelos import RegistroModelos
+
+
+def _dados(n=400, semente=0, pico=19, dia_inicial=0):
+    """
+    Linhas do modelo de engajamento: curtidas com pico em `pico` horas e
+    bônus para hashtag em tendência. `dia_inicial=1` gera dia_semana em 1-7
+    (como data/posts_exemplo.csv) em vez de 0-6.
+    """
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame(
+        {
+            "hora_postagem": rng.integers(0, 24, n),
+            "dia_semana": rng.integers(0, 7, n) + dia_inicial,
+            "hashtag_tendencia": rng.integers(0, 2, n),
+        }
+    )
+    df["curtidas"] = (
+        1000 - (df["hora_postagem"] - pico) ** 2 + 50 * df["hashtag_tendencia"]
+    )
+    return df
+
+
+@pytest.fixture
+def dados():
+    """Fábrica de DataFrames de treino: dados(n, semente, pico, dia_inicial)."""
+    return _dados
+
+
+@pytest.fixture
+def registro(tmp_path):
+    return RegistroModelos(str(tmp_path / "modelos"))
@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+
+from modules.agendador import Agendador, tarefas_configuradas
+
+
+def _esperar(condicao, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, "tempo esgotado"
+        time.sleep(0.01)
+
+
+def test_tarefas_configuradas():
+    assert tarefas_configuradas("a:900, b ,", intervalo_padrao=60) == {
+        "a": 900.0,
+        "b": 60,
+    }
+
+
+def test_limite_global_de_concorrencia():
+    lock = threading.Lock()
+    rodando = {"agora": 0, "max": 0}
+    coletados = []
+
+    def coletar(perfil):
+        with lock:
+            rodando["agora"] += 1
+            rodando["max"] = max(rodando["max"], rodando["agora"])
+        time.sleep(0.05)
+        with lock:
+            rodando["agora"] -= 1
+            coletados.append(perfil)
+
+    with Agendador(coletar, max_concorrencia=2) as agendador:
+        for i in range(6):
+            agendador.adicionar(f"p{i}", intervalo=3600)
+        _esperar(lambda: len(coletados) == 6)
+        stats = agendador.estatisticas()
+
+    assert rodando["max"] == 2
+    assert stats["sucessos"] == 6
+    assert stats["fila"] == 0
+    assert stats["latencia_p50"] >= 0.05
+
+
+def test_reexecuta_no_intervalo_e_chama_callback():
+    concluidos = []
+    agendador = Agendador(
+        lambda perfil: len(concluidos),
+        ao_concluir=lambda perfil, resultado: concluidos.append(resultado),
+    )
+
+    with agendador:
+        agendador.adicionar("a", intervalo=0.02)
+        _esperar(lambda: len(concluidos) >= 3)
+
+    assert concluidos[:3] == [0, 1, 2]
+
+
+def test_backoff_apos_falhas():
+    tentativas = []
+
+    def falhar(perfil):
+        tentativas.append(time.monotonic())
+        raise ConnectionError("429")
+
+    with Agendador(falhar, backoff_base=0.05, backoff_max=0.2) as agendador:
+        agendador.adicionar("a", intervalo=3600)
+        _esperar(lambda: len(tentativas) >= 3)
+        tarefa = agendador.tarefas()[0]
+
+    assert tarefa["falhas_seguidas"] >= 2
+    assert tarefa["ultimo_erro"] == "429"
+    intervalos = [b - a for a, b in zip(tentativas, tentativas[1:])]
+    # 1ª espera: 0.05 * [0.5, 1.5]; 2ª: 0.1 * [0.5, 1.5]
+    assert intervalos[0] >= 0.025
+    assert intervalos[1] >= 0.05
+
+
+def test_coletar_e_armazenar_usa_o_banco_como_marca(tmp_path, monkeypatch):
+    """
+    A coleta grava em lotes e para na marca gravada no banco; se um lote
+    falhar no meio, a marca não avança e a execução seguinte refaz a coleta.
+    """
+    import datetime
+    from types import SimpleNamespace
+
+    from modules import armazenamento_posts, coleta_instagram
+    from modules.agendador import coletar_e_armazenar
+
+    def _post(i):
+        return SimpleNamespace(
+            mediaid=i,
+            shortcode=f"P{i}",
+            caption="",
+            date_utc=datetime.datetime(2025, 1, 1) + datetime.timedelta(days=i),
+            likes=i,
+            comments=0,
+            is_video=False,
+        )
+
+    posts = {"lista": [_post(i) for i in range(6, 0, -1)]}
+    monkeypatch.setattr(
+        coleta_instagram.instaloader.Profile,
+        "from_username",
+        lambda context, username: SimpleNamespace(
+            get_posts=lambda: iter(posts["lista"])
+        ),
+    )
+    db = str(tmp_path / "posts.db")
+    upsert = armazenamento_posts.upsert_posts
+    lotes = []
+
+    def upsert_quebra_no_segundo(df, *args, **kwargs):
+        lotes.append(list(df["post_id"]))
+        if len(lotes) == 2:
+            raise RuntimeError("disco cheio")
+        return upsert(df, *args, **kwargs)
+
+    # Primeira coleta interrompida: o lote mais novo foi gravado, a marca não
+    monkeypatch.setattr(armazenamento_posts, "upsert_posts", upsert_quebra_no_segundo)
+    with pytest.raises(RuntimeError):
+        coletar_e_armazenar("perfil", db, chunk_size=2)
+    assert lotes == [[6, 5], [4, 3]]
+    assert armazenamento_posts.marca_coleta("perfil", db) is None
+    monkeypatch.setattr(armazenamento_posts, "upsert_posts", upsert)
+
+    assert coletar_e_armazenar("perfil", db, chunk_size=2) == 6
+    assert armazenamento_posts.marca_coleta("perfil", db)["post_id"] == 6
+
+    posts["lista"] = [_post(i) for i in range(8, 0, -1)]
+    assert coletar_e_armazenar("perfil", db, chunk_size=2) == 2
+    assert armazenamento_posts.contar_posts(db) == 8
+
+
+def test_perfil_readicionado_durante_a_coleta_nao_roda_em_dobro():
+    lock = threading.Lock()
+    liberar = threading.Event()
+    rodando = {"agora": 0, "max": 0, "total": 0}
+
+    def coletar(perfil):
+        with lock:
+            rodando["agora"] += 1
+            rodando["total"] += 1
+            rodando["max"] = max(rodando["max"], rodando["agora"])
+        liberar.wait(5)
+        with lock:
+            rodando["agora"] -= 1
+
+    with Agendador(coletar, max_concorrencia=2) as agendador:
+        agendador.adicionar("a", intervalo=0.01)
+        _esperar(lambda: rodando["total"] == 1)
+        agendador.remover("a")
+        agendador.adicionar("a", intervalo=0.01)
+        time.sleep(0.1)
+        assert rodando["max"] == 1
+        liberar.set()
+        _esperar(lambda: rodando["total"] >= 2)
+
+    assert rodando["max"] == 1
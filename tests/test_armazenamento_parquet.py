@@ -0,0 +1,141 @@
+import os
+import datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from modules.armazenamento_parquet import (
+    carregar_parquet,
+    carregar_posts,
+    detectar_encoding,
+    gravar_parquet,
+    migrar_csv_para_parquet,
+)
+
+
+def _posts(perfil, n, inicio=datetime.datetime(2025, 1, 15)):
+    return pd.DataFrame(
+        {
+            "profile": perfil,
+            "post_id": range(n),
+            "shortcode": [f"{perfil}{i}" for i in range(n)],
+            "caption": [f"post {i}" for i in range(n)],
+            "datetime": [inicio + datetime.timedelta(days=10 * i) for i in range(n)],
+            "likes": range(n),
+            "comments": range(n),
+            "is_video": [i % 2 == 0 for i in range(n)],
+        }
+    )
+
+
+def test_particiona_por_perfil_e_mes(tmp_path):
+    diretorio = str(tmp_path / "ds")
+    gravar_parquet(_posts("a", 6), diretorio)
+    gravar_parquet(_posts("b", 3), diretorio)
+
+    assert sorted(os.listdir(diretorio)) == ["profile=a", "profile=b"]
+    assert "mes=2025-01" in os.listdir(os.path.join(diretorio, "profile=a"))
+
+    df = carregar_parquet(diretorio)
+    assert len(df) == 9
+    assert df["post_id"].dtype == "int64"
+    assert df["is_video"].dtype == bool
+    assert "mes" not in df.columns
+
+
+def test_filtros_e_projecao(tmp_path):
+    diretorio = str(tmp_path / "ds")
+    gravar_parquet(_posts("a", 12), diretorio)
+    gravar_parquet(_posts("b", 12), diretorio)
+
+    df = carregar_parquet(
+        diretorio,
+        profile="a",
+        inicio="2025-02-01",
+        fim="2025-03-01",
+        colunas=["post_id", "datetime", "likes"],
+    )
+
+    assert list(df.columns) == ["post_id", "datetime", "likes"]
+    assert df["datetime"].between("2025-02-01", "2025-03-01").all()
+    assert len(df) == 3
+    assert df["datetime"].is_monotonic_decreasing
+
+
+def _arquivos(diretorio):
+    return {
+        os.path.join(raiz, nome)
+        for raiz, _, nomes in os.walk(diretorio)
+        for nome in nomes
+        if nome.endswith(".parquet")
+    }
+
+
+def test_migracao_unica_e_refeita_quando_csv_muda(tmp_path):
+    csv = tmp_path / "posts.csv"
+    _posts("a", 4).to_csv(csv, index=False)
+    diretorio = str(tmp_path / "ds")
+
+    migrar_csv_para_parquet(str(csv), diretorio)
+    arquivos = _arquivos(diretorio)
+    migrar_csv_para_parquet(str(csv), diretorio)
+    assert _arquivos(diretorio) == arquivos
+
+    # CSV reescrito com outro conteúdo: migração completa
+    _posts("b", 6).to_csv(csv, index=False)
+    migrar_csv_para_parquet(str(csv), diretorio)
+    df = carregar_parquet(diretorio)
+    assert len(df) == 6
+    assert set(df["profile"]) == {"b"}
+
+
+def test_migracao_so_das_linhas_anexadas(tmp_path):
+    csv = tmp_path / "posts.csv"
+    posts = _posts("a", 6)
+    posts[:4].to_csv(csv, index=False)
+    diretorio = str(tmp_path / "ds")
+
+    migrar_csv_para_parquet(str(csv), diretorio)
+    arquivos = _arquivos(diretorio)
+
+    posts[4:].to_csv(csv, mode="a", header=False, index=False)
+    migrar_csv_para_parquet(str(csv), diretorio)
+
+    # Os arquivos da primeira migração continuam lá; só os novos foram gravados
+    assert arquivos < _arquivos(diretorio)
+    df = carregar_parquet(diretorio)
+    assert sorted(df["post_id"]) == list(range(6))
+    assert df["date"].tolist() == df["datetime"].dt.date.tolist()
+
+
+def test_csv_latin1_e_formato_livre(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "modules.armazenamento_parquet.PARQUET_DIR", str(tmp_path / "parquet")
+    )
+    csv = tmp_path / "exemplo.csv"
+    csv.write_bytes("shortcode,likes\nação,10\nb,20\n".encode("latin-1"))
+
+    assert detectar_encoding(str(csv)) == "latin-1"
+    df = carregar_posts(str(csv))
+    assert sorted(df["shortcode"]) == ["ação", "b"]
+
+
+def test_linhas_anexadas_na_ordem_e_com_o_mesmo_schema(tmp_path):
+    csv = tmp_path / "exemplo.csv"
+    csv.write_text("hora_postagem,curtidas\n10,150\n12,80\n")
+    diretorio = str(tmp_path / "ds")
+    migrar_csv_para_parquet(str(csv), diretorio)
+
+    with open(csv, "a") as f:
+        f.write("15,\n18,300\n")  # valor ausente na parte anexada
+    migrar_csv_para_parquet(str(csv), diretorio)
+
+    df = carregar_parquet(diretorio)
+    assert df["hora_postagem"].tolist() == [10, 12, 15, 18]
+    assert df["curtidas"].dtype == "float64"
+    assert df["curtidas"].isna().tolist() == [False, False, True, False]
+    tipos = {
+        str(pq.read_schema(arquivo).field("curtidas").type)
+        for arquivo in _arquivos(diretorio)
+    }
+    assert tipos == {"int64"}
@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from modules.armazenamento_posts import (
+    consultar_posts,
+    contar_posts,
+    fechar_engines,
+    obter_engine,
+    ultimo_post,
+    upsert_posts,
+)
+from modules.coleta_instagram import coletar_simulado
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "posts.db")
+    fechar_engines()
+
+
+def test_upsert_nao_duplica_e_atualiza(db_path):
+    """
+    Regravar os mesmos posts atualiza as métricas sem duplicar linhas.
+    """
+    df = coletar_simulado(5)
+    df["profile"] = "perfil"
+    upsert_posts(df, db_path=db_path)
+
+    df["likes"] = df["likes"] + 1
+    upsert_posts(df, db_path=db_path)
+
+    assert contar_posts(db_path) == 5
+    armazenado = consultar_posts(db_path, colunas=["post_id", "likes"])
+    assert sorted(armazenado["likes"]) == sorted(df["likes"])
+
+
+def test_consultas_filtram_no_sql(db_path):
+    """
+    Filtros por perfil e período são aplicados pelo banco.
+    """
+    a = coletar_simulado(4).assign(profile="a")
+    b = coletar_simulado(3).assign(profile="b", post_id=lambda d: d["post_id"] + 100)
+    upsert_posts(pd.concat([a, b]), db_path=db_path)
+
+    df = consultar_posts(db_path, profile="a", inicio=a["datetime"].iloc[1])
+    assert set(df["profile"]) == {"a"}
+    assert len(df) == 2
+    assert pd.api.types.is_datetime64_any_dtype(df["datetime"])
+    assert ultimo_post("b", db_path)["post_id"] == 1100
+
+
+def test_ultimo_post_ignora_datas_nulas(db_path):
+    sem_data = coletar_simulado(2).assign(profile="a", datetime=pd.NaT)
+    upsert_posts(sem_data, db_path=db_path)
+    assert ultimo_post("a", db_path) is None
+
+    com_data = coletar_simulado(1).assign(profile="a", post_id=999)
+    upsert_posts(com_data, db_path=db_path)
+    assert ultimo_post("a", db_path)["post_id"] == 999
+
+
+def test_schema_wal_e_indices(db_path):
+    """
+    O banco deve usar WAL e ter os índices de consulta.
+    """
+    upsert_posts(coletar_simulado(1).assign(profile="a"), db_path=db_path)
+    engine = obter_engine(db_path)
+
+    with engine.connect() as conn:
+        modo = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    indices = {i["name"] for i in sa.inspect(engine).get_indexes("posts")}
+
+    assert engine is obter_engine(db_path)
+    assert modo == "wal"
+    assert {"ix_posts_profile_datetime", "ix_posts_shortcode"} <= indices
+
+
+def test_migra_tabela_legada_sem_chave(db_path):
+    """
+    Bancos gravados com to_sql(append) são migrados e deduplicados.
+    """
+    df = coletar_simulado(3).assign(profile="a")
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    pd.concat([df, df]).to_sql("posts", engine, index=False)
+    engine.dispose()
+
+    upsert_posts(df, db_path=db_path)
+
+    assert contar_posts(db_path) == 3
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.busca_hiperparametros import (
+    CacheAvaliacoes,
+    atribuir_folds,
+    buscar,
+    hash_linhas,
+)
+from modules.otimizacao_engajamento import prever_engajamento
+
+OPCOES = {"modelos": ["gbm"], "n_candidatos": 4, "k": 3, "n_jobs": 1}
+
+
+def _xy(df):
+    return df.drop(columns="curtidas"), df["curtidas"]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheAvaliacoes(str(tmp_path / "busca"))
+
+
+def test_folds_estaveis_com_linhas_novas(dados):
+    df = dados()
+    maior = pd.concat([df, dados(50, semente=1)], ignore_index=True)
+
+    folds = atribuir_folds(hash_linhas(*_xy(df)), 5)
+    folds_maior = atribuir_folds(hash_linhas(*_xy(maior)), 5)
+    np.testing.assert_array_equal(folds_maior[: len(df)], folds)
+    assert set(folds) == set(range(5))
+
+
+def test_busca_reaproveita_cache(cache, tmp_path, dados):
+    X, y = _xy(dados())
+    primeira = buscar(X, y, cache=cache, **OPCOES)
+    assert primeira.avaliacoes > 0 and primeira.melhor_r2 > 0.9
+
+    # Outro processo com o mesmo diretório: nada é treinado de novo
+    segunda = buscar(X, y, cache=CacheAvaliacoes(str(tmp_path / "busca")), **OPCOES)
+    assert segunda.avaliacoes == 0
+    assert segunda.do_cache == primeira.avaliacoes + primeira.do_cache
+    assert segunda.melhores_params == primeira.melhores_params
+
+
+def test_dados_novos_reavaliam_so_os_finalistas(cache, dados):
+    primeira = buscar(*_xy(dados()), modo="halving", cache=cache, **OPCOES)
+    assert not primeira.so_finalistas
+
+    maior = pd.concat([dados(), dados(50, semente=1)], ignore_index=True)
+    segunda = buscar(*_xy(maior), modo="halving", cache=cache, **OPCOES)
+    assert segunda.so_finalistas
+    assert segunda.rodadas == 1
+    assert segunda.avaliacoes < primeira.avaliacoes
+
+    completa = buscar(
+        *_xy(maior),
+        modo="halving",
+        cache=cache,
+        reaproveitar_finalistas=False,
+        **OPCOES
+    )
+    assert not completa.so_finalistas
+    assert completa.avaliacoes > segunda.avaliacoes
+
+
+def test_orcamento_esgotado(cache, dados):
+    with pytest.raises(TimeoutError):
+        buscar(*_xy(dados()), orcamento_s=0, cache=cache, **OPCOES)
+
+
+def test_prever_engajamento_com_ajuste(registro, cache, dados):
+    df = dados()
+    _, r2 = prever_engajamento(
+        df, registro=registro, ajustar=True, opcoes_busca={**OPCOES, "cache": cache}
+    )
+    assert r2 > 0.9
+
+    meta = registro.mais_recente("engajamento")
+    assert meta["classe"] == "HistGradientBoostingRegressor"
+    assert meta["busca"]["modelos"] == ["gbm"]
+
+    # Mesmos dados e opções: o modelo gravado é reaproveitado sem nova busca
+    modelo, _ = prever_engajamento(
+        df, registro=registro, ajustar=True, opcoes_busca={**OPCOES, "cache": cache}
+    )
+    assert len(registro.listar("engajamento")) == 1
+    assert type(modelo).__name__ == "HistGradientBoostingRegressor"
+
+
+def test_poucos_dados(cache, dados):
+    # data/posts_exemplo.csv tem 5 linhas: erro claro em vez de fold vazio
+    with pytest.raises(ValueError, match="Poucos dados"):
+        buscar(*_xy(dados(5)), cache=cache, **{**OPCOES, "k": 5})
+
+    # Com 12 linhas e k=5, folds vazios ou de 1 linha ficam de fora
+    X, y = _xy(dados(12))
+    folds = atribuir_folds(hash_linhas(X, y), 5)
+    assert (np.bincount(folds, minlength=5) < 2).any()
+
+    resultado = buscar(X, y, cache=cache, **{**OPCOES, "k": 5})
+    assert 2 <= resultado.folds < 5
+    assert np.isfinite(resultado.melhor_r2)
+    assert np.isfinite(resultado.resultados["r2_medio"]).all()
@@ -0,0 +1,103 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules.cache_http import CacheRespostas, RespostaNaoEmCache, instalar_cache
+
+
+class ContextoFalso:
+    """
+    Simula o InstaloaderContext contando as requisições de rede.
+    """
+
+    def __init__(self):
+        self.requisicoes = 0
+
+    def get_json(
+        self,
+        path,
+        params,
+        host="www.instagram.com",
+        session=None,
+        _attempt=1,
+        response_headers=None,
+    ):
+        self.requisicoes += 1
+        return {"path": path, "pagina": params.get("after"), "dados": "x" * 100}
+
+
+def _loader(cache):
+    return instalar_cache(SimpleNamespace(context=ContextoFalso()), cache)
+
+
+def test_cache_evita_requisicoes_repetidas(tmp_path):
+    """
+    A segunda chamada idêntica deve ser servida do disco.
+    """
+    cache = CacheRespostas(str(tmp_path), ttl=60)
+    L = _loader(cache)
+
+    r1 = L.context.get_json("graphql/query", {"after": "abc"})
+    r2 = L.context.get_json("graphql/query", {"after": "abc"})
+    L.context.get_json("graphql/query", {"after": "def"})
+
+    assert r1 == r2
+    assert L.context.requisicoes == 2
+    assert cache.stats["acertos"] == 1
+
+
+def test_cache_expira_pelo_ttl(tmp_path):
+    """
+    Entradas expiradas são buscadas novamente (exceto no modo offline).
+    """
+    cache = CacheRespostas(str(tmp_path), ttl=0.01)
+    L = _loader(cache)
+    L.context.get_json("p", {})
+    time.sleep(0.05)
+    L.context.get_json("p", {})
+    assert L.context.requisicoes == 2
+
+    offline = _loader(CacheRespostas(str(tmp_path), ttl=0.01, modo="offline"))
+    assert offline.context.get_json("p", {})["path"] == "p"
+    assert offline.context.requisicoes == 0
+    with pytest.raises(RespostaNaoEmCache):
+        offline.context.get_json("nunca-gravado", {})
+
+
+def test_cache_remove_lru_ao_exceder_tamanho(tmp_path):
+    """
+    Ao exceder o tamanho máximo, as entradas menos usadas são removidas.
+    """
+    cache = CacheRespostas(str(tmp_path), tamanho_max_mb=600 / 1024 / 1024)
+    L = _loader(cache)
+
+    L.context.get_json("a", {})
+    L.context.get_json("b", {})
+    antiga = cache._caminho(cache.chave("www.instagram.com", "a", {}))
+    os.utime(antiga, (0, 0))
+    L.context.get_json("c", {})
+    L.context.get_json("d", {})
+
+    assert cache.tamanho_bytes <= 600
+    assert not os.path.exists(antiga)
+    assert cache.stats["removidos"] >= 1
+
+
+def test_cache_separa_sessoes(tmp_path):
+    """
+    Respostas de uma sessão autenticada não são servidas à anônima.
+    """
+    cache = CacheRespostas(str(tmp_path))
+    anonimo = _loader(cache)
+    autenticado = _loader(cache)
+    autenticado.context.username = "conta"
+
+    anonimo.context.get_json("p", {})
+    autenticado.context.get_json("p", {})
+    autenticado.context.get_json("p", {})
+
+    assert anonimo.context.requisicoes == 1
+    assert autenticado.context.requisicoes == 1
+    assert cache.stats["acertos"] == 1
@@ -0,0 +1,133 @@
+import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from modules import coleta_instagram
+from modules.coleta_instagram import carregar_marca_dagua, coletar_posts_publicos
+
+
+class PerfilFalso:
+    """
+    Perfil local que registra quantos posts foram percorridos.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.percorridos = 0
+
+    def get_posts(self):
+        for post in self.posts:
+            self.percorridos += 1
+            yield post
+
+
+def _post(i, pinned=False):
+    return SimpleNamespace(
+        mediaid=i,
+        shortcode=f"P{i}",
+        caption="",
+        date_utc=datetime.datetime(2025, 1, 1) + datetime.timedelta(days=i),
+        likes=i,
+        comments=0,
+        is_video=False,
+        is_pinned=pinned,
+    )
+
+
+@pytest.fixture
+def perfil(monkeypatch):
+    # Mais recente primeiro, com um post antigo fixado no topo
+    estado = {
+        "perfil": PerfilFalso(
+            [_post(0, pinned=True)] + [_post(i) for i in range(5, 0, -1)]
+        )
+    }
+    monkeypatch.setattr(
+        coleta_instagram.instaloader.Profile,
+        "from_username",
+        lambda context, username: estado["perfil"],
+    )
+    return estado
+
+
+def test_coleta_incremental_para_no_post_conhecido(perfil, tmp_path):
+    """
+    A segunda execução deve coletar apenas os posts novos e anexar ao CSV.
+    """
+    estado_path = str(tmp_path / "estado.json")
+    csv_path = str(tmp_path / "posts.csv")
+    kwargs = dict(
+        max_posts=None,
+        csv_path=csv_path,
+        loader=SimpleNamespace(context=None),
+        incremental=True,
+        estado_path=estado_path,
+    )
+
+    df = coletar_posts_publicos("perfil", **kwargs)
+    assert len(df) == 6
+    assert carregar_marca_dagua("perfil", estado_path)["post_id"] == 5
+
+    perfil["perfil"] = PerfilFalso(
+        [_post(0, pinned=True), _post(7), _post(6)]
+        + [_post(i) for i in range(5, 0, -1)]
+    )
+    df_novo = coletar_posts_publicos("perfil", **kwargs)
+
+    assert list(df_novo["post_id"]) == [7, 6]
+    assert perfil["perfil"].percorridos == 4
+    assert carregar_marca_dagua("perfil", estado_path)["post_id"] == 7
+    assert len(pd.read_csv(csv_path)) == 8
+
+
+def test_coleta_em_chunks_grava_cada_lote(perfil, tmp_path):
+    """
+    Cada lote deve ser gravado no sink antes de ser devolvido.
+    """
+    from modules.coleta_instagram import coletar_posts_em_chunks
+
+    csv_path = tmp_path / "posts.csv"
+    chunks = coletar_posts_em_chunks(
+        "perfil",
+        chunk_size=2,
+        loader=SimpleNamespace(context=None),
+        sink=str(csv_path),
+    )
+
+    primeiro = next(chunks)
+    assert len(primeiro) == 2
+    assert len(pd.read_csv(csv_path)) == 2
+
+    restantes = list(chunks)
+    assert [len(c) for c in restantes] == [2, 2]
+    assert len(pd.read_csv(csv_path)) == 6
+
+
+def test_coleta_incremental_cortada_nao_avanca_marca(perfil, tmp_path):
+    """
+    Uma execução cortada por max_posts antes da marca não pode pular os
+    posts entre o corte e a marca.
+    """
+    estado_path = str(tmp_path / "estado.json")
+    kwargs = dict(
+        save_csv=False,
+        loader=SimpleNamespace(context=None),
+        incremental=True,
+        estado_path=estado_path,
+    )
+    coletar_posts_publicos("perfil", max_posts=None, **kwargs)
+    assert carregar_marca_dagua("perfil", estado_path)["post_id"] == 5
+
+    perfil["perfil"] = PerfilFalso([_post(i) for i in range(10, 0, -1)])
+    df = coletar_posts_publicos("perfil", max_posts=2, **kwargs)
+
+    assert list(df["post_id"]) == [10, 9]
+    assert carregar_marca_dagua("perfil", estado_path)["post_id"] == 5
+
+    # Com folga suficiente, a execução alcança a marca e a avança
+    df = coletar_posts_publicos("perfil", max_posts=5, **kwargs)
+
+    assert list(df["post_id"]) == [10, 9, 8, 7, 6]
+    assert carregar_marca_dagua("perfil", estado_path)["post_id"] == 10
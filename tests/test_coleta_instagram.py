@@ -1,16 +1,41 @@
-import pytest
-import pandas as pd
-from modules.coleta_instagram import coletar_posts_publicos
-import sys
+import json
 import os
 
-sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pandas as pd
+import pytest
+
+from modules.cache_http import CacheRespostas, instalar_cache
+from modules.coleta_instagram import _criar_instaloader, coletar_posts_publicos
+
+# Respostas gravadas do Instagram (host, path, params, usuario, resposta),
+# servidas pelo cache em modo offline: o teste não acessa a rede
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), "fixtures", "instagram_respostas.json"
+)
 
-def test_coleta_publica_pequena():
+
+@pytest.fixture
+def loader_offline(tmp_path):
+    cache = CacheRespostas(str(tmp_path / "cache"), modo="offline")
+    with open(FIXTURE, encoding="utf-8") as f:
+        for gravacao in json.load(f):
+            chave = cache.chave(
+                gravacao["host"],
+                gravacao["path"],
+                gravacao["params"],
+                gravacao["usuario"],
+            )
+            cache.gravar(chave, gravacao["resposta"])
+    return instalar_cache(_criar_instaloader(), cache)
+
+
+def test_coleta_publica_pequena(loader_offline):
     """
     Testa a coleta de poucos posts públicos e valida estrutura do DataFrame retornado.
     """
-    df = coletar_posts_publicos("instagram", max_posts=5, save_csv=False)
+    df = coletar_posts_publicos(
+        "instagram", max_posts=5, save_csv=False, loader=loader_offline
+    )
 
     # Testa se dataframe foi retornardo.
 
@@ -18,19 +43,16 @@ def test_coleta_publica_pequena():
     assert isinstance(df, pd.DataFrame)
 
     # Testa tamanho do DataFrame:
-    assert len(df) <=5
+    assert len(df) == 5
 
-    #Testa se colunas essenciais existem:
+    # Testa se colunas essenciais existem:
 
-    for col in ["shortcode", "post_date", "likes"]:
+    for col in ["shortcode", "datetime", "likes"]:
         assert col in df.columns
 
-
     # Testa tipos de dados:
-    assert pd.api.types.is_object_dtype(df["shortcode"])
+    assert pd.api.types.is_string_dtype(df["shortcode"])
     assert pd.api.types.is_integer_dtype(df["likes"])
 
-
     # Testa se não há duplicatas
     assert df["shortcode"].is_unique, "Existem shortcodes duplicados no DataFrame!"
-
@@ -0,0 +1,180 @@
+import datetime
+import time
+from types import SimpleNamespace
+
+import instaloader
+import pandas as pd
+import pytest
+
+from modules import coleta_instagram
+from modules.coleta_instagram import LimitadorTaxa, coletar_varios_perfis
+
+
+def _post_falso(i):
+    return SimpleNamespace(
+        mediaid=1000 + i,
+        shortcode=f"POST_{i}",
+        caption=f"Legenda {i}",
+        date_utc=datetime.datetime(2025, 11, 1) - datetime.timedelta(days=i),
+        likes=i * 10,
+        comments=i,
+        is_video=False,
+    )
+
+
+class PerfilFalso:
+    def __init__(self, username, n_posts):
+        self.username = username
+        self.n_posts = n_posts
+
+    def get_posts(self):
+        return (_post_falso(i) for i in range(self.n_posts))
+
+
+@pytest.fixture
+def perfis_falsos(monkeypatch):
+    """
+    Substitui o Profile do Instaloader por um backend local.
+    """
+    chamadas = {}
+
+    def from_username(context, username):
+        chamadas[username] = chamadas.get(username, 0) + 1
+        if username == "inexistente":
+            raise instaloader.exceptions.ProfileNotExistsException(username)
+        if username == "instavel" and chamadas[username] == 1:
+            raise instaloader.exceptions.ConnectionException("timeout")
+        return PerfilFalso(username, 3)
+
+    monkeypatch.setattr(
+        coleta_instagram.instaloader.Profile, "from_username", from_username
+    )
+    return chamadas
+
+
+def test_coleta_varios_perfis_mescla_resultados(perfis_falsos):
+    """
+    Verifica se os posts de todos os perfis são mesclados com a coluna `profile`.
+    """
+    df, stats = coletar_varios_perfis(
+        ["a", "b", "c"],
+        max_posts=2,
+        max_workers=3,
+        requisicoes_por_segundo=1000,
+        save_csv=False,
+        loader_factory=lambda: SimpleNamespace(context=None),
+    )
+
+    assert isinstance(df, pd.DataFrame)
+    assert len(df) == 6
+    assert set(df["profile"]) == {"a", "b", "c"}
+    assert list(stats["profile"]) == ["a", "b", "c"]
+    assert stats["erro"].isna().all()
+    assert (stats["segundos"] >= 0).all()
+
+
+def test_coleta_varios_perfis_erros_e_retentativas(perfis_falsos):
+    """
+    Garante que falhas transitórias são retentadas e falhas definitivas registradas.
+    """
+    df, stats = coletar_varios_perfis(
+        ["instavel", "inexistente"],
+        max_workers=2,
+        requisicoes_por_segundo=1000,
+        backoff_base=0.01,
+        save_csv=False,
+        loader_factory=lambda: SimpleNamespace(context=None),
+    )
+    stats = stats.set_index("profile")
+
+    assert set(df["profile"]) == {"instavel"}
+    assert stats.loc["instavel", "tentativas"] == 2
+    assert pd.isna(stats.loc["instavel", "erro"])
+    assert stats.loc["inexistente", "tentativas"] == 1
+    assert "ProfileNotExists" in stats.loc["inexistente", "erro"]
+
+
+def test_limitador_taxa_respeita_intervalo():
+    """
+    O limitador deve espaçar as requisições de acordo com a taxa configurada.
+    """
+    limitador = LimitadorTaxa(requisicoes_por_segundo=20)
+
+    inicio = time.monotonic()
+    for _ in range(5):
+        limitador.aguardar()
+
+    assert time.monotonic() - inicio >= 4 / 20 * 0.9
+
+
+def test_coleta_varios_perfis_com_backend_fake():
+    """
+    Contra o backend local com erros simulados, cada perfil termina completo
+    ou com o erro registrado nas estatísticas.
+    """
+    from modules.instagram_fake import BackendFake
+
+    backend = BackendFake({f"p{i}": 30 for i in range(6)}, taxa_erro=0.05, seed=1)
+
+    with backend.ativar():
+        df, stats = coletar_varios_perfis(
+            list(backend.perfis),
+            max_posts=None,
+            max_workers=3,
+            requisicoes_por_segundo=1000,
+            max_tentativas=4,
+            backoff_base=0.001,
+            save_csv=False,
+            loader_factory=backend.loader,
+        )
+
+    contagem = df.groupby("profile").size()
+    for _, linha in stats.iterrows():
+        if pd.isna(linha["erro"]):
+            assert contagem[linha["profile"]] == 30
+        else:
+            assert linha["profile"] not in contagem
+    assert backend.requisicoes > 6 * 3
+    assert df["post_id"].is_unique
+
+
+def test_sessoes_do_pool_usam_limitador_e_quarentena(monkeypatch):
+    """
+    As sessões do pool recebem o limitador compartilhado, e a que recebe um
+    429 sai do rodízio.
+    """
+    from modules import sessoes_instagram
+    from modules.sessoes_instagram import PoolSessoes
+
+    def from_username(context, username):
+        if context.usuario == "bloqueada":
+            raise instaloader.exceptions.TooManyRequestsException("429")
+        return PerfilFalso(username, 3)
+
+    monkeypatch.setattr(
+        coleta_instagram.instaloader.Profile, "from_username", from_username
+    )
+    pool = PoolSessoes(
+        [("bloqueada", "b.session"), ("ok", "ok.session")],
+        fabrica=lambda usuario, arquivo: SimpleNamespace(
+            context=SimpleNamespace(usuario=usuario, is_logged_in=False)
+        ),
+        intervalo_verificacao=60,
+    )
+    monkeypatch.setattr(sessoes_instagram, "_pool_padrao", pool)
+    limitador = LimitadorTaxa(requisicoes_por_segundo=1000)
+
+    df, stats = coletar_varios_perfis(
+        ["a"],
+        max_workers=1,
+        backoff_base=0.001,
+        save_csv=False,
+        use_session=True,
+        limitador=limitador,
+    )
+
+    assert len(df) == 3
+    assert stats.loc[0, "tentativas"] == 2
+    quarentena = {s["usuario"]: s["em_quarentena"] for s in pool.estatisticas()}
+    assert quarentena == {"bloqueada": True, "ok": False}
+    assert all(s.loader.context.limitador is limitador for s in pool._sessoes)
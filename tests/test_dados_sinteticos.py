@@ -0,0 +1,21 @@
+from modules.dados_sinteticos import gerar_dados_engajamento, gerar_dados_sinteticos
+from modules.otimizacao_engajamento import ALVO, FEATURES
+
+
+def test_gerar_dados_sinteticos():
+    df = gerar_dados_sinteticos(30, salvar_csv=False, semente=1)
+    assert len(df) == 30
+    assert (df["engajamento"] == df["likes"] * 0.7 + df["comentarios"] * 1.3).all()
+
+
+def test_gerar_dados_engajamento():
+    df = gerar_dados_engajamento(50_000, semente=0)
+    assert set(FEATURES + [ALVO]) <= set(df.columns)
+    assert df["hora_postagem"].between(0, 23).all()
+    assert df["dia_semana"].between(0, 6).all()
+    assert (df["curtidas"] >= 0).all()
+
+    # Reprodutível e com o pico de audiência à noite
+    assert df.equals(gerar_dados_engajamento(50_000, semente=0))
+    por_hora = df.groupby("hora_postagem")["curtidas"].mean()
+    assert por_hora.idxmax() in (18, 19, 20)
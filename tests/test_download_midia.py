@@ -0,0 +1,105 @@
+import json
+import threading
+from types import SimpleNamespace
+
+from modules.download_midia import BaixadorMidia
+
+
+class LoaderFalso:
+    """
+    Simula o Instaloader gravando um arquivo por post em `target`.
+    """
+
+    baixados = []
+    lock = threading.Lock()
+
+    def download_post(self, post, target):
+        with open(f"{target}/{post.shortcode}.jpg", "wb") as f:
+            f.write(post.conteudo)
+        with self.lock:
+            self.baixados.append(post.shortcode)
+        return True
+
+
+def _post(shortcode, conteudo=None):
+    return SimpleNamespace(shortcode=shortcode, conteudo=conteudo or shortcode.encode())
+
+
+def test_baixador_ignora_existentes_e_duplicados(tmp_path):
+    """
+    Mídias já existentes são ignoradas e conteúdos idênticos descartados.
+    """
+    media_dir = tmp_path / "midia"
+    media_dir.mkdir()
+    (media_dir / "JA_EXISTE.jpg").write_bytes(b"x")
+    LoaderFalso.baixados = []
+
+    with BaixadorMidia(str(media_dir), max_workers=1, loader_factory=LoaderFalso) as b:
+        assert b.enfileirar(_post("A"))
+        assert not b.enfileirar(_post("JA_EXISTE"))
+        assert not b.enfileirar(_post("A"))
+        b.enfileirar(_post("B", conteudo=b"A"))
+
+    assert sorted(LoaderFalso.baixados) == ["A", "B"]
+    assert b.stats == {"baixados": 1, "ignorados": 2, "duplicados": 1, "erros": 0}
+    assert not (media_dir / "B.jpg").exists()
+
+
+def test_manifesto_permite_retomar(tmp_path):
+    """
+    Posts pendentes no manifesto de uma execução interrompida são retomados.
+    """
+    media_dir = tmp_path / "midia"
+    media_dir.mkdir()
+    with open(media_dir / "manifesto.jsonl", "w") as f:
+        f.write(json.dumps({"shortcode": "OK", "status": "pendente"}) + "\n")
+        f.write(json.dumps({"shortcode": "OK", "status": "ok", "sha256": []}) + "\n")
+        f.write(json.dumps({"shortcode": "PARCIAL", "status": "pendente"}) + "\n")
+        f.write('{"shortcode": "TRUNC')
+
+    b = BaixadorMidia(str(media_dir), loader_factory=LoaderFalso)
+
+    assert b.pendentes == ["PARCIAL"]
+    assert not b.enfileirar(_post("OK"))
+
+
+def test_temp_parcial_nao_conta_como_baixado(tmp_path):
+    """
+    Arquivos .temp de um download interrompido não impedem o novo download.
+    """
+    media_dir = tmp_path / "midia"
+    media_dir.mkdir()
+    (media_dir / "PARCIAL.jpg.temp").write_bytes(b"x")
+    (media_dir / "PARCIAL_X.jpg").write_bytes(b"outro post")
+    LoaderFalso.baixados = []
+
+    with BaixadorMidia(str(media_dir), max_workers=1, loader_factory=LoaderFalso) as b:
+        assert b.enfileirar(_post("PARCIAL"))
+
+    assert LoaderFalso.baixados == ["PARCIAL"]
+    assert (media_dir / "PARCIAL.jpg").exists()
+
+
+def test_erro_no_worker_nao_trava_finalizar(tmp_path):
+    """
+    Exceções fora do download (ex.: ao criar o loader) não matam o worker.
+    """
+
+    def fabrica_quebrada():
+        raise RuntimeError("sem rede")
+
+    b = BaixadorMidia(
+        str(tmp_path), max_workers=1, tamanho_fila=1, loader_factory=fabrica_quebrada
+    ).iniciar()
+
+    def enfileirar_e_finalizar():
+        for shortcode in ("A", "B", "C"):
+            b.enfileirar(_post(shortcode))
+        b.finalizar()
+
+    t = threading.Thread(target=enfileirar_e_finalizar, daemon=True)
+    t.start()
+    t.join(10)
+
+    assert not t.is_alive()
+    assert b.stats["erros"] == 3
@@ -0,0 +1,7 @@
+from modules.estatisticas import percentil
+
+
+def test_percentil():
+    assert percentil([], 0.5) is None
+    assert percentil([3, 1, 2], 0.5) == 2
+    assert percentil(range(100), 0.99) == 99
@@ -0,0 +1,136 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from modules import features
+from modules.armazenamento_posts import fechar_engines, upsert_posts
+from modules.features import (
+    carregar_features,
+    construir_features,
+    dataset_engajamento,
+    definir_tendencias,
+    reconstruir_features,
+    treinar_engajamento,
+)
+from modules.registro_modelos import RegistroModelos
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("HASHTAGS_TENDENCIA", "verao")
+    yield str(tmp_path / "posts.db")
+    fechar_engines()
+
+
+def _posts(ids, perfil="a", likes=None):
+    # 2025-11-03 é uma segunda-feira; um post a cada 5 horas
+    base = datetime.datetime(2025, 11, 3)
+    return pd.DataFrame(
+        {
+            "post_id": ids,
+            "profile": perfil,
+            "datetime": [base + datetime.timedelta(hours=5 * i) for i in ids],
+            "likes": likes if likes is not None else [10 * (i + 1) for i in ids],
+            "comments": [i for i in ids],
+            "caption": [f"Dia {i} #Verao #praia @amiga" if i % 2 else "" for i in ids],
+            "is_video": [i % 3 == 0 for i in ids],
+        }
+    )
+
+
+def test_construir_features():
+    df = construir_features(_posts(list(range(4))), tendencias={"verao"}, janela=2)
+
+    assert df["hora_postagem"].tolist() == [0, 5, 10, 15]
+    assert df["dia_semana"].tolist() == [0, 0, 0, 0]
+    assert df["hashtag_tendencia"].tolist() == [0, 1, 0, 1]
+    assert df["n_hashtags"].tolist() == [0, 2, 0, 2]
+    assert df["n_mencoes"].tolist() == [0, 1, 0, 1]
+    assert df["tipo_midia"].tolist() == [1, 0, 0, 1]
+    assert df["hashtags"].iloc[1] == "verao praia"
+    # Médias dos 2 posts anteriores, sem o próprio post
+    assert df["media_curtidas_perfil"].tolist()[1:] == [10.0, 15.0, 25.0]
+    assert pd.isna(df["media_curtidas_perfil"].iloc[0])
+
+
+def test_upsert_mantem_features_iguais_a_reconstrucao(db_path):
+    upsert_posts(_posts(list(range(30))), db_path)
+    upsert_posts(_posts(list(range(100, 120)), perfil="b"), db_path)
+
+    # Métricas atualizadas de um post antigo: ele e os seguintes mudam
+    upsert_posts(_posts([5], likes=[5000]), db_path)
+    incremental = carregar_features(db_path)
+    assert incremental.loc[incremental["post_id"] == 6, "media_curtidas_perfil"].iloc[
+        0
+    ] == pytest.approx((5000 + 50 + 40 + 30 + 20 + 10) / 6)
+
+    reconstruir_features(db_path)
+    pd.testing.assert_frame_equal(incremental, carregar_features(db_path))
+
+
+def test_so_posts_alterados_sao_recalculados(db_path, monkeypatch):
+    upsert_posts(_posts(list(range(40))), db_path)
+
+    calculados = []
+    original = features.construir_features
+
+    def espiao(posts, *a, **k):
+        resultado = original(posts, *a, **k)
+        calculados.append(len(resultado))
+        return resultado
+
+    monkeypatch.setattr(features, "construir_features", espiao)
+
+    # Re-coleta sem mudanças: nada é recalculado
+    upsert_posts(_posts(list(range(30, 40))), db_path)
+    assert calculados == []
+
+    # Post novo no fim: só ele (mais a janela anterior, como contexto)
+    upsert_posts(_posts([40]), db_path)
+    assert calculados == [1 + features.JANELA_PERFIL]
+
+
+def test_tendencias_e_dataset_do_modelo(db_path, tmp_path):
+    upsert_posts(_posts(list(range(60))), db_path)
+
+    df = dataset_engajamento(db_path)
+    assert list(df.columns) == [
+        "hora_postagem",
+        "dia_semana",
+        "hashtag_tendencia",
+        "curtidas",
+    ]
+    assert df["hashtag_tendencia"].sum() == 30
+
+    definir_tendencias(["inverno"], db_path)
+    assert dataset_engajamento(db_path)["hashtag_tendencia"].sum() == 0
+
+    registro = RegistroModelos(str(tmp_path / "modelos"))
+    modelo, _ = treinar_engajamento(db_path, perfil="a", registro=registro)
+    assert registro.mais_recente("engajamento__a")["n_amostras"] == 60
+
+
+def test_posts_sem_perfil_tem_features(db_path):
+    upsert_posts(_posts(list(range(10)), perfil=None), db_path)
+    upsert_posts(_posts([3], perfil=None, likes=[5000]), db_path)
+
+    incremental = carregar_features(db_path)
+    assert len(incremental) == 10
+    assert incremental["profile"].isna().all()
+    reconstruir_features(db_path)
+    pd.testing.assert_frame_equal(incremental, carregar_features(db_path))
+
+
+def test_tendencias_refeitas_quando_o_env_muda(db_path, monkeypatch):
+    upsert_posts(_posts(list(range(10))), db_path)
+    assert dataset_engajamento(db_path)["hashtag_tendencia"].sum() == 5
+
+    monkeypatch.setenv("HASHTAGS_TENDENCIA", "inverno")
+    upsert_posts(_posts([10]), db_path)
+    assert dataset_engajamento(db_path)["hashtag_tendencia"].sum() == 0
+
+    # Uma lista explícita prevalece sobre o .env
+    definir_tendencias(["praia"], db_path)
+    upsert_posts(_posts([11]), db_path)
+    assert dataset_engajamento(db_path)["hashtag_tendencia"].sum() == 6
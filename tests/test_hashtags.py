@@ -0,0 +1,74 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from modules.armazenamento_posts import fechar_engines, upsert_posts
+from modules.hashtags import (
+    extrair_hashtags,
+    extrair_mencoes,
+    posts_com_hashtag,
+    top_hashtags,
+    top_mencoes,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "posts.db")
+    fechar_engines()
+
+
+@pytest.fixture
+def posts():
+    base = datetime.datetime(2025, 11, 1)
+    legendas = [
+        "Lançamento! #IA #Tech com @parceiro.oficial",
+        "Mais um dia #ia #python",
+        "Contato: email@site.com site.com/#ancora #Tech",
+        "Post antigo #retro #ia",
+    ]
+    return pd.DataFrame(
+        {
+            "post_id": [1, 2, 3, 4],
+            "profile": ["a", "a", "b", "a"],
+            "caption": legendas,
+            "datetime": [base, base, base, base - datetime.timedelta(days=90)],
+            "likes": [10, 20, 30, 40],
+        }
+    )
+
+
+def test_extracao_vetorizada(posts):
+    """
+    Hashtags e menções são extraídas em minúsculas, ignorando e-mails e URLs.
+    """
+    hashtags = extrair_hashtags(posts["caption"])
+    mencoes = extrair_mencoes(posts["caption"])
+
+    assert hashtags[0] == ["ia", "tech"]
+    assert hashtags[2] == ["tech"]
+    assert mencoes[0] == ["parceiro.oficial"]
+    assert mencoes[2] == []
+
+
+def test_indice_invertido_consultas(posts, db_path):
+    """
+    O índice é mantido pelo upsert e responde às consultas por perfil e período.
+    """
+    upsert_posts(posts, db_path=db_path)
+    ref = datetime.datetime(2025, 11, 2)
+
+    top = top_hashtags("a", dias=30, db_path=db_path, referencia=ref)
+    assert top.iloc[0].to_dict() == {"termo": "ia", "posts": 2}
+    assert "retro" not in set(top["termo"])
+
+    assert set(posts_com_hashtag("#TECH", db_path)["post_id"]) == {1, 3}
+    assert list(top_mencoes(db_path=db_path, dias=None)["termo"]) == [
+        "parceiro.oficial"
+    ]
+
+    # Legenda editada: termos antigos saem do índice
+    editado = posts.iloc[[1]].assign(caption="Sem tags agora")
+    upsert_posts(editado, db_path=db_path)
+    assert set(posts_com_hashtag("python", db_path)["post_id"]) == set()
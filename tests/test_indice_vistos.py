@@ -0,0 +1,117 @@
+import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from instaloader import Post
+
+from modules import coleta_instagram
+from modules.coleta_instagram import coletar_posts_publicos
+from modules.indice_vistos import IndiceVistos, chave_post
+from modules.sink_posts import SinkPosts
+
+
+def _df(ids):
+    return pd.DataFrame(
+        {"post_id": ids, "shortcode": [f"S{i}" for i in ids], "likes": ids}
+    )
+
+
+def test_shortcode_e_post_id_tem_a_mesma_chave():
+    for shortcode in ["CXyz123AbC_", "B-a9", "A"]:
+        media_id = Post.shortcode_to_mediaid(shortcode)
+        assert chave_post(shortcode=shortcode) == media_id
+        assert chave_post(post_id=media_id) == media_id
+    assert chave_post() is None
+
+
+def test_persiste_entre_execucoes(tmp_path):
+    with IndiceVistos(str(tmp_path)) as indice:
+        novos = indice.filtrar_novos(_df([1, 2, 2, 3]))
+        assert novos["post_id"].tolist() == [1, 2, 3]
+        assert 2 in indice and 4 not in indice
+
+    indice = IndiceVistos(str(tmp_path))
+    assert len(indice) == 3
+    assert indice.filtrar_novos(_df([3, 4]))["post_id"].tolist() == [4]
+    # Post sem post_id reconhecido pelo shortcode
+    shortcode = Post.mediaid_to_shortcode(4)
+    assert indice.contem(shortcode=shortcode)
+    assert indice.contem_muitos([1, 2, 5]).tolist() == [True, True, False]
+
+
+def test_redimensiona_sem_perder_posts(tmp_path):
+    ids = np.arange(1, 5001, dtype=np.uint64) * 7919
+    with IndiceVistos(str(tmp_path), capacidade=100) as indice:
+        indice.adicionar_muitos(ids)
+
+    indice = IndiceVistos(str(tmp_path))
+    assert indice.capacidade >= 5000
+    assert indice.contem_muitos(ids).all()
+    outros = ids + np.uint64(1)
+    assert not indice.contem_muitos(outros).any()
+    assert indice.estatisticas()["taxa_falsos"] < 0.02
+
+
+def test_sink_descarta_duplicados_entre_execucoes(tmp_path):
+    csv_path = str(tmp_path / "posts.csv")
+    dir_indice = str(tmp_path / "indice")
+
+    with SinkPosts(csv_path, indice=dir_indice) as sink:
+        sink.escrever(_df([1, 2, 3]))
+    with SinkPosts(csv_path, anexar=True, indice=dir_indice) as sink:
+        sink.escrever(_df([2, 3, 4]))
+        assert sink.descartados == 2
+
+    assert pd.read_csv(csv_path)["post_id"].tolist() == [1, 2, 3, 4]
+
+
+class PerfilFalso:
+    def __init__(self, posts):
+        self.posts = posts
+        self.percorridos = 0
+
+    def get_posts(self):
+        for post in self.posts:
+            self.percorridos += 1
+            yield post
+
+
+def _post(i):
+    return SimpleNamespace(
+        mediaid=i,
+        shortcode=Post.mediaid_to_shortcode(i),
+        caption="",
+        date_utc=datetime.datetime(2025, 1, 1) + datetime.timedelta(days=i),
+        likes=i,
+        comments=0,
+        is_video=False,
+    )
+
+
+@pytest.fixture
+def perfil(monkeypatch):
+    estado = {}
+    monkeypatch.setattr(
+        coleta_instagram.instaloader.Profile,
+        "from_username",
+        lambda context, username: estado["perfil"],
+    )
+    return estado
+
+
+def test_coleta_pula_posts_ja_vistos(perfil, tmp_path):
+    kwargs = dict(
+        max_posts=None,
+        save_csv=False,
+        loader=SimpleNamespace(context=None),
+        indice=str(tmp_path / "indice"),
+    )
+
+    perfil["perfil"] = PerfilFalso([_post(i) for i in (3, 2, 1)])
+    assert len(coletar_posts_publicos("perfil", **kwargs)) == 3
+
+    perfil["perfil"] = PerfilFalso([_post(i) for i in (5, 4, 3, 2, 1)])
+    df = coletar_posts_publicos("perfil", **kwargs)
+    assert df["post_id"].tolist() == [5, 4]
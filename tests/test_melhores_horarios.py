@@ -0,0 +1,75 @@
+import pytest
+
+from modules.melhores_horarios import DIAS_SEMANA, melhores_horarios, pontuar_grade
+from modules.otimizacao_engajamento import grade_candidatos, prever_engajamento
+
+
+def test_grade_candidatos():
+    grade = grade_candidatos()
+    assert len(grade) == 24 * 7 * 2
+    assert not grade.duplicated().any()
+
+    por_perfil = grade_candidatos(["a", "b"], hashtag_tendencia=[1])
+    assert len(por_perfil) == 2 * 24 * 7
+    assert set(por_perfil["profile"]) == {"a", "b"}
+    assert (por_perfil["hashtag_tendencia"] == 1).all()
+
+
+def test_melhores_horarios_sem_chamar_o_modelo(registro, monkeypatch, dados):
+    prever_engajamento(dados(pico=19), registro=registro)
+
+    melhores = melhores_horarios(n=3, registro=registro)
+    assert melhores["hora_postagem"].tolist() == [19, 19, 19]
+    assert (melhores["hashtag_tendencia"] == 1).all()
+
+    # Com a tabela em cache, responder não usa o modelo
+    monkeypatch.setattr(
+        "sklearn.ensemble.RandomForestRegressor.predict",
+        lambda *a, **k: pytest.fail("não deveria prever"),
+    )
+    sem_hashtag = melhores_horarios(n=1, hashtag_tendencia=0, registro=registro)
+    assert sem_hashtag["hora_postagem"].tolist() == [19]
+    assert sem_hashtag["dia"].iloc[0] in DIAS_SEMANA
+
+
+def test_tabela_atualizada_quando_o_modelo_muda(registro, dados):
+    prever_engajamento(dados(pico=19), registro=registro)
+    assert melhores_horarios(n=1, registro=registro)["hora_postagem"].iloc[0] == 19
+
+    prever_engajamento(dados(pico=8, semente=1), registro=registro)
+    assert melhores_horarios(n=1, registro=registro)["hora_postagem"].iloc[0] == 8
+
+
+def test_modelo_por_perfil_e_pontuacao_em_lote(registro, dados):
+    prever_engajamento(dados(pico=19), registro=registro)
+    prever_engajamento(dados(pico=8, semente=2), registro=registro, perfil="madrugador")
+
+    def melhor_hora(perfil):
+        return melhores_horarios(perfil, n=1, registro=registro)["hora_postagem"][0]
+
+    assert melhor_hora("madrugador") == 8
+    assert melhor_hora("outro") == 19
+
+    grade = pontuar_grade(["madrugador", "outro"], registro=registro)
+    melhores = grade.loc[grade.groupby("profile")["curtidas_previstas"].idxmax()]
+    assert dict(zip(melhores["profile"], melhores["hora_postagem"])) == {
+        "madrugador": 8,
+        "outro": 19,
+    }
+
+
+def test_dias_de_1_a_7_viram_0_a_6(registro, dados):
+    """
+    Planilhas com dia_semana em 1-7 (como data/posts_exemplo.csv) treinam no
+    mesmo domínio da grade: o melhor dia continua sendo o do pico.
+    """
+    df = dados(pico=19, dia_inicial=1)
+    df["curtidas"] += 500 * (df["dia_semana"] == 7)  # pico no domingo
+
+    prever_engajamento(df, registro=registro)
+    melhores = melhores_horarios(n=1, registro=registro)
+    assert melhores["dia_semana"].tolist() == [6]
+    assert melhores["dia"].tolist() == ["dom"]
+
+    with pytest.raises(ValueError, match="dia_semana"):
+        prever_engajamento(df.assign(dia_semana=df["dia_semana"] + 1))
@@ -15,7 +15,7 @@ for path in [PROJECT_ROOT, MODULES_DIR]:
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from modelo import criar_dataframe_posts
+from modelo import criar_dataframe_posts, criar_dataframe_posts_em_chunks
 
 
 @pytest.fixture
@@ -75,3 +75,77 @@ def test_tratamento_dados_invalidos():
     assert isinstance(df, pd.DataFrame)
     assert "shortcode" in df.columns
     assert len(df) == 1
+
+
+def test_datas_fora_do_iso(capsys):
+    """
+    Datas em outros formatos (ex.: DD/MM/YYYY) são convertidas, e as
+    realmente inválidas viram NaT com aviso.
+    """
+    dados = [
+        {"shortcode": "a", "post_date": "2025-11-04", "likes": 1, "comments": 1},
+        {"shortcode": "b", "post_date": "03/11/2025", "likes": 2, "comments": 2},
+        {"shortcode": "c", "post_date": "ontem", "likes": 3, "comments": 3},
+    ]
+    df = criar_dataframe_posts(dados)
+
+    assert list(df["post_date"][:2]) == [
+        pd.Timestamp("2025-11-04"),
+        pd.Timestamp("2025-11-03"),
+    ]
+    assert pd.isna(df["post_date"][2])
+    assert "1 datas inválidas" in capsys.readouterr().out
+
+
+def test_aceita_dataframe_e_tabela_arrow(sample_data):
+    """
+    DataFrames e tabelas Arrow são normalizados sem passar por dicionários.
+    """
+    pa = pytest.importorskip("pyarrow")
+
+    df_bruto = pd.DataFrame(sample_data).assign(extra=1)
+    for entrada in (df_bruto, pa.Table.from_pandas(df_bruto)):
+        df = criar_dataframe_posts(entrada)
+
+        assert list(df.columns) == ["shortcode", "post_date", "likes", "comments"]
+        assert len(df) == 2
+        assert pd.api.types.is_datetime64_any_dtype(df["post_date"])
+
+
+def test_datetime_do_coletor_vira_post_date(sample_data):
+    """
+    Dados do coletor (coluna `datetime`, sem `post_date`) mantêm as datas em
+    DataFrames, tabelas Arrow e registros.
+    """
+    pa = pytest.importorskip("pyarrow")
+
+    df_bruto = pd.DataFrame(sample_data).rename(columns={"post_date": "datetime"})
+    df_bruto["datetime"] = pd.to_datetime(df_bruto["datetime"])
+    entradas = (
+        df_bruto,
+        pa.Table.from_pandas(df_bruto),
+        df_bruto.to_dict("records"),
+    )
+    for entrada in entradas:
+        df = criar_dataframe_posts(entrada)
+
+        assert list(df.columns) == ["shortcode", "post_date", "likes", "comments"]
+        assert df["post_date"].tolist() == list(df_bruto["datetime"])
+
+
+def test_aceita_iteravel_de_chunks(sample_data):
+    chunks = iter([pd.DataFrame(sample_data), [{"shortcode": "z", "likes": "7"}]])
+    df = criar_dataframe_posts(chunks)
+
+    assert list(df["shortcode"]) == ["abc123", "xyz789", "z"]
+    assert df["likes"].tolist() == [100, 230, 7]
+
+
+def test_variante_em_chunks_le_csv(tmp_path, sample_data):
+    csv = tmp_path / "posts.csv"
+    pd.DataFrame(sample_data * 5).to_csv(csv, index=False)
+
+    blocos = list(criar_dataframe_posts_em_chunks(str(csv), tamanho_chunk=4))
+
+    assert [len(b) for b in blocos] == [4, 4, 2]
+    assert all(b["post_date"].notna().all() for b in blocos)
@@ -0,0 +1,93 @@
+import os
+
+import pandas as pd
+import pytest
+
+from modules.pipeline import CacheEstagios, Estagio, Pipeline
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheEstagios(str(tmp_path / "cache"))
+
+
+def _pipeline(csv, cache, chamadas):
+    def carregar(caminho):
+        chamadas.append("carregar")
+        return pd.read_csv(caminho)
+
+    def normalizar(df, fator):
+        chamadas.append("normalizar")
+        return df.assign(likes=df["likes"] * fator)
+
+    def resumir(df):
+        chamadas.append("resumir")
+        return {"total": int(df["likes"].sum())}
+
+    return Pipeline(
+        [
+            Estagio("carregar", carregar, params={"caminho": csv}, arquivos=[csv]),
+            Estagio("normalizar", normalizar, ["carregar"], params={"fator": 2}),
+            Estagio("resumir", resumir, ["normalizar"]),
+        ],
+        cache=cache,
+    )
+
+
+def test_estagios_inalterados_sao_pulados(tmp_path, cache):
+    csv = str(tmp_path / "posts.csv")
+    pd.DataFrame({"likes": [1, 2, 3]}).to_csv(csv, index=False)
+    chamadas = []
+
+    assert _pipeline(csv, cache, chamadas).executar() == {"total": 12}
+    assert chamadas == ["carregar", "normalizar", "resumir"]
+
+    chamadas.clear()
+    pipeline = _pipeline(csv, cache, chamadas)
+    assert pipeline.executar() == {"total": 12}
+    assert chamadas == []
+    assert pipeline.pulados == ["carregar", "normalizar", "resumir"]
+
+
+def test_mudanca_no_csv_invalida_estagios_seguintes(tmp_path, cache):
+    csv = str(tmp_path / "posts.csv")
+    pd.DataFrame({"likes": [1, 2, 3]}).to_csv(csv, index=False)
+    chamadas = []
+    _pipeline(csv, cache, chamadas).executar()
+
+    pd.DataFrame({"likes": [10]}).to_csv(csv, index=False)
+    chamadas.clear()
+
+    assert _pipeline(csv, cache, chamadas).executar() == {"total": 20}
+    assert chamadas == ["carregar", "normalizar", "resumir"]
+
+
+def test_reexecucao_parcial_a_partir_de(tmp_path, cache):
+    csv = str(tmp_path / "posts.csv")
+    pd.DataFrame({"likes": [1, 2, 3]}).to_csv(csv, index=False)
+    chamadas = []
+    _pipeline(csv, cache, chamadas).executar()
+
+    chamadas.clear()
+    _pipeline(csv, cache, chamadas).executar(a_partir_de="normalizar")
+    assert chamadas == ["normalizar", "resumir"]
+
+    with pytest.raises(ValueError):
+        _pipeline(csv, cache, chamadas).executar(a_partir_de="inexistente")
+
+
+def test_remocao_lru_por_tamanho(tmp_path):
+    cache = CacheEstagios(str(tmp_path / "cache"), tamanho_max_mb=0.05)
+    df = pd.DataFrame({"x": range(2000)})
+
+    for i in range(10):
+        cache.gravar(f"chave{i}", "teste", df.assign(i=i))
+
+    assert cache.stats["removidos"] > 0
+    assert cache.contem("chave9")
+    assert not cache.contem("chave0")
+    total = sum(
+        os.path.getsize(os.path.join(cache.diretorio, n))
+        for n in os.listdir(cache.diretorio)
+    )
+    assert total <= cache.tamanho_max
@@ -0,0 +1,108 @@
+import datetime
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.armazenamento_posts import consultar_posts, fechar_engines, upsert_posts
+from modules.modelo import criar_dataframe_posts
+from modules.posts import Post, PostBatch
+
+
+def _posts(n=3):
+    base = datetime.datetime(2025, 11, 3, 10)
+    return [
+        Post(
+            post_id=100 + i,
+            shortcode=f"SC{i}",
+            datetime=base + datetime.timedelta(hours=i),
+            likes=10 * i,
+            comments=None if i == 1 else i,
+            caption=f"legenda {i}",
+            is_video=i == 2,
+            profile="perfil",
+        )
+        for i in range(n)
+    ]
+
+
+def test_post_sem_dict_e_url():
+    post = _posts(1)[0]
+    assert not hasattr(post, "__dict__")
+    assert post.url == "https://www.instagram.com/p/SC0/"
+    assert sys.getsizeof(post) < 120
+
+
+def test_lote_ida_e_volta():
+    posts = _posts()
+    lote = PostBatch.de_posts(posts)
+
+    assert len(lote) == 3
+    assert list(lote) == posts
+    assert lote[-1] == posts[-1]
+    assert list(lote[1:]) == posts[1:]
+
+    df = lote.para_pandas()
+    assert df["post_id"].dtype == "Int64"
+    assert df["caption"].dtype == "string[pyarrow]"
+    assert df["comments"].isna().tolist() == [False, True, False]
+    assert df["url"].tolist()[0] == "https://www.instagram.com/p/SC0/"
+    assert df["hour"].tolist() == [10, 11, 12]
+    assert list(PostBatch.de_dataframe(df)) == posts
+
+    tabela = lote.para_arrow()
+    assert tabela.column("comments").null_count == 1
+    assert tabela.column("is_video").to_pylist() == [False, False, True]
+
+
+def test_conversao_para_pandas_nao_copia_colunas_numericas():
+    lote = PostBatch.de_posts(_posts())
+    df = lote.para_pandas()
+
+    assert np.shares_memory(df["likes"].array._data, lote.likes)
+    assert np.shares_memory(df["datetime"].to_numpy(), lote.datetime)
+
+
+def test_concatenar_e_lote_grande_compacto():
+    n = 200_000
+    lote = PostBatch.de_colunas(
+        post_id=np.arange(n),
+        shortcode=[f"C{i:08d}" for i in range(n)],
+        datetime=pd.date_range("2024-01-01", periods=n, freq="min"),
+        likes=np.arange(n) % 500,
+        comments=np.arange(n) % 30,
+        profile="perfil",
+    )
+    juntos = PostBatch.concatenar([lote[:1000], lote[1000:]])
+
+    assert len(juntos) == n
+    assert juntos[n - 1].post_id == n - 1
+    # ~70 bytes por post, contra ~1 KB de um dict por post
+    assert lote.nbytes < 100 * n
+
+
+def test_lote_aceito_pelo_modelo_e_armazenamento(tmp_path):
+    lote = PostBatch.de_posts(_posts())
+
+    df = criar_dataframe_posts(lote)
+    assert df.columns.tolist() == ["shortcode", "post_date", "likes", "comments"]
+    assert df["post_date"].iloc[0] == pd.Timestamp("2025-11-03 10:00")
+    assert criar_dataframe_posts(_posts()).equals(df)
+
+    db_path = str(tmp_path / "posts.db")
+    try:
+        assert upsert_posts(lote, db_path=db_path) == 3
+        armazenado = consultar_posts(db_path, colunas=["post_id", "likes"])
+    finally:
+        fechar_engines()
+    assert sorted(armazenado["post_id"]) == [100, 101, 102]
+
+
+@pytest.mark.parametrize("n", [0, 4])
+def test_coletar_simulado_usa_lote(n):
+    from modules.coleta_instagram import coletar_simulado
+
+    df = coletar_simulado(n)
+    assert len(df) == n
+    assert df["likes"].dtype == "Int64"
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from modules import otimizacao_engajamento
+from modules.otimizacao_engajamento import prever_curtidas, prever_engajamento
+from modules.registro_modelos import RegistroModelos, hash_dados
+
+
+def test_hash_dados_depende_do_conteudo(dados):
+    df = dados()
+    assert hash_dados(df) == hash_dados(df.copy())
+    assert hash_dados(df) == hash_dados(df[df.columns[::-1]])
+    alterado = df.copy()
+    alterado.loc[0, "curtidas"] += 1
+    assert hash_dados(df) != hash_dados(alterado)
+
+
+def test_reaproveita_modelo_com_mesmos_dados(registro, monkeypatch, dados):
+    df = dados()
+    modelo, r2 = prever_engajamento(df, registro=registro)
+    assert len(registro.listar("engajamento")) == 1
+
+    # Novo processo: cache vazio, modelo carregado do disco sem treinar
+    registro.limpar_cache()
+    monkeypatch.setattr(
+        "sklearn.ensemble.RandomForestRegressor.fit",
+        lambda *a, **k: pytest.fail("não deveria treinar"),
+    )
+    carregado, r2_carregado = prever_engajamento(df, registro=registro)
+
+    assert r2_carregado == pytest.approx(r2)
+    X = df[otimizacao_engajamento.FEATURES]
+    np.testing.assert_allclose(carregado.predict(X), modelo.predict(X))
+
+
+def test_dados_novos_geram_novo_modelo(registro, dados):
+    prever_engajamento(dados(semente=0), registro=registro)
+    prever_engajamento(dados(semente=1), registro=registro)
+
+    metas = registro.listar("engajamento")
+    assert len(metas) == 2
+    assert {"features", "r2", "hash_dados", "criado_em"} <= set(metas[0])
+
+
+def test_previsao_sem_treino(registro, dados):
+    with pytest.raises(FileNotFoundError):
+        prever_curtidas(dados(), registro=registro)
+
+    df = dados()
+    prever_engajamento(df, registro=registro)
+    previstas = prever_curtidas(df.head(5), registro=registro)
+    assert previstas.shape == (5,)
+
+
+def test_cache_limitado_e_retencao_em_disco(tmp_path):
+    registro = RegistroModelos(str(tmp_path / "modelos"), max_cache=2, manter=2)
+    for i in range(4):
+        registro.salvar("a", f"k{i}", {"versao": i})
+        artefato = registro.caminho_artefato("a", f"k{i}", "horarios.parquet")
+        open(artefato, "wb").close()
+
+    # Só as duas versões mais recentes ficam no disco, com seus artefatos
+    assert [m["chave"] for m in registro.listar("a")] == ["k3", "k2"]
+    assert sorted(p.name for p in (tmp_path / "modelos" / "a").iterdir()) == [
+        "k2.horarios.parquet",
+        "k2.joblib",
+        "k2.json",
+        "k3.horarios.parquet",
+        "k3.joblib",
+        "k3.json",
+    ]
+    # A versão substituída sai do cache ao gravar a nova
+    assert list(registro._cache) == [("a", "k3")]
+
+    registro.salvar("b", "x", {})
+    registro.carregar("a", "k2")
+    registro.salvar("c", "y", {})
+    assert list(registro._cache) == [("a", "k2"), ("c", "y")]
+    assert registro.carregar("a", "k3")[0] == {"versao": 3}
@@ -0,0 +1,121 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from modules.armazenamento_posts import fechar_engines, upsert_posts
+from modules.rollups import reconstruir_rollups, rollup_diario, rollup_por_hora
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "posts.db")
+    fechar_engines()
+
+
+def _posts(ids, perfil="a", likes=None):
+    # 2025-11-03 é uma segunda-feira; dois posts por dia, às 10h e 18h
+    base = datetime.datetime(2025, 11, 3, 10)
+    datas = [base + datetime.timedelta(days=i // 2, hours=8 * (i % 2)) for i in ids]
+    return pd.DataFrame(
+        {
+            "post_id": ids,
+            "profile": perfil,
+            "datetime": datas,
+            "likes": likes if likes is not None else [10 * (i + 1) for i in ids],
+            "comments": [i for i in ids],
+            "hour": [d.hour for d in datas],
+        }
+    )
+
+
+def test_rollup_diario_e_por_hora(db_path):
+    upsert_posts(_posts(list(range(6))), db_path)
+
+    dia = rollup_diario("a", db_path=db_path)
+    assert dia["date"].tolist() == [
+        datetime.date(2025, 11, 3),
+        datetime.date(2025, 11, 4),
+        datetime.date(2025, 11, 5),
+    ]
+    primeiro = dia.iloc[0]
+    assert primeiro["posts"] == 2
+    assert primeiro["likes_soma"] == 30
+    assert primeiro["likes_media"] == 15
+    assert primeiro["likes_p50"] == 15
+
+    hora = rollup_por_hora("a", db_path=db_path)
+    segunda_10h = hora[(hora["dia_semana"] == 0) & (hora["hour"] == 10)].iloc[0]
+    assert segunda_10h["posts"] == 1
+    assert segunda_10h["likes_soma"] == 10
+    assert len(hora) == 6
+
+
+def test_atualizacao_incremental_igual_a_reconstrucao(db_path):
+    upsert_posts(_posts(list(range(6))), db_path)
+    upsert_posts(_posts(list(range(20, 24)), perfil="b"), db_path)
+
+    # Métricas atualizadas de posts antigos + post novo de outro dia
+    upsert_posts(_posts([0, 1], likes=[1000, 2000]), db_path)
+    upsert_posts(_posts([6]), db_path)
+
+    dia_incremental = rollup_diario(db_path=db_path)
+    hora_incremental = rollup_por_hora(db_path=db_path)
+
+    reconstruir_rollups(db_path)
+    pd.testing.assert_frame_equal(dia_incremental, rollup_diario(db_path=db_path))
+    pd.testing.assert_frame_equal(hora_incremental, rollup_por_hora(db_path=db_path))
+
+    primeiro = dia_incremental.iloc[0]
+    assert primeiro["likes_soma"] == 3000
+    assert set(dia_incremental["profile"]) == {"a", "b"}
+
+
+def test_posts_sem_coluna_hour(db_path):
+    """
+    Posts gravados sem a coluna `hour` (fora de PostBatch.para_pandas) também
+    entram no rollup por hora incremental.
+    """
+    upsert_posts(_posts(list(range(6))).drop(columns="hour"), db_path)
+    upsert_posts(_posts([0], likes=[500]).drop(columns="hour"), db_path)
+
+    hora_incremental = rollup_por_hora("a", db_path=db_path)
+    assert len(hora_incremental) == 6
+    segunda_10h = hora_incremental[
+        (hora_incremental["dia_semana"] == 0) & (hora_incremental["hour"] == 10)
+    ]
+    assert segunda_10h["likes_soma"].tolist() == [500]
+
+    reconstruir_rollups(db_path)
+    pd.testing.assert_frame_equal(
+        hora_incremental, rollup_por_hora("a", db_path=db_path)
+    )
+
+
+def test_filtro_por_periodo(db_path):
+    upsert_posts(_posts(list(range(6))), db_path)
+
+    dia = rollup_diario("a", inicio="2025-11-04", fim="2025-11-05", db_path=db_path)
+    assert dia["date"].tolist() == [datetime.date(2025, 11, 4)]
+
+
+def test_post_que_muda_de_dia(db_path):
+    post = pd.DataFrame(
+        {
+            "post_id": [1],
+            "profile": "a",
+            "datetime": [datetime.datetime(2024, 1, 1, 10)],
+            "likes": [10],
+            "comments": [1],
+        }
+    )
+    upsert_posts(post, db_path)
+    upsert_posts(post.assign(datetime=[datetime.datetime(2024, 1, 3, 15)]), db_path)
+
+    dia = rollup_diario("a", db_path=db_path)
+    assert dia["date"].tolist() == [datetime.date(2024, 1, 3)]
+    hora = rollup_por_hora("a", db_path=db_path)
+    assert list(zip(hora["dia_semana"], hora["hour"])) == [(2, 15)]
+
+    reconstruir_rollups(db_path)
+    pd.testing.assert_frame_equal(dia, rollup_diario("a", db_path=db_path))
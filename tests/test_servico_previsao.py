@@ -0,0 +1,100 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.otimizacao_engajamento import FEATURES, prever_engajamento
+from modules.servico_previsao import ServicoPrevisao, prever_remoto
+
+
+@pytest.fixture
+def servico(registro):
+    servico = ServicoPrevisao(porta=0, registro=registro, espera_ms=20)
+    yield servico.iniciar_em_thread()
+    servico.parar()
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=10) as resposta:
+        return json.loads(resposta.read())
+
+
+def test_previsao_igual_ao_modelo(registro, servico, dados):
+    modelo, _ = prever_engajamento(dados(), registro=registro)
+    linhas = [
+        {"hora_postagem": 19, "dia_semana": 4, "hashtag_tendencia": 1},
+        {"hora_postagem": 3, "dia_semana": 0, "hashtag_tendencia": 0},
+    ]
+
+    previstas = prever_remoto(linhas, servico.url)
+    np.testing.assert_allclose(
+        previstas, modelo.predict(pd.DataFrame(linhas)[FEATURES])
+    )
+
+    horarios = _get(f"{servico.url}/melhores_horarios?n=2")["horarios"]
+    assert [h["hora_postagem"] for h in horarios] == [19, 19]
+
+
+def test_requisicoes_simultaneas_em_micro_lotes(registro, servico, dados):
+    prever_engajamento(dados(), registro=registro)
+    prever_engajamento(dados(pico=6), registro=registro, perfil="madrugador")
+
+    resultados = {}
+
+    def pedir(i):
+        linha = {"hora_postagem": 6, "dia_semana": 1, "hashtag_tendencia": 0}
+        if i % 2:
+            linha["profile"] = "madrugador"
+        resultados[i] = prever_remoto([linha], servico.url)[0]
+
+    threads = [threading.Thread(target=pedir, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Cada linha usa o modelo do seu perfil, mesmo no mesmo lote
+    assert all(resultados[i] > resultados[0] + 100 for i in range(1, 16, 2))
+
+    stats = _get(f"{servico.url}/estatisticas")
+    assert stats["requisicoes"] == 16 and stats["erros"] == 0
+    assert stats["lotes"] < 16 and stats["lote_max"] > 1
+    assert stats["latencia_p99_ms"] >= stats["latencia_p50_ms"] > 0
+
+
+def test_erros(servico):
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        prever_remoto([{"hora_postagem": 1}], servico.url)
+    assert erro.value.code == 400
+
+    # Sem modelo treinado
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        prever_remoto(
+            [{"hora_postagem": 1, "dia_semana": 1, "hashtag_tendencia": 0}],
+            servico.url,
+        )
+    assert erro.value.code == 503
+
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        _get(f"{servico.url}/inexistente")
+    assert erro.value.code == 404
+    assert _get(f"{servico.url}/saude") == {"ok": True}
+
+
+def test_linha_fora_do_dominio(registro, servico, dados):
+    prever_engajamento(dados(), registro=registro)
+    linhas = [
+        {"hora_postagem": 19, "dia_semana": 4, "hashtag_tendencia": 1},
+        {"hora_postagem": 19, "dia_semana": 7, "hashtag_tendencia": 1},
+    ]
+
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        prever_remoto(linhas, servico.url)
+    assert erro.value.code == 400
+    resposta = json.loads(erro.value.read())
+    assert resposta["campo"] == "dia_semana"
+    assert "Linha 1" in resposta["erro"]
@@ -0,0 +1,118 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules.sessoes_instagram import PoolSessoes
+
+
+class LoaderFalso:
+    def __init__(self, usuario, valido=True):
+        self.usuario = usuario
+        self.valido = valido
+        self.context = SimpleNamespace(is_logged_in=True)
+
+    def test_login(self):
+        return self.usuario if self.valido else None
+
+
+@pytest.fixture
+def criados():
+    return []
+
+
+@pytest.fixture
+def pool(criados):
+    def fabrica(usuario, arquivo):
+        loader = LoaderFalso(usuario)
+        criados.append(loader)
+        return loader
+
+    return PoolSessoes(
+        [("a", "a.session"), ("b", "b.session")],
+        fabrica=fabrica,
+        fabrica_anonima=lambda: LoaderFalso(None),
+        intervalo_verificacao=0,
+    )
+
+
+def test_pool_reaproveita_em_round_robin(pool, criados):
+    """
+    As sessões são criadas uma única vez e alternadas entre as chamadas.
+    """
+    usados = [pool.obter().usuario for _ in range(4)]
+
+    assert usados == ["a", "b", "a", "b"]
+    assert len(criados) == 2
+
+
+def test_pool_anonimo_por_thread(pool):
+    """
+    Cada thread recebe a sua instância anônima, reaproveitada na mesma thread.
+    """
+    principal = pool.obter(autenticado=False)
+    outras = []
+    t = threading.Thread(target=lambda: outras.append(pool.obter(autenticado=False)))
+    t.start()
+    t.join()
+
+    assert pool.obter(autenticado=False) is principal
+    assert outras[0] is not principal
+
+
+def test_pool_recarrega_sessao_expirada(pool, criados):
+    """
+    Sessões que falham na verificação de saúde são recriadas.
+    """
+    primeira = pool.obter()
+    pool.obter()
+    primeira.valido = False
+
+    nova = pool.obter()
+
+    assert nova is not primeira
+    assert nova.usuario == "a"
+    assert len(criados) == 3
+
+
+def test_pool_pula_sessao_em_quarentena(pool):
+    """
+    Sessões marcadas com falha ficam fora do rodízio temporariamente.
+    """
+    a = pool.obter()
+    pool.marcar_falha(a, segundos=60)
+
+    assert [pool.obter().usuario for _ in range(3)] == ["b", "b", "b"]
+    stats = {s["usuario"]: s for s in pool.estatisticas()}
+    assert stats["a"]["em_quarentena"]
+
+
+def test_login_lento_nao_bloqueia_outras_sessoes():
+    """
+    Enquanto uma sessão faz login, as demais continuam sendo entregues.
+    """
+    liberar = threading.Event()
+
+    def fabrica(usuario, arquivo):
+        if usuario == "lenta":
+            liberar.wait(10)
+        return LoaderFalso(usuario)
+
+    pool = PoolSessoes(
+        [("lenta", "l.session"), ("rapida", "r.session")],
+        fabrica=fabrica,
+        intervalo_verificacao=60,
+    )
+    lenta = []
+    t = threading.Thread(target=lambda: lenta.append(pool.obter()))
+    t.start()
+    time.sleep(0.05)
+
+    inicio = time.monotonic()
+    assert pool.obter().usuario == "rapida"
+    assert time.monotonic() - inicio < 1
+
+    liberar.set()
+    t.join()
+    assert lenta[0].usuario == "lenta"
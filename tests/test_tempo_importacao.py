@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.bench_importacao import (
+    ORCAMENTOS_MS,
+    RAIZ,
+    medir_importacao,
+    verificar_orcamento,
+)
+
+
+@pytest.mark.parametrize("modulo", sorted(ORCAMENTOS_MS))
+def test_importacao_dentro_do_orcamento(modulo):
+    medicao = medir_importacao(modulo, repeticoes=3)
+    assert verificar_orcamento(medicao) == []
+
+
+def test_help_nao_carrega_dependencias_pesadas():
+    codigo = (
+        "import sys, main\n"
+        "try:\n"
+        "    main.main(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('carregados:', ','.join(m for m in ('pandas', 'instaloader', 'loguru') "
+        "if m in sys.modules))\n"
+    )
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert saida.splitlines()[-1].strip() == "carregados:"
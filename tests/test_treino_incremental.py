@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from modules.otimizacao_engajamento import (
+    FEATURES,
+    atualizar_engajamento,
+    prever_engajamento,
+)
+
+
+def test_atualizacao_treina_so_o_lote_novo(registro, monkeypatch, dados):
+    prever_engajamento(dados(), registro=registro)
+    lote = dados(100, semente=1)
+
+    tamanhos = []
+    fit_original = RandomForestRegressor.fit
+
+    def fit_espiao(self, X, y, *a, **k):
+        tamanhos.append(len(X))
+        return fit_original(self, X, y, *a, **k)
+
+    monkeypatch.setattr("sklearn.ensemble.RandomForestRegressor.fit", fit_espiao)
+    modelo, r2 = atualizar_engajamento(lote, registro=registro, arvores_por_lote=10)
+
+    assert tamanhos == [100]  # o lote inteiro, nunca o histórico
+    assert len(modelo.estimators_) == 110
+    assert r2 > 0.9
+
+    meta = registro.mais_recente("engajamento")
+    assert meta["atualizacoes"] == 1
+    assert meta["n_amostras"] == 500
+
+    # Mesmo lote de novo: nada muda
+    de_novo, _ = atualizar_engajamento(lote, registro=registro, arvores_por_lote=10)
+    assert len(de_novo.estimators_) == 110
+    assert len(registro.listar("engajamento")) == 2
+
+
+def test_janela_de_arvores(registro, dados):
+    prever_engajamento(dados(), registro=registro)
+    for semente in range(1, 4):
+        modelo, _ = atualizar_engajamento(
+            dados(100, semente),
+            registro=registro,
+            arvores_por_lote=20,
+            max_arvores=120,
+        )
+    assert len(modelo.estimators_) == 120
+    assert modelo.n_estimators == 120
+
+
+@pytest.mark.parametrize("dia_inicial", [0, 1])
+def test_retreino_completo_periodico(registro, dados, dia_inicial):
+    lotes = [dados(dia_inicial=dia_inicial)]
+    prever_engajamento(lotes[0], registro=registro)
+    carregamentos = []
+
+    def carregar_historico():
+        carregamentos.append(1)
+        return pd.concat(lotes, ignore_index=True)
+
+    for semente in range(1, 4):
+        lotes.append(dados(100, semente, dia_inicial=dia_inicial))
+        atualizar_engajamento(
+            lotes[-1],
+            registro=registro,
+            historico=carregar_historico,
+            retreino_a_cada=2,
+        )
+        if semente == 2:
+            assert carregamentos == []
+            assert registro.mais_recente("engajamento")["atualizacoes"] == 2
+
+    assert carregamentos == [1]
+    meta = registro.mais_recente("engajamento")
+    assert "atualizacoes" not in meta
+    assert meta["n_amostras"] == 700
+    # O retreino mantém a convenção de dia_semana do histórico
+    assert meta["dia_semana_inicial"] == dia_inicial
+
+
+def test_mudanca_de_padrao_dispara_retreino(registro, dados):
+    prever_engajamento(dados(pico=19), registro=registro)
+    novo_padrao = dados(400, semente=5, pico=6)
+
+    modelo, r2 = atualizar_engajamento(
+        novo_padrao, registro=registro, historico=novo_padrao
+    )
+    assert "atualizacoes" not in registro.mais_recente("engajamento")
+    grade = pd.DataFrame({f: [0, 0] for f in FEATURES}).assign(hora_postagem=[6, 19])
+    previstas = modelo.predict(grade)
+    assert previstas[0] > previstas[1]
+
+
+@pytest.mark.parametrize("n", [1, 2])
+def test_lotes_pequenos(registro, n, dados):
+    """
+    Lotes de 1 ou 2 posts são treinados inteiros, o R² gravado vem da
+    validação (nunca NaN) e a checagem de queda de R² não dispara.
+    """
+    prever_engajamento(dados(pico=19), registro=registro)
+    carregamentos = []
+
+    def carregar_historico():
+        carregamentos.append(1)
+        return dados(pico=19)
+
+    lote = dados(n, semente=7, pico=6)
+    modelo, r2 = atualizar_engajamento(
+        lote, registro=registro, historico=carregar_historico
+    )
+
+    assert carregamentos == []
+    meta = registro.mais_recente("engajamento")
+    assert meta["atualizacoes"] == 1
+    assert meta["r2"] == pytest.approx(r2) and np.isfinite(r2)
+
+    # A validação segue com o modelo atualizado: o próximo lote também mede R²
+    _, r2_seguinte = atualizar_engajamento(dados(n, semente=8), registro=registro)
+    assert np.isfinite(r2_seguinte)
+
+
+def test_lote_1_a_7_sem_domingo_usa_a_convencao_do_modelo(registro, dados):
+    base = dados(pico=19, dia_inicial=1)  # fonte em 1-7
+    prever_engajamento(base, registro=registro)
+    assert registro.mais_recente("engajamento")["dia_semana_inicial"] == 1
+
+    # Lote sem 7 (nem 0): ambíguo sozinho, resolvido pelos metadados
+    lote = dados(50, semente=3, pico=19, dia_inicial=1)
+    lote = lote[lote["dia_semana"].between(2, 6)]
+    assert not lote["dia_semana"].isin([0, 7]).any()
+
+    with pytest.raises(ValueError, match="ambígua"):
+        prever_engajamento(lote, registro=registro)
+
+    atualizar_engajamento(lote, registro=registro, arvores_por_lote=5)
+    meta = registro.mais_recente("engajamento")
+    assert meta["atualizacoes"] == 1 and meta["dia_semana_inicial"] == 1
+
+    # Valores fora da convenção gravada são rejeitados
+    with pytest.raises(ValueError, match="fora de 1-7"):
+        atualizar_engajamento(
+            lote.assign(dia_semana=0), registro=registro, arvores_por_lote=5
+        )